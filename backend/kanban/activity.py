@@ -0,0 +1,35 @@
+"""
+Activity feed of boards and cards.
+
+Views append an ``ActivityEvent`` in the same transaction as the change it
+describes: one INSERT per mutation, or one ``bulk_create`` per batch for
+bulk operations. Events are never updated; the payload keeps only ids
+the client can resolve against the board it already has loaded.
+"""
+from .models import ActivityEvent
+
+
+def event(kind, actor, board_id, entity_id, card_id=None, **data):
+    """An unsaved event, for ``record_many``"""
+    return ActivityEvent(
+        kind=kind,
+        actor=actor if actor is not None and actor.is_authenticated else None,
+        board_id=board_id,
+        entity_id=entity_id,
+        card_id=card_id,
+        data=data,
+    )
+
+
+def record(kind, actor, board_id, entity_id, card_id=None, **data):
+    return event(kind, actor, board_id, entity_id, card_id, **data).save()
+
+
+def record_many(events):
+    if events:
+        ActivityEvent.objects.bulk_create(events)
+
+
+def card_events(kind, actor, board_id, card_ids, **data):
+    """The same event for each card of a batch"""
+    return [event(kind, actor, board_id, card_id, card_id, **data) for card_id in card_ids]
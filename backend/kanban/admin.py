@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Board, BoardMember, List, Card, Label, Comment, CommentReaction,
-    Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate
+    Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate, Job,
+    BulkOperation, CardTransition, ListFlowDay, ActivityEvent
 )
 
 
@@ -95,3 +96,41 @@ class BoardTemplateAdmin(admin.ModelAdmin):
     list_display = ['name', 'created_by', 'is_public', 'created_at']
     list_filter = ['is_public', 'created_at']
     search_fields = ['name', 'description']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'priority', 'attempts',
+                    'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at']
+
+
+@admin.register(BulkOperation)
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = ['action', 'board', 'user', 'affected',
+                    'created_at', 'undone_at']
+    list_filter = ['action', 'created_at']
+    exclude = ['undo_data']
+
+
+@admin.register(CardTransition)
+class CardTransitionAdmin(admin.ModelAdmin):
+    list_display = ['card', 'from_list', 'to_list', 'created_at', 'rolled_up']
+    list_filter = ['rolled_up', 'created_at']
+    raw_id_fields = ['card', 'from_list', 'to_list']
+
+
+@admin.register(ListFlowDay)
+class ListFlowDayAdmin(admin.ModelAdmin):
+    list_display = ['list', 'board', 'day', 'arrivals', 'departures', 'completions']
+    list_filter = ['day']
+    raw_id_fields = ['board', 'list']
+
+
+@admin.register(ActivityEvent)
+class ActivityEventAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'actor', 'board', 'card_id', 'entity_id', 'created_at']
+    list_filter = ['kind', 'created_at']
+    raw_id_fields = ['actor', 'board']
@@ -0,0 +1,263 @@
+"""
+Flow analytics: cumulative flow, cycle time and throughput.
+
+Every time a card enters or leaves a list, the write that does it records a
+``CardTransition``, a single INSERT. Job workers queue the ``analytics.rollup``
+job every ``ROLLUP_INTERVAL`` seconds while transitions are pending, off the
+request path, and it folds them into per list and per day rows: ``ListFlowDay`` counts arrivals, departures and
+completions, and ``CycleTimeDay`` holds a histogram of cycle times. Each
+transition is counted exactly once, so the rollups grow with the number of
+days and lists, not with the history. The reports read only the rollups.
+
+Archiving does not move a card out of its list, so archived cards still
+count in their list's flow, and done cards pile up in the last list. A card
+completes a list the first time it is moved there. Its cycle time starts
+when it first left the list it was created in. A card moved straight from
+that list into the target counts from its creation.
+"""
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min, Sum
+from django.utils import timezone
+
+from .models import CardTransition, CycleTimeDay, List, ListFlowDay
+
+ANALYTICS_SETTINGS = {
+    # Seconds between rollups queued by the job workers
+    'ROLLUP_INTERVAL': 60,
+    'ROLLUP_BATCH_SIZE': 1000,
+    # Longest date range a report accepts
+    'MAX_DAYS': 731,
+    'DEFAULT_DAYS': 30,
+    **getattr(settings, 'KANBAN_ANALYTICS', {}),
+}
+
+# Upper bounds of the cycle time histogram buckets in seconds; the last
+# bucket holds everything longer
+CYCLE_TIME_BUCKETS = tuple(hours * 3600 for hours in (
+    1, 4, 8, 24, 48, 72, 120, 168, 240, 336, 504, 720, 1440, 2160))
+CYCLE_TIME_PERCENTILES = (50, 85, 95)
+
+
+class RaceError(Exception):
+    """Another rollup claimed part of the batch"""
+
+
+def pending():
+    """Whether transitions are waiting for a rollup"""
+    return CardTransition.objects.filter(rolled_up=False).exists()
+
+
+def record(card_id, from_list_id, to_list_id):
+    """Log one card entering and/or leaving a list"""
+    if from_list_id == to_list_id:
+        return
+    CardTransition.objects.create(
+        card_id=card_id, from_list_id=from_list_id, to_list_id=to_list_id)
+
+
+def record_created(cards):
+    """Log the arrival of newly created cards in their lists"""
+    if not cards:
+        return
+    CardTransition.objects.bulk_create([
+        CardTransition(card_id=card.id, to_list_id=card.list_id) for card in cards
+    ])
+
+
+def record_moves(moves, to_list_id):
+    """Log ``(card_id, from_list_id)`` pairs of cards moving to ``to_list_id``"""
+    if not moves:
+        return
+    CardTransition.objects.bulk_create([
+        CardTransition(card_id=card_id, from_list_id=list_id, to_list_id=to_list_id)
+        for card_id, list_id in moves
+    ])
+
+
+def _increment(model, keys, values):
+    """Add ``values`` to the counters of the row identified by ``keys``"""
+    updated = model.objects.filter(**keys).update(
+        **{field: F(field) + value for field, value in values.items()})
+    if not updated:
+        model.objects.create(**keys, **values)
+
+
+def _bucket(seconds):
+    return bisect.bisect_left(CYCLE_TIME_BUCKETS, seconds)
+
+
+def _fold(rows):
+    """Per list and day counters and cycle time buckets of a batch"""
+    list_ids = {row[key] for row in rows for key in ('from_list_id', 'to_list_id')}
+    boards = dict(List.objects.filter(id__in=list_ids - {None}).values_list('id', 'board_id'))
+    card_ids = {row['card_id'] for row in rows if row['card_id'] is not None}
+
+    # The earliest arrival of each card in each list tells first arrivals
+    # apart; cycle times start at the first move or the creation
+    first_arrivals = {
+        (row['card_id'], row['to_list_id']): row['first']
+        for row in CardTransition.objects.filter(card_id__in=card_ids).values(
+            'card_id', 'to_list_id').annotate(first=Min('id')).order_by()
+    }
+    started = dict(CardTransition.objects.filter(
+        card_id__in=card_ids, from_list__isnull=False).values(
+        'card_id').annotate(at=Min('created_at')).order_by().values_list('card_id', 'at'))
+    created = dict(CardTransition.objects.filter(card_id__in=card_ids).values(
+        'card_id').annotate(at=Min('created_at')).order_by().values_list('card_id', 'at'))
+
+    flow = defaultdict(lambda: defaultdict(int))
+    cycle = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        day = timezone.localdate(row['created_at'])
+        if row['from_list_id'] in boards:
+            flow[(row['from_list_id'], day)]['departures'] += 1
+        to_list_id = row['to_list_id']
+        if to_list_id not in boards:
+            continue
+        flow[(to_list_id, day)]['arrivals'] += 1
+
+        card_id = row['card_id']
+        if (row['from_list_id'] is None or card_id is None
+                or first_arrivals.get((card_id, to_list_id)) != row['id']):
+            continue
+        flow[(to_list_id, day)]['completions'] += 1
+        start = started.get(card_id)
+        if start is None or start >= row['created_at']:
+            start = created[card_id]
+        seconds = max((row['created_at'] - start).total_seconds(), 0)
+        bucket = cycle[(to_list_id, day, _bucket(seconds))]
+        bucket[0] += 1
+        bucket[1] += seconds
+    return boards, flow, cycle
+
+
+def rollup_batch(batch_size=None):
+    """Fold the oldest pending transitions into the rollups; returns how many"""
+    batch_size = batch_size or ANALYTICS_SETTINGS['ROLLUP_BATCH_SIZE']
+    with transaction.atomic():
+        rows = list(CardTransition.objects.filter(rolled_up=False).order_by('id').values(
+            'id', 'card_id', 'from_list_id', 'to_list_id', 'created_at')[:batch_size])
+        if not rows:
+            return 0
+        # Claim the rows first so a concurrent rollup cannot count them again
+        claimed = CardTransition.objects.filter(
+            id__in=[row['id'] for row in rows], rolled_up=False).update(rolled_up=True)
+        if claimed != len(rows):
+            raise RaceError
+
+        boards, flow, cycle = _fold(rows)
+        for (list_id, day), values in flow.items():
+            _increment(ListFlowDay, {'board_id': boards[list_id], 'list_id': list_id,
+                                     'day': day}, values)
+        for (list_id, day, bucket), (count, seconds) in cycle.items():
+            _increment(CycleTimeDay, {'board_id': boards[list_id], 'list_id': list_id,
+                                      'day': day, 'bucket': bucket},
+                       {'count': count, 'total_seconds': seconds})
+    return len(rows)
+
+
+def rollup(batch_size=None):
+    """Fold every pending transition, one short transaction per batch"""
+    total = 0
+    while True:
+        try:
+            folded = rollup_batch(batch_size)
+        except RaceError:
+            continue
+        if not folded:
+            return total
+        total += folded
+
+
+def _days(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def cumulative_flow(board_id, start, end):
+    """Cards in each live list of the board at the end of every day"""
+    lists = list(List.objects.filter(board_id=board_id, archived=False).order_by(
+        'position', 'created_at').values('id', 'title'))
+    flow = ListFlowDay.objects.filter(list_id__in=[list_obj['id'] for list_obj in lists])
+
+    counts = {row['list_id']: row['arrivals'] - row['departures']
+              for row in flow.filter(day__lt=start).values('list_id').annotate(
+                  arrivals=Sum('arrivals'), departures=Sum('departures')).order_by()}
+    changes = defaultdict(dict)
+    for list_id, day, arrivals, departures in flow.filter(
+            day__range=(start, end)).values_list('list_id', 'day', 'arrivals', 'departures'):
+        changes[day][list_id] = arrivals - departures
+
+    days = []
+    for day in _days(start, end):
+        for list_id, change in changes[day].items():
+            counts[list_id] = counts.get(list_id, 0) + change
+        days.append({
+            'date': day.isoformat(),
+            'counts': [counts.get(list_obj['id'], 0) for list_obj in lists],
+        })
+    return {'from': start.isoformat(), 'to': end.isoformat(), 'lists': lists, 'days': days}
+
+
+def _percentile(buckets, total, percentile):
+    """Interpolate a percentile inside the histogram bucket holding it"""
+    rank = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            if index == len(CYCLE_TIME_BUCKETS):
+                return CYCLE_TIME_BUCKETS[-1]
+            lower = CYCLE_TIME_BUCKETS[index - 1] if index else 0
+            return lower + (CYCLE_TIME_BUCKETS[index] - lower) * (rank - seen) / count
+        seen += count
+    return None
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+
+def cycle_time(list_id, start, end):
+    """Cycle time percentiles of the cards completed in a list during the range"""
+    buckets = [0] * (len(CYCLE_TIME_BUCKETS) + 1)
+    seconds = 0
+    for bucket, count, total_seconds in CycleTimeDay.objects.filter(
+            list_id=list_id, day__range=(start, end)).values('bucket').annotate(
+            count=Sum('count'), total_seconds=Sum('total_seconds')).order_by().values_list(
+            'bucket', 'count', 'total_seconds'):
+        buckets[bucket] = count
+        seconds += total_seconds
+
+    total = sum(buckets)
+    return {
+        'list': list_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'count': total,
+        'mean_hours': _hours(seconds / total) if total else None,
+        **{f'p{percentile}_hours': _hours(_percentile(buckets, total, percentile))
+           for percentile in CYCLE_TIME_PERCENTILES},
+        'histogram': [
+            {'le_hours': _hours(bound) if bound is not None else None, 'count': count}
+            for bound, count in zip(CYCLE_TIME_BUCKETS + (None,), buckets)
+        ],
+    }
+
+
+def throughput(list_id, start, end):
+    """Cards completed in a list on every day of the range"""
+    completed = dict(ListFlowDay.objects.filter(
+        list_id=list_id, day__range=(start, end)).values_list('day', 'completions'))
+    days = [{'date': day.isoformat(), 'count': completed.get(day, 0)}
+            for day in _days(start, end)]
+    return {
+        'list': list_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'total': sum(day['count'] for day in days),
+        'days': days,
+    }
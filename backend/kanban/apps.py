@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class KanbanConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kanban'
+
+    def ready(self):
+        # Register background job handlers and cache invalidation signals,
+        # and time serializers for request instrumentation
+        from . import authentication, board_cache, instrumentation, membership, tasks  # noqa: F401
+        instrumentation.install()
@@ -0,0 +1,80 @@
+"""
+JWT authentication that does not load the user row on every request.
+
+The access token is verified as usual, and its user id claim is trusted.
+The user is then built from a cached copy of its row, kept in a
+``VersionedLRUCache`` that a save or delete of the user invalidates.
+
+Deactivating an account therefore takes effect on the next request only
+in the process that saved it, or in every process when ``CACHES`` is a
+shared backend. With the default local-memory cache, other processes keep
+the cached row for up to ``KANBAN_USER_CACHE_TTL`` seconds. A queryset
+``update()`` or raw SQL sends no signal, so it is only picked up when the
+TTL runs out everywhere. Lower the TTL where that window matters.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import VersionedLRUCache
+
+USER_CACHE_TTL = getattr(settings, 'KANBAN_USER_CACHE_TTL', 300)
+USER_CACHE_SIZE = getattr(settings, 'KANBAN_USER_CACHE_SIZE', 4096)
+
+User = get_user_model()
+_cache = VersionedLRUCache('kanban:user', USER_CACHE_TTL, USER_CACHE_SIZE)
+_field_names = [field.attname for field in User._meta.concrete_fields]
+
+
+def _load_row(user_id):
+    return User._default_manager.filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).values_list(*_field_names).first()
+
+
+def cached_user(user_id):
+    """
+    Return a fresh User instance for ``user_id`` built from the cached row,
+    or None if there is no such user. Each call gets its own instance, so
+    request code can never mutate the cached copy.
+    """
+    row = _cache.get(user_id, lambda: _load_row(user_id))
+    if row is None:
+        return None
+    return User.from_db(DEFAULT_DB_ALIAS, _field_names, row)
+
+
+def invalidate(user_ids):
+    _cache.invalidate(user_ids)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the current password hash
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    transaction.on_commit(lambda: invalidate([user_id]))
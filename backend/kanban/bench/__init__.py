@@ -0,0 +1,23 @@
+"""
+Benchmark suite for ``manage.py kanban_bench`` and ``manage.py kanban_load``.
+
+``generate`` builds synthetic boards with ``bulk_create`` and ``scenarios``
+times the API calls the frontend makes against them. Everything runs in a
+transaction that is rolled back, so a benchmark can run against the local
+SQLite database without network access or leftover rows.
+
+``load`` instead drives a running server with concurrent simulated users.
+Its board has to be committed for the server to see it and is purged once
+the run ends.
+"""
+import subprocess
+
+
+def git_commit():
+    """Short hash of the checked out commit, recorded in the reports"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
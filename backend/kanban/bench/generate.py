@@ -0,0 +1,149 @@
+"""Synthetic boards for benchmarks, inserted with ``bulk_create``"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from ..models import (Attachment, Board, BoardMember, BoardTemplate, Card,
+                      Checklist, ChecklistItem, Comment, CustomField,
+                      CustomFieldValue, Label, List)
+
+# Shapes selectable with ``kanban_bench --scale``
+SCALES = {
+    'small': {'lists': 5, 'cards_per_list': 20, 'archived_per_list': 2, 'comments': 1,
+              'checklist_items': 3, 'attachments': 0, 'custom_fields': 2, 'members': 3,
+              'boards': 5},
+    'medium': {'lists': 10, 'cards_per_list': 100, 'archived_per_list': 10, 'comments': 2,
+               'checklist_items': 4, 'attachments': 1, 'custom_fields': 3, 'members': 10,
+               'boards': 20},
+    'large': {'lists': 20, 'cards_per_list': 250, 'archived_per_list': 25, 'comments': 3,
+              'checklist_items': 6, 'attachments': 1, 'custom_fields': 5, 'members': 25,
+              'boards': 50},
+}
+
+LABEL_COLORS = ['#3B82F6', '#EF4444', '#10B981', '#F59E0B', '#8B5CF6']
+FIELD_TYPES = ['number', 'text', 'checkbox', 'date', 'dropdown']
+
+
+def users(count, prefix='bench'):
+    """``count`` users without usable passwords"""
+    tag = uuid.uuid4().hex[:8]
+    return User.objects.bulk_create([
+        User(username=f'{prefix}-{tag}-{i}', password='!')
+        for i in range(count)
+    ])
+
+
+def board(owner, lists=10, cards_per_list=100, archived_per_list=0, comments=2,
+          checklist_items=4, attachments=1, custom_fields=3, members=5, labels=5,
+          title='Bench board'):
+    """
+    Create a board owned by ``owner`` with ``members`` other members and
+    ``archived_per_list`` archived cards after the live ones. Every card
+    gets up to three labels, ``comments`` comments, one checklist with
+    ``checklist_items`` items (half completed), ``attachments`` attachment
+    rows without files, and a value for each custom field. The denormalized
+    counters are set to match.
+    """
+    board = Board.objects.create(title=title, owner=owner)
+    people = [owner] + users(members)
+    BoardMember.objects.bulk_create(
+        [BoardMember(board=board, user=owner, role='owner')]
+        + [BoardMember(board=board, user=user, role='member') for user in people[1:]]
+    )
+
+    list_objs = List.objects.bulk_create([
+        List(board=board, title=f'List {i}', position=i) for i in range(lists)
+    ])
+    label_objs = Label.objects.bulk_create([
+        Label(board=board, name=f'Label {i}', color=LABEL_COLORS[i % len(LABEL_COLORS)])
+        for i in range(labels)
+    ])
+    fields = CustomField.objects.bulk_create([
+        CustomField(board=board, name=f'Field {i}',
+                    field_type=FIELD_TYPES[i % len(FIELD_TYPES)], position=i,
+                    options=['Low', 'High'] if FIELD_TYPES[i % len(FIELD_TYPES)] == 'dropdown' else [])
+        for i in range(custom_fields)
+    ])
+
+    completed = checklist_items // 2
+    archived_at = timezone.now()
+    cards = Card.objects.bulk_create([
+        Card(list=list_obj, title=f'Card {i}-{j}', position=j,
+             description='Lorem ipsum dolor sit amet ' * 4,
+             created_by=people[(i + j) % len(people)],
+             archived=j >= cards_per_list,
+             archived_at=archived_at if j >= cards_per_list else None,
+             comment_count=comments,
+             checklist_item_count=checklist_items,
+             checklist_completed_count=completed)
+        for i, list_obj in enumerate(list_objs)
+        for j in range(cards_per_list + archived_per_list)
+    ])
+
+    if label_objs:
+        Card.labels.through.objects.bulk_create([
+            Card.labels.through(card_id=card.id, label_id=label_objs[(i + k) % len(label_objs)].id)
+            for i, card in enumerate(cards) for k in range(i % 4)
+            if k < len(label_objs)
+        ])
+    Comment.objects.bulk_create([
+        Comment(card=card, author=people[(i + k) % len(people)],
+                content=f'Comment {k} on card {i}')
+        for i, card in enumerate(cards) for k in range(comments)
+    ])
+    if checklist_items:
+        checklists = Checklist.objects.bulk_create([
+            Checklist(card=card, title='Tasks', item_count=checklist_items,
+                      completed_count=completed)
+            for card in cards
+        ])
+        ChecklistItem.objects.bulk_create([
+            ChecklistItem(checklist=checklist, text=f'Item {k}', position=k,
+                          completed=k < completed)
+            for checklist in checklists for k in range(checklist_items)
+        ])
+    Attachment.objects.bulk_create([
+        Attachment(card=card, uploaded_by=owner, file=f'attachments/bench/{card.id}-{k}.pdf',
+                   name=f'file-{k}.pdf', size=1024 * (k + 1), content_type='application/pdf')
+        for card in cards for k in range(attachments)
+    ])
+    CustomFieldValue.objects.bulk_create([
+        _field_value(field, card, i)
+        for i, card in enumerate(cards) for field in fields
+    ])
+    return board
+
+
+def _field_value(field, card, i):
+    value = CustomFieldValue(custom_field=field, card=card)
+    if field.field_type == 'number':
+        value.value, value.number_value = str(i), i
+    elif field.field_type == 'checkbox':
+        value.value, value.bool_value = str(i % 2 == 0).lower(), i % 2 == 0
+    elif field.field_type == 'date':
+        date = timezone.now()
+        value.value, value.date_value = date.isoformat(), date
+    elif field.field_type == 'dropdown':
+        value.value = field.options[i % len(field.options)]
+    else:
+        value.value = f'Value {i}'
+    return value
+
+
+def template(owner, lists=5, cards_per_list=10, labels=5):
+    """A private template in the ``board_data`` shape the template views expect"""
+    return BoardTemplate.objects.create(
+        name='Bench template', created_by=owner,
+        board_data={
+            'title': 'Bench',
+            'lists': [
+                {'title': f'List {i}', 'position': i,
+                 'cards': [{'title': f'Card {j}', 'position': j}
+                           for j in range(cards_per_list)]}
+                for i in range(lists)
+            ],
+            'labels': [{'name': f'Label {i}', 'color': LABEL_COLORS[i % len(LABEL_COLORS)]}
+                       for i in range(labels)],
+        },
+    )
@@ -0,0 +1,284 @@
+"""
+Concurrent collaborators against a running server.
+
+Each simulated user is a thread with its own keep-alive HTTP connection and
+JWT, picking operations from a weighted mix the way people working on the
+same sprint board do. Responses are classified so SQLite lock errors stand
+apart from other failures, and every operation keeps its latencies for the
+percentiles in the report.
+"""
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .. import instrumentation, purge
+from ..models import Board, Card, ChecklistItem
+from . import generate
+
+# Relative weights of ``kanban_load --mix``
+DEFAULT_MIX = {
+    'board_read': 40,
+    'card_move': 25,
+    'comment_post': 15,
+    'checklist_toggle': 15,
+    'list_reorder': 5,
+}
+
+_operations = {}
+
+
+def operation(name):
+    """Register an operation building ``(method, path, body, headers)``"""
+    def decorator(func):
+        _operations[name] = func
+        return func
+    return decorator
+
+
+def names():
+    return list(_operations)
+
+
+def parse_mix(value):
+    """``'card_move=50,board_read=50'`` as a weight dict"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in _operations:
+            raise ValueError(f'Unknown operation {name!r}, choose from {", ".join(names())}')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f'Weight of {name} must be a number')
+        if mix[name] < 0:
+            raise ValueError(f'Weight of {name} must not be negative')
+    if not any(mix.values()):
+        raise ValueError('At least one operation needs a positive weight')
+    return mix
+
+
+@operation('board_read')
+def board_read(ctx, user):
+    """Reload the board, revalidating the last ETag like the browser does"""
+    headers = {'If-None-Match': user.etag} if user.etag else {}
+    return 'GET', f'/api/boards/{ctx.board_id}/', None, headers
+
+
+@operation('card_move')
+def card_move(ctx, user):
+    """Drag a card to a random spot of a random list"""
+    return 'POST', '/api/cards/move/', {
+        'card_id': user.rng.choice(ctx.cards),
+        'list_id': user.rng.choice(ctx.lists),
+        'position': round(user.rng.uniform(0, ctx.cards_per_list), 3),
+    }, {}
+
+
+@operation('comment_post')
+def comment_post(ctx, user):
+    card = user.rng.choice(ctx.cards)
+    return 'POST', f'/api/cards/{card}/comments/', {
+        'content': f'Load test comment from {user.name}',
+    }, {}
+
+
+@operation('checklist_toggle')
+def checklist_toggle(ctx, user):
+    item, checklist = user.rng.choice(ctx.items)
+    return 'PATCH', f'/api/checklists/{checklist}/items/{item}/', {
+        'completed': user.rng.random() < 0.5,
+    }, {}
+
+
+@operation('list_reorder')
+def list_reorder(ctx, user):
+    """Drop a list somewhere else and send the whole order"""
+    order = list(ctx.lists)
+    order.insert(user.rng.randrange(len(order)), order.pop(user.rng.randrange(len(order))))
+    return 'POST', f'/api/boards/{ctx.board_id}/reorder-lists/', {
+        'list_orders': [{'id': pk, 'position': position}
+                        for position, pk in enumerate(order)],
+    }, {}
+
+
+def setup(users, lists=8, cards_per_list=40, checklist_items=4):
+    """
+    Create a board shared by ``users`` members with a token each. The rows
+    are committed, since the server under test reads them from its own
+    connection; ``teardown`` removes them.
+    """
+    owner, = generate.users(1, prefix='load-owner')
+    board = generate.board(owner, lists=lists, cards_per_list=cards_per_list,
+                           comments=1, checklist_items=checklist_items,
+                           attachments=0, members=users - 1, title='Load test board')
+    people = [owner] + list(User.objects.filter(
+        board_memberships__board=board).exclude(id=owner.id).order_by('id'))
+    return SimpleNamespace(
+        board_id=board.id,
+        cards_per_list=cards_per_list,
+        users=[(user.id, str(AccessToken.for_user(user))) for user in people],
+        lists=list(board.lists.order_by('position').values_list('id', flat=True)),
+        cards=list(Card.objects.filter(list__board=board, archived=False)
+                   .order_by('id').values_list('id', flat=True)),
+        items=list(ChecklistItem.objects.filter(checklist__card__list__board=board)
+                   .order_by('id').values_list('id', 'checklist_id')),
+    )
+
+
+def teardown(ctx):
+    """Purge the load test board and delete its users"""
+    Board.all_objects.filter(id=ctx.board_id).update(deleted_at=timezone.now())
+    purge.purge_board(ctx.board_id)
+    User.objects.filter(id__in=[user_id for user_id, _ in ctx.users]).delete()
+
+
+class Connection:
+    """A keep-alive connection to the server, reopened after failures"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.https = parts.scheme == 'https'
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.netloc, timeout=self.timeout)
+        try:
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            return response.status, response.getheaders(), response.read()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def classify(status, body):
+    """Outcome of a response as counted in the report"""
+    if status < 400:
+        return 'ok'
+    if b'database is locked' in body:
+        return 'database_locked'
+    return f'http_{status}'
+
+
+def _worker(ctx, url, user_id, token, mix, seed, deadline, think_time, timeout, results):
+    user = SimpleNamespace(name=f'user {user_id}', rng=random.Random(seed), etag=None)
+    ops, weights = zip(*mix.items())
+    conn = Connection(url, timeout)
+    auth = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    try:
+        while time.monotonic() < deadline:
+            name = user.rng.choices(ops, weights)[0]
+            method, path, body, headers = _operations[name](ctx, user)
+            payload = json.dumps(body).encode() if body is not None else None
+            start = time.perf_counter()
+            try:
+                status, response_headers, content = conn.request(
+                    method, path, payload, {**auth, **headers})
+                outcome = classify(status, content)
+            except TimeoutError:
+                outcome = 'timeout'
+            except (OSError, http.client.HTTPException):
+                outcome = 'connection_error'
+            else:
+                if name == 'board_read' and status == 200:
+                    user.etag = dict(response_headers).get('ETag')
+            results.append((name, outcome, (time.perf_counter() - start) * 1000))
+            if think_time:
+                time.sleep(user.rng.expovariate(1 / think_time))
+    finally:
+        conn.close()
+
+
+def run(ctx, url, duration, mix=None, think_time=0, timeout=30, seed=0):
+    """
+    Run one thread per user of ``ctx`` for ``duration`` seconds. Returns
+    the raw ``(operation, outcome, latency_ms)`` samples and the elapsed
+    wall time.
+    """
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight}
+    results = []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=_worker, daemon=True, args=(
+            ctx, url.rstrip('/'), user_id, token, mix, seed * 1000 + i,
+            deadline, think_time, timeout, results))
+        for i, (user_id, token) in enumerate(ctx.users)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - start
+
+
+def _summary(samples, elapsed):
+    latencies = sorted(latency for _, _, latency in samples)
+    outcomes = {}
+    for _, outcome, _ in samples:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    errors = len(samples) - outcomes.pop('ok', 0)
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'error_rate': round(errors / len(samples), 4),
+        'errors': dict(sorted(outcomes.items())),
+        'latency_ms': {
+            'p50': round(instrumentation.percentile(latencies, 0.50), 2),
+            'p95': round(instrumentation.percentile(latencies, 0.95), 2),
+            'p99': round(instrumentation.percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2),
+        },
+    }
+
+
+def summarize(results, elapsed):
+    """Totals and per operation throughput, errors and latency percentiles"""
+    if not results:
+        return {'total': None, 'operations': {}}
+    by_operation = {}
+    for sample in results:
+        by_operation.setdefault(sample[0], []).append(sample)
+    return {
+        'total': _summary(results, elapsed),
+        'operations': {name: _summary(samples, elapsed)
+                       for name, samples in sorted(by_operation.items())},
+    }
+
+
+def scrape_locked(url, token='', timeout=5):
+    """
+    ``kanban_database_locked_total`` from the server's ``/metrics``, or None
+    when the endpoint is not reachable with ``token``
+    """
+    conn = Connection(url, timeout)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    try:
+        status, _, content = conn.request('GET', '/metrics', headers=headers)
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    if status != 200:
+        return None
+    match = re.search(rb'^kanban_database_locked_total (\S+)$', content, re.M)
+    return float(match.group(1)) if match else 0.0
@@ -0,0 +1,351 @@
+"""
+Query-count regression checks for every route in ``kanban/urls.py``.
+
+Each route is requested against a small and a large seeded world. A route
+whose query count grows with the data has an N+1; a route that needs more
+queries than its budget in ``query_budgets.json`` has regressed. Writes run
+in a savepoint that is rolled back, so every request sees the same data.
+``check_query_counts`` seeds the worlds in a fresh test database, which
+keeps the counts independent of the data in the configured one.
+"""
+import json
+import os
+import re
+from collections import Counter
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient
+
+from .. import board_cache, bulk, membership, urls
+from ..models import (BoardMember, Card, Checklist, ChecklistItem, Comment,
+                      CommentReaction, CustomField, Job, List)
+from . import generate
+from .scenarios import quiet
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'query_budgets.json')
+
+WORLDS = {
+    'small': {'lists': 2, 'cards_per_list': 3, 'archived_per_list': 1, 'comments': 1,
+              'checklist_items': 2, 'attachments': 1, 'custom_fields': 2, 'members': 1,
+              'boards': 2, 'reactions': 1},
+    'large': {'lists': 6, 'cards_per_list': 25, 'archived_per_list': 5, 'comments': 5,
+              'checklist_items': 8, 'attachments': 3, 'custom_fields': 5, 'members': 8,
+              'boards': 6, 'reactions': 5},
+}
+
+# Routes that cannot be checked as a board member
+SKIPPED = {
+    'user-register': 'anonymous signup',
+    'request-metrics': 'staff only',
+}
+
+# Object used for the ``pk`` of detail routes
+DETAIL_OBJECTS = {
+    'board-detail': 'board',
+    'board-add-member': 'board',
+    'board-remove-member': 'board',
+    'board-list-detail': 'other_list',
+    'board-label-detail': 'label',
+    'list-card-detail': 'card',
+    'card-detail': 'card',
+    'card-comment-detail': 'comment',
+    'card-checklist-detail': 'checklist',
+    'checklist-item-detail': 'item',
+    'card-attachment-detail': 'attachment',
+    'board-member-detail': 'member',
+    'board-custom-field-detail': 'field',
+    'card-custom-field-value-detail': 'field_value',
+    'board-template-detail': 'template',
+    'job-detail': 'job',
+}
+
+URL_KWARGS = {
+    'board_pk': 'board',
+    'list_pk': 'list',
+    'card_pk': 'card',
+    'checklist_pk': 'checklist',
+    'comment_pk': 'comment',
+    'template_id': 'template',
+    'token': 'token',
+}
+
+# Request bodies of the writes that are checked, keyed by (method, route).
+# PUT runs the same code as PATCH and is not repeated; uploads would leave
+# files behind in MEDIA_ROOT
+WRITES = {
+    ('POST', 'board-list'): lambda ctx: {'title': 'New board'},
+    ('PATCH', 'board-detail'): lambda ctx: {'title': 'Renamed'},
+    ('DELETE', 'board-detail'): lambda ctx: None,
+    ('POST', 'board-add-member'): lambda ctx: {'username': ctx.invitees[0]},
+    ('DELETE', 'board-remove-member'): lambda ctx: {'user_id': ctx.member_user},
+    ('POST', 'board-lists'): lambda ctx: {'title': 'New list'},
+    ('PATCH', 'board-list-detail'): lambda ctx: {'title': 'Renamed'},
+    ('DELETE', 'board-list-detail'): lambda ctx: None,
+    ('POST', 'list-archive-all-cards'): lambda ctx: {},
+    ('POST', 'list-move-all-cards'): lambda ctx: {'target_list_id': ctx.other_list},
+    ('POST', 'list-sort-cards'): lambda ctx: {'sort_by': 'title_asc'},
+    ('POST', 'list-relabel-cards'): lambda ctx: {'add_label_ids': ctx.labels},
+    ('POST', 'bulk-operation-undo'): lambda ctx: {},
+    ('POST', 'reorder-lists'): lambda ctx: {'list_orders': [
+        {'id': pk, 'position': position}
+        for position, pk in enumerate(reversed(ctx.lists))]},
+    ('POST', 'board-archive-restore'): lambda ctx: {'card_ids': ctx.archived},
+    ('POST', 'board-labels'): lambda ctx: {'name': 'New label', 'color': '#000000'},
+    ('PATCH', 'board-label-detail'): lambda ctx: {'name': 'Renamed'},
+    ('DELETE', 'board-label-detail'): lambda ctx: None,
+    ('POST', 'board-relabel-cards'): lambda ctx: {
+        'card_ids': ctx.cards, 'add_label_ids': ctx.labels[:1]},
+    ('POST', 'list-cards'): lambda ctx: {'title': 'New card'},
+    ('PATCH', 'list-card-detail'): lambda ctx: {'title': 'Renamed'},
+    ('DELETE', 'list-card-detail'): lambda ctx: None,
+    ('POST', 'card-move'): lambda ctx: {
+        'card_id': ctx.card, 'list_id': ctx.other_list, 'position': 0},
+    ('PATCH', 'card-detail'): lambda ctx: {'title': 'Renamed'},
+    ('DELETE', 'card-detail'): lambda ctx: None,
+    ('POST', 'card-comments'): lambda ctx: {'content': 'New comment'},
+    ('PATCH', 'card-comment-detail'): lambda ctx: {'content': 'Edited'},
+    ('DELETE', 'card-comment-detail'): lambda ctx: None,
+    ('POST', 'card-checklists'): lambda ctx: {'title': 'New checklist'},
+    ('PATCH', 'card-checklist-detail'): lambda ctx: {'title': 'Renamed'},
+    ('DELETE', 'card-checklist-detail'): lambda ctx: None,
+    ('POST', 'checklist-items'): lambda ctx: {'text': 'New item'},
+    ('POST', 'checklist-items-bulk'): lambda ctx: {'text': 'One\nTwo\nThree'},
+    ('POST', 'checklist-items-reorder'): lambda ctx: {'item_ids': ctx.items[::-1]},
+    ('POST', 'checklist-items-move'): lambda ctx: {
+        'item_ids': ctx.items, 'target_checklist_id': ctx.other_checklist},
+    ('POST', 'checklist-items-complete-all'): lambda ctx: {'completed': True},
+    ('PATCH', 'checklist-item-detail'): lambda ctx: {'completed': True},
+    ('DELETE', 'checklist-item-detail'): lambda ctx: None,
+    ('PATCH', 'card-attachment-detail'): lambda ctx: {'name': 'renamed.pdf'},
+    ('DELETE', 'card-attachment-detail'): lambda ctx: None,
+    ('POST', 'board-members'): lambda ctx: {'username': ctx.invitees[0]},
+    ('POST', 'board-members-invite'): lambda ctx: {'identifiers': ctx.invitees},
+    ('POST', 'board-members-copy'): lambda ctx: {'source_board_id': ctx.other_board},
+    ('PATCH', 'board-member-detail'): lambda ctx: {'role': 'admin'},
+    ('DELETE', 'board-member-detail'): lambda ctx: None,
+    ('POST', 'comment-reactions'): lambda ctx: {'emoji': '👎'},
+    ('DELETE', 'comment-reactions'): lambda ctx: {'emoji': '👍'},
+    ('POST', 'board-custom-fields'): lambda ctx: {'name': 'New field', 'field_type': 'text'},
+    ('PATCH', 'board-custom-field-detail'): lambda ctx: {'name': 'Renamed'},
+    ('DELETE', 'board-custom-field-detail'): lambda ctx: None,
+    ('POST', 'card-custom-field-values'): lambda ctx: {
+        'custom_field_id': ctx.free_field, 'value': 'Set'},
+    ('PATCH', 'card-custom-field-value-detail'): lambda ctx: {'value': '8'},
+    ('DELETE', 'card-custom-field-value-detail'): lambda ctx: None,
+    ('POST', 'card-custom-field-values-batch'): lambda ctx: {
+        'values': {str(ctx.field): '7'}},
+    ('POST', 'board-custom-field-values-batch'): lambda ctx: {
+        'custom_field_id': ctx.field, 'card_ids': ctx.cards, 'value': '7'},
+    ('POST', 'board-templates'): lambda ctx: {
+        'name': 'New template', 'board_data': {'title': 'New', 'lists': []}},
+    ('PATCH', 'board-template-detail'): lambda ctx: {'name': 'Renamed'},
+    ('DELETE', 'board-template-detail'): lambda ctx: None,
+    ('POST', 'board-template-create-board'): lambda ctx: {},
+}
+
+_numbers = re.compile(r'\b\d+(\.\d+)?\b')
+_strings = re.compile(r"'(?:[^']|'')*'")
+_in_lists = re.compile(r'\bIN \((?:[^()]+)\)')
+_savepoints = re.compile(r'"s\d+_x\d+"')
+_case_branches = re.compile(r'(WHEN \([^()]*\) THEN \? ?)+')
+_value_rows = re.compile(r'VALUES (\([^()]*\)(, )?)+')
+
+
+def fingerprint(sql):
+    """SQL with literals, IN lists, CASE branches and VALUES rows collapsed"""
+    sql = _savepoints.sub('"savepoint"', sql)
+    sql = _strings.sub('?', sql)
+    sql = _numbers.sub('?', sql)
+    sql = _case_branches.sub('WHEN ... THEN ? ', sql)
+    sql = _value_rows.sub('VALUES (...)', sql)
+    return _in_lists.sub('IN (...)', sql)
+
+
+def routes():
+    """(name, route pattern, url kwarg names, methods) of every kanban route"""
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+                continue
+            kwargs = list(pattern.pattern.regex.groupindex)
+            # Skip the router's duplicate ``.json`` suffix routes
+            if 'format' in kwargs:
+                continue
+            callback = pattern.callback
+            actions = getattr(callback, 'actions', None)
+            if actions:
+                methods = [method.upper() for method in actions]
+            else:
+                view_class = callback.view_class
+                methods = [method.upper() for method in view_class.http_method_names
+                           if method not in ('head', 'options', 'trace')
+                           and hasattr(view_class, method)]
+            yield pattern.name, str(pattern.pattern), kwargs, methods
+    return list(walk(urls.urlpatterns))
+
+
+def seed(size):
+    """A board owned by a fresh user plus ids of one of everything in it"""
+    shape = WORLDS[size]
+    owner, = generate.users(1, prefix=f'queries-{size}')
+    board_shape = {key: value for key, value in shape.items()
+                   if key not in ('boards', 'reactions')}
+    board = generate.board(owner, **board_shape)
+    other_boards = [generate.board(owner, **board_shape, title=f'Other {i}')
+                    for i in range(shape['boards'] - 1)]
+    for _ in range(shape['boards']):
+        generate.template(owner)
+
+    lists = list(List.objects.filter(board=board).order_by('position')
+                 .values_list('id', flat=True))
+    cards = list(Card.objects.filter(list_id=lists[0], archived=False)
+                 .order_by('position').values_list('id', flat=True))
+    card = Card.objects.get(id=cards[0])
+    checklist = Checklist.objects.filter(card=card).first()
+    comment = Comment.objects.filter(card=card).first()
+    CommentReaction.objects.bulk_create([
+        CommentReaction(comment=comment, user=user, emoji='👍')
+        for user in [owner] + generate.users(shape['reactions'] - 1)
+    ])
+    operation = bulk.sort(Card.objects.filter(list_id=lists[0], archived=False),
+                          'created_desc', board, owner)
+    job = Job.objects.create(name='thumbnails.generate', created_by=owner)
+    # A field no card has a value for yet
+    free_field = CustomField.objects.create(board=board, name='Unset', field_type='text')
+
+    client = APIClient(HTTP_HOST=next(
+        (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost'))
+    client.force_authenticate(owner)
+    other = other_boards[0] if other_boards else board
+    return SimpleNamespace(
+        client=client,
+        board=board.id,
+        other_board=other.id,
+        lists=lists,
+        list=lists[0],
+        other_list=lists[1],
+        card=card.id,
+        cards=cards,
+        archived=list(Card.objects.filter(list__board=board, archived=True)
+                      .values_list('id', flat=True)),
+        comment=comment.id,
+        checklist=checklist.id,
+        other_checklist=Checklist.objects.filter(card_id=cards[1]).values_list(
+            'id', flat=True).first(),
+        items=list(ChecklistItem.objects.filter(checklist=checklist)
+                   .order_by('position').values_list('id', flat=True)),
+        item=ChecklistItem.objects.filter(checklist=checklist).values_list(
+            'id', flat=True).first(),
+        attachment=card.attachments.values_list('id', flat=True).first(),
+        labels=list(board.labels.values_list('id', flat=True)),
+        label=board.labels.values_list('id', flat=True).first(),
+        field=CustomField.objects.filter(board=board, field_type='number').values_list(
+            'id', flat=True).first(),
+        field_value=card.custom_field_values.values_list('id', flat=True).first(),
+        member=BoardMember.objects.filter(board=board).exclude(user=owner).values_list(
+            'id', flat=True).first(),
+        member_user=BoardMember.objects.filter(board=board).exclude(user=owner).values_list(
+            'user_id', flat=True).first(),
+        free_field=free_field.id,
+        invitees=list(BoardMember.objects.filter(board=other).exclude(user=owner)
+                      .values_list('user__username', flat=True)),
+        template=owner.created_templates.values_list('id', flat=True).first(),
+        job=job.id,
+        token=operation.token,
+    )
+
+
+def _url(name, kwargs, ctx):
+    values = {}
+    for kwarg in kwargs:
+        attribute = DETAIL_OBJECTS[name] if kwarg == 'pk' else URL_KWARGS[kwarg]
+        values[kwarg] = getattr(ctx, attribute)
+    return reverse(name, kwargs=values)
+
+
+def measure(method, name, kwargs, ctx):
+    """Status code and SQL of one request, rolled back if it wrote anything"""
+    url = _url(name, kwargs, ctx)
+    body = WRITES[(method, name)](ctx) if method != 'GET' else None
+    membership.clear()
+    store = board_cache.get_store()
+    if store is not None:
+        store.clear()
+
+    # The savepoint is never committed, so on_commit work such as the board
+    # revision bump runs inside it to be counted
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as captured, \
+                TestCase.captureOnCommitCallbacks(execute=True):
+            if method == 'GET':
+                response = ctx.client.get(url)
+            else:
+                response = getattr(ctx.client, method.lower())(url, body, format='json')
+        transaction.set_rollback(True)
+    return response.status_code, [query['sql'] for query in captured.captured_queries]
+
+
+def load_budgets(path=BUDGETS_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check(budgets):
+    """
+    Measure every checked route. Returns (results, uncovered) where results
+    maps ``"METHOD route-name"`` to a dict with the counts and a problem
+    description or None.
+    """
+    results, uncovered = {}, []
+    with quiet():
+        worlds = {size: seed(size) for size in WORLDS}
+        for name, route, kwargs, methods in routes():
+            if name in SKIPPED:
+                continue
+            for method in methods:
+                key = f'{method} {name}'
+                if method == 'PUT':
+                    continue
+                if method != 'GET' and (method, name) not in WRITES:
+                    uncovered.append(key)
+                    continue
+                # The first request pays one-off costs such as content types
+                measure(method, name, kwargs, worlds['small'])
+                counts, queries, problem = {}, {}, None
+                for size, ctx in worlds.items():
+                    status, queries[size] = measure(method, name, kwargs, ctx)
+                    counts[size] = len(queries[size])
+                    if status >= 400 and problem is None:
+                        problem = f'{size} world answered {status}'
+
+                budget = budgets.get(key, {})
+                grown = Counter(map(fingerprint, queries['large'])) - Counter(
+                    map(fingerprint, queries['small']))
+                if problem:
+                    pass
+                elif counts['large'] > counts['small'] and not budget.get('grows'):
+                    problem = (f"{counts['large'] - counts['small']} more queries "
+                               f"on the large world (N+1)")
+                elif 'queries' not in budget:
+                    problem = 'no budget recorded'
+                elif counts['large'] > budget['queries']:
+                    problem = f"{counts['large']} queries, budget is {budget['queries']}"
+
+                results[key] = {
+                    'route': route,
+                    'small': counts['small'],
+                    'large': counts['large'],
+                    'budget': budget.get('queries'),
+                    'problem': problem,
+                    'grown': grown.most_common(5),
+                }
+    return results, uncovered
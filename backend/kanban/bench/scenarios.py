@@ -0,0 +1,137 @@
+"""
+Timed API scenarios.
+
+A scenario is a function taking the benchmark context and the iteration
+number. It does any untimed preparation and returns the call to time,
+which goes through the full middleware and view stack with a test client.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .. import board_cache, instrumentation
+
+_registry = {}
+
+
+def scenario(name):
+    """Register a scenario under ``name``"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def names():
+    return list(_registry)
+
+
+@scenario('board_open')
+def board_open(ctx, i):
+    """Open the board with a cold board cache"""
+    board_cache.invalidate([ctx.board.id])
+    return lambda: ctx.client.get(f'/api/boards/{ctx.board.id}/')
+
+
+@scenario('board_open_cached')
+def board_open_cached(ctx, i):
+    """Open the board again, served from the board cache"""
+    return lambda: ctx.client.get(f'/api/boards/{ctx.board.id}/')
+
+
+@scenario('dashboard')
+def dashboard(ctx, i):
+    """The board list shown after login"""
+    return lambda: ctx.client.get('/api/boards/')
+
+
+@scenario('card_move')
+def card_move(ctx, i):
+    """Drag a card to the top of the next list"""
+    card = ctx.cards[i % len(ctx.cards)]
+    target = ctx.lists[(i + 1) % len(ctx.lists)]
+    return lambda: ctx.client.post('/api/cards/move/', {
+        'card_id': card, 'list_id': target, 'position': -i,
+    }, format='json')
+
+
+@scenario('list_reorder')
+def list_reorder(ctx, i):
+    """Rotate the order of every list on the board"""
+    shift = i % len(ctx.lists)
+    order = ctx.lists[shift:] + ctx.lists[:shift]
+    return lambda: ctx.client.post(f'/api/boards/{ctx.board.id}/reorder-lists/', {
+        'list_orders': [{'id': pk, 'position': position}
+                        for position, pk in enumerate(order)],
+    }, format='json')
+
+
+@scenario('template_instantiation')
+def template_instantiation(ctx, i):
+    """Create a board from a template synchronously"""
+    return lambda: ctx.client.post(f'/api/templates/{ctx.template.id}/create-board/')
+
+
+@scenario('search')
+def search(ctx, i):
+    """Load every card of the board, which the filter bar searches client-side"""
+    return lambda: ctx.client.get(f'/api/boards/{ctx.board.id}/cards/')
+
+
+@scenario('archive')
+def archive(ctx, i):
+    """First page of the board's archived cards"""
+    return lambda: ctx.client.get(f'/api/boards/{ctx.board.id}/archive/')
+
+
+@contextmanager
+def quiet():
+    """Silence per request logging, which would drown the report"""
+    loggers = [logging.getLogger(name) for name in ('kanban.requests', 'django.request')]
+    disabled = [logger.disabled for logger in loggers]
+    for logger in loggers:
+        logger.disabled = True
+    try:
+        yield
+    finally:
+        for logger, was_disabled in zip(loggers, disabled):
+            logger.disabled = was_disabled
+
+
+def _summary(values):
+    ordered = sorted(values)
+    return {
+        'p50': instrumentation.percentile(ordered, 0.50),
+        'p95': instrumentation.percentile(ordered, 0.95),
+        'p99': instrumentation.percentile(ordered, 0.99),
+        'max': ordered[-1],
+        'mean': round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def run(name, ctx, iterations, warmup=1):
+    """Latency (ms) and query count percentiles of ``iterations`` calls"""
+    func = _registry[name]
+    durations, queries, errors = [], [], 0
+    with quiet():
+        for i in range(warmup):
+            func(ctx, i)()
+        for i in range(warmup, warmup + iterations):
+            call = func(ctx, i)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = call()
+                elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors += 1
+            durations.append(round(elapsed * 1000, 3))
+            queries.append(len(captured))
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'latency_ms': _summary(durations),
+        'queries': _summary(queries),
+    }
@@ -0,0 +1,313 @@
+"""
+Cache of rendered board responses.
+
+``GET /api/boards/<id>/`` stores the JSON bytes it renders under
+(board id, board revision, view mode, member role). The view mode is the
+negotiated media type plus the request host, which the absolute file URLs
+depend on. A cache hit is served without running ``BoardSerializer`` or
+loading the board's lists and cards.
+
+Every write through the kanban views bumps ``Board.revision`` once the
+write is done (see ``BoardCacheMixin``). Entries for older revisions are
+never read again and the store evicts them as least recently used.
+
+The store is set with ``KANBAN_BOARD_CACHE['BACKEND']``: ``'memory'`` keeps
+entries per process, ``'file'`` shares a directory between the processes
+of one host, and a dotted path loads any class with the same interface.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import Attachment, Board, BoardMember, Card
+
+BOARD_CACHE = {
+    'BACKEND': 'memory',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'kanban-board-cache'),
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'MAX_ENTRIES': 2000,
+    **getattr(settings, 'KANBAN_BOARD_CACHE', {}),
+}
+
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0,
+          'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class MemoryStore:
+    """Per-process LRU capped by entry count and total bytes"""
+
+    def __init__(self, max_bytes, max_entries, **options):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while (self._bytes > self.max_bytes
+                   or len(self._entries) > self.max_entries):
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def size(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+
+class FileStore:
+    """
+    One file per entry in a directory shared by the processes of a host.
+    Reads touch the file's mtime, and eviction removes the oldest files,
+    which makes it an approximate LRU.
+    """
+
+    def __init__(self, max_bytes, max_entries, location, **options):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.location = location
+        self._written = None  # estimated bytes on disk, scanned on first write
+        self._lock = threading.Lock()
+        os.makedirs(location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return 0
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, self._path(key))
+
+        with self._lock:
+            if self._written is None:
+                self._written = self.size()['bytes']
+            else:
+                self._written += len(body)
+            if self._written <= self.max_bytes:
+                return 0
+            return self._cull()
+
+    def _scan(self):
+        entries = []
+        with os.scandir(self.location) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _cull(self):
+        """Remove the least recently used files down to 90% of the caps"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        while entries and (total > self.max_bytes * 0.9
+                           or len(entries) > self.max_entries * 0.9):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+        self._written = total
+        return evicted
+
+    def clear(self):
+        for _, _, path in self._scan():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._written = 0
+
+    def size(self):
+        entries = self._scan()
+        return {'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries)}
+
+
+BACKENDS = {'memory': MemoryStore, 'file': FileStore}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the configured store, or None when the cache is disabled"""
+    global _store
+    backend = BOARD_CACHE['BACKEND']
+    if not backend:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = BACKENDS.get(backend) or import_string(backend)
+                _store = store_class(
+                    max_bytes=BOARD_CACHE['MAX_BYTES'],
+                    max_entries=BOARD_CACHE['MAX_ENTRIES'],
+                    location=BOARD_CACHE['LOCATION'],
+                )
+    return _store
+
+
+def make_key(board_id, revision, view_mode, role):
+    return f'board:{board_id}:{revision}:{role}:{view_mode}'
+
+
+def lookup(key):
+    store = get_store()
+    body = store.get(key) if store else None
+    _count('hits' if body is not None else 'misses')
+    return body
+
+
+def save(key, body):
+    store = get_store()
+    if store is None:
+        return
+    evicted = store.set(key, body)
+    _count('stores')
+    if evicted:
+        _count('evictions', evicted)
+
+
+def revision(board_id):
+    """Current revision of a live board, or None if there is no such board"""
+    return Board.objects.filter(id=board_id).values_list(
+        'revision', flat=True).first()
+
+
+def invalidate(board_ids=None):
+    """Bump the revision of ``board_ids``, or of every board when None"""
+    boards = Board.all_objects.all()
+    if board_ids is not None:
+        board_ids = {board_id for board_id in board_ids if board_id is not None}
+        if not board_ids:
+            return
+        boards = boards.filter(id__in=board_ids)
+    changed = boards.update(revision=F('revision') + 1)
+    _count('invalidations', changed)
+
+
+def board_id_of(instance):
+    """The board an instance whose fields appear in board responses is on"""
+    if isinstance(instance, Board):
+        return instance.pk
+    if isinstance(instance, Card):
+        return instance.list.board_id
+    if isinstance(instance, Attachment):
+        return instance.card.list.board_id
+    return None
+
+
+def boards_of_user(user_id):
+    return list(BoardMember.objects.filter(
+        user_id=user_id).values_list('board_id', flat=True))
+
+
+def stats():
+    """Hit/miss counters of this process plus the store's current size"""
+    with _stats_lock:
+        result = dict(_stats)
+    lookups = result['hits'] + result['misses']
+    result['hit_ratio'] = result['hits'] / lookups if lookups else 0.0
+    store = get_store()
+    result['backend'] = BOARD_CACHE['BACKEND']
+    result.update(store.size() if store else {'entries': 0, 'bytes': 0})
+    return result
+
+
+@receiver(post_save, sender=User)
+def _user_changed(sender, instance, created, **kwargs):
+    # Owners and members are embedded in board responses
+    if not created:
+        user_id = instance.id
+        transaction.on_commit(lambda: invalidate(boards_of_user(user_id)))
+
+
+class BoardCacheMixin:
+    """
+    Bump the revision of the boards a write request touches. The boards
+    are resolved before the view runs, while rows it deletes still exist,
+    and bumped once a successful response is committed; failed writes and
+    version conflicts keep the cached payload. Views add boards the URL
+    does not name, such as a move target, to ``written_board_ids``.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.written_board_ids = set()
+        if request.method not in SAFE_METHODS:
+            self.written_board_ids.update(self.get_written_board_ids())
+
+    def get_written_board_ids(self):
+        board_pk = self.kwargs.get('board_pk')
+        if board_pk is not None:
+            return {int(board_pk)}
+        get_board = getattr(self, 'get_board', None)
+        board = get_board() if get_board else None
+        return {board.id} if board is not None else set()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        board_ids = getattr(self, 'written_board_ids', None)
+        if board_ids and 200 <= response.status_code < 300:
+            transaction.on_commit(lambda: invalidate(board_ids))
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,272 @@
+"""
+Bulk card operations for whole lists or card selections.
+
+Every operation works through the target cards in batches of
+``BULK_BATCH_SIZE`` with one short transaction per batch, so a 5k-card list
+never holds the SQLite write lock for long. Counts come from the UPDATE and
+DELETE row counts. Each call records one ``BulkOperation`` row with the
+data needed to revert it, and its token is handed back to the client as an
+undo token.
+"""
+import secrets
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from . import activity, analytics, metrics
+from .models import ActivityEvent, Board, BulkOperation, Card
+
+BULK_BATCH_SIZE = getattr(settings, 'KANBAN_BULK_BATCH_SIZE', 500)
+BULK_UNDO_TTL = getattr(settings, 'KANBAN_BULK_UNDO_TTL', 3600)
+# Largest explicit card selection accepted in one request
+BULK_MAX_SELECTION = 5000
+
+SORT_ORDERS = {
+    'created_desc': ('-created_at', '-id'),
+    'created_asc': ('created_at', 'id'),
+    'title_asc': ('title', 'id'),
+    'due_date_asc': (F('due_date').asc(nulls_last=True), 'id'),
+}
+
+
+class UndoError(Exception):
+    pass
+
+
+def _chunks(items, size=None):
+    size = size or BULK_BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _id_batches(queryset):
+    """Yield ids of ``queryset`` in ascending id ranges of bounded size"""
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by(
+            'id').values_list('id', flat=True)[:BULK_BATCH_SIZE])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _position_case(pairs):
+    return Case(
+        *[When(id=pk, then=Value(float(position))) for pk, position in pairs],
+        output_field=FloatField()
+    )
+
+
+def _log_moves(card_ids, list_id, board_id, user):
+    """Record the cards of ``card_ids`` that are about to move to another list"""
+    moves = list(Card.objects.filter(id__in=card_ids).exclude(
+        list_id=list_id).values_list('id', 'list_id'))
+    analytics.record_moves(moves, list_id)
+    activity.record_many([
+        activity.event(ActivityEvent.CARD_MOVED, user, board_id, card_id, card_id,
+                       from_list=from_list_id, to_list=list_id)
+        for card_id, from_list_id in moves
+    ])
+
+
+def _set_positions(pairs, list_id=None, board_id=None, user=None):
+    """
+    Write (card_id, position) pairs with one CASE UPDATE per batch, moving
+    the cards to ``list_id`` when given
+    """
+    fields = {} if list_id is None else {'list_id': list_id}
+    updated = 0
+    for batch in _chunks(pairs):
+        with transaction.atomic():
+            if list_id is not None:
+                _log_moves([pk for pk, _ in batch], list_id, board_id, user)
+            updated += Card.objects.filter(id__in=[pk for pk, _ in batch]).update(
+                position=_position_case(batch),
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+                **fields
+            )
+    return updated
+
+
+def _record(action, board, user, affected, undo_data):
+    operation = BulkOperation.objects.create(
+        token=secrets.token_urlsafe(24),
+        action=action,
+        board=board,
+        user=user,
+        affected=affected,
+        undo_data=undo_data,
+    )
+    # A single board-level change for the whole batch of card writes
+    Board.objects.filter(id=board.id).update(updated_at=timezone.now())
+    return operation
+
+
+def archive(cards, board, user):
+    """Archive every live card in ``cards``"""
+    cards = cards.filter(archived=False)
+    archived_ids = []
+    affected = 0
+
+    for ids in _id_batches(cards):
+        with transaction.atomic():
+            affected += Card.objects.filter(id__in=ids, archived=False).update(
+                archived=True, archived_at=timezone.now(), version=F('version') + 1,
+                updated_at=timezone.now())
+            activity.record_many(activity.card_events(
+                ActivityEvent.CARD_ARCHIVED, user, board.id, ids))
+        archived_ids.extend(ids)
+
+    return _record('archive', board, user, affected, {'card_ids': archived_ids})
+
+
+def move(cards, target_list, board, user):
+    """Append ``cards`` to the end of ``target_list``, keeping their order"""
+    previous = list(cards.exclude(list=target_list).order_by(
+        'position', 'created_at').values_list('id', 'list_id', 'position'))
+
+    last = target_list.cards.order_by('-position').values_list(
+        'position', flat=True).first() or 0
+    affected = _set_positions(
+        [(pk, last + index) for index, (pk, _, _) in enumerate(previous, start=1)],
+        list_id=target_list.id, board_id=board.id, user=user
+    )
+    metrics.inc('kanban_cards_moved_total', affected, labels=('bulk',))
+
+    return _record('move', board, user, affected, {
+        'cards': [[pk, list_id, position] for pk, list_id, position in previous]
+    })
+
+
+def sort(cards, sort_by, board, user):
+    """Persist positions 0..n-1 for ``cards`` in the requested order"""
+    rows = cards.order_by(*SORT_ORDERS[sort_by]).values_list('id', 'position')
+    previous, changed = [], []
+    for index, (pk, position) in enumerate(rows):
+        if position != index:
+            previous.append([pk, position])
+            changed.append((pk, index))
+
+    affected = _set_positions(changed)
+
+    return _record('sort', board, user, affected, {'cards': previous})
+
+
+def _label_events(board_id, user, added, removed):
+    """One event per card for (card_id, label_id) links added and removed"""
+    changes = defaultdict(lambda: {'added': [], 'removed': []})
+    for key, links in (('added', added), ('removed', removed)):
+        for card_id, label_id in links:
+            changes[card_id][key].append(label_id)
+    return [activity.event(ActivityEvent.CARD_LABELS_CHANGED, user, board_id,
+                           card_id, card_id, **change)
+            for card_id, change in changes.items()]
+
+
+def relabel(cards, board, user, add_label_ids=(), remove_label_ids=()):
+    """Add and remove labels on every card in ``cards``"""
+    through = Card.labels.through
+    add_label_ids = set(add_label_ids)
+    remove_label_ids = set(remove_label_ids) - add_label_ids
+    added, removed = [], []
+
+    for ids in _id_batches(cards):
+        batch_added, batch_removed = [], []
+        with transaction.atomic():
+            if remove_label_ids:
+                links = through.objects.filter(
+                    card_id__in=ids, label_id__in=remove_label_ids)
+                batch_removed = list(links.values_list('card_id', 'label_id'))
+                links.delete()
+
+            if add_label_ids:
+                existing = set(through.objects.filter(
+                    card_id__in=ids, label_id__in=add_label_ids
+                ).values_list('card_id', 'label_id'))
+                batch_added = [(card_id, label_id) for card_id in ids
+                               for label_id in add_label_ids
+                               if (card_id, label_id) not in existing]
+                through.objects.bulk_create(
+                    [through(card_id=card_id, label_id=label_id)
+                     for card_id, label_id in batch_added],
+                    ignore_conflicts=True
+                )
+
+            activity.record_many(_label_events(board.id, user, batch_added, batch_removed))
+        added.extend(batch_added)
+        removed.extend(batch_removed)
+
+    affected = len({card_id for card_id, _ in added + removed})
+    return _record('relabel', board, user, affected, {
+        'added': [list(link) for link in added],
+        'removed': [list(link) for link in removed],
+    })
+
+
+def undo(operation, user=None):
+    """Revert a bulk operation and return how many cards were restored"""
+    if operation.undone_at is not None:
+        raise UndoError('Operation was already undone')
+    if operation.created_at < timezone.now() - timedelta(seconds=BULK_UNDO_TTL):
+        raise UndoError('Undo token has expired')
+
+    # Claim the token first so concurrent undo requests cannot both apply it
+    claimed = BulkOperation.objects.filter(
+        id=operation.id, undone_at__isnull=True
+    ).update(undone_at=timezone.now())
+    if not claimed:
+        raise UndoError('Operation was already undone')
+
+    data = operation.undo_data
+    restored = 0
+
+    if operation.action == 'archive':
+        for ids in _chunks(data['card_ids']):
+            with transaction.atomic():
+                restored += Card.objects.filter(id__in=ids, archived=True).update(
+                    archived=False, archived_at=None, version=F('version') + 1,
+                    updated_at=timezone.now())
+                activity.record_many(activity.card_events(
+                    ActivityEvent.CARD_RESTORED, user, operation.board_id, ids))
+
+    elif operation.action == 'move':
+        by_list = defaultdict(list)
+        for pk, list_id, position in data['cards']:
+            by_list[list_id].append((pk, position))
+        for list_id, pairs in by_list.items():
+            restored += _set_positions(pairs, list_id=list_id,
+                                       board_id=operation.board_id, user=user)
+
+    elif operation.action == 'sort':
+        restored = _set_positions(data['cards'])
+
+    elif operation.action == 'relabel':
+        through = Card.labels.through
+        by_label = defaultdict(list)
+        for card_id, label_id in data['added']:
+            by_label[label_id].append(card_id)
+        for label_id, card_ids in by_label.items():
+            for ids in _chunks(card_ids):
+                with transaction.atomic():
+                    through.objects.filter(
+                        label_id=label_id, card_id__in=ids).delete()
+                    activity.record_many(_label_events(
+                        operation.board_id, user, [], [(pk, label_id) for pk in ids]))
+        for batch in _chunks(data['removed']):
+            with transaction.atomic():
+                through.objects.bulk_create(
+                    [through(card_id=card_id, label_id=label_id)
+                     for card_id, label_id in batch],
+                    ignore_conflicts=True
+                )
+                activity.record_many(_label_events(operation.board_id, user, batch, []))
+        restored = operation.affected
+
+    Board.objects.filter(id=operation.board_id).update(updated_at=timezone.now())
+    return restored
@@ -0,0 +1,63 @@
+"""
+Process-local caches for data read on every request.
+
+``VersionedLRUCache`` keeps a bounded LRU of entries that expire after a
+TTL. Each entry also remembers a generation counter stored in Django's
+cache, and ``invalidate`` bumps that counter. With a shared cache backend
+the bump reaches every process; with the default local-memory cache the TTL
+bounds how stale other processes can be.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class VersionedLRUCache:
+    def __init__(self, prefix, ttl, size):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()  # key -> (generation, expires_at, value)
+        self._lock = threading.Lock()
+
+    def _generation_key(self, key):
+        return f'{self.prefix}:{key}'
+
+    def get(self, key, load):
+        """Return the cached value for ``key``, calling ``load()`` on a miss"""
+        generation = cache.get(self._generation_key(key), 0)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        # Stored under the generation read before loading, so a write that
+        # lands meanwhile makes the next read reload
+        value = load()
+        with self._lock:
+            self._entries[key] = (generation, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, keys):
+        """Drop ``keys`` here and, through their generation, in every process"""
+        for key in set(keys):
+            generation_key = self._generation_key(key)
+            # add() is a no-op when the counter exists, so incr() never misses
+            cache.add(generation_key, 0, None)
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                cache.set(generation_key, 1, None)
+            with self._lock:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,116 @@
+"""
+Batch operations on checklist items.
+
+Each operation runs in one transaction and keeps the checklist and card
+progress counters from ``kanban.counters`` in step with the rows it writes.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.utils import timezone
+
+from . import counters
+from .models import ChecklistItem
+
+MAX_BATCH_ITEMS = 500
+
+
+def _next_position(checklist):
+    last = checklist.items.order_by('-position').values_list(
+        'position', flat=True).first()
+    return 0 if last is None else last + 1
+
+
+def is_id_list(value):
+    return (isinstance(value, list) and bool(value)
+            and all(isinstance(pk, int) for pk in value))
+
+
+def parse_items(data):
+    """
+    Read items from ``{"items": [{"text", "completed"}, ...]}`` or from
+    ``{"text": "one item per line"}``. Returns (items, error).
+    """
+    if 'items' in data:
+        rows = data['items']
+        if not isinstance(rows, list):
+            return None, 'items must be a list'
+        items = []
+        for row in rows:
+            if isinstance(row, str):
+                row = {'text': row}
+            if not isinstance(row, dict) or not isinstance(row.get('text'), str):
+                return None, 'Each item needs a text'
+            items.append({'text': row['text'].strip(),
+                          'completed': bool(row.get('completed', False))})
+    elif isinstance(data.get('text'), str):
+        items = [{'text': line.strip(), 'completed': False}
+                 for line in data['text'].splitlines()]
+    else:
+        return None, 'Send items or text'
+
+    items = [item for item in items if item['text']]
+    if not items:
+        return None, 'No items to create'
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, f'At most {MAX_BATCH_ITEMS} items per request'
+    if any(len(item['text']) > 500 for item in items):
+        return None, 'Item text is limited to 500 characters'
+    return items, None
+
+
+def create_items(checklist, items):
+    """Append ``items`` to ``checklist`` with one INSERT"""
+    start = _next_position(checklist)
+    with transaction.atomic():
+        created = ChecklistItem.objects.bulk_create([
+            ChecklistItem(checklist=checklist, text=item['text'],
+                          completed=item['completed'], position=start + index)
+            for index, item in enumerate(items)
+        ])
+        counters.adjust_checklist(
+            checklist.id, checklist.card_id, items=len(created),
+            completed=sum(1 for item in created if item.completed))
+    return created
+
+
+def reorder(checklist, item_ids):
+    """Give the listed items positions 0..n-1 in one UPDATE"""
+    return checklist.items.filter(id__in=item_ids).update(
+        position=Case(
+            *[When(id=pk, then=Value(float(index)))
+              for index, pk in enumerate(item_ids)],
+            output_field=FloatField()
+        ),
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+
+
+def move_items(checklist, item_ids, target):
+    """Move items from ``checklist`` to the end of ``target``"""
+    with transaction.atomic():
+        items = checklist.items.filter(id__in=item_ids)
+        totals = items.aggregate(
+            total=Count('id'), completed=Count('id', filter=Q(completed=True)))
+        ordered = list(items.order_by('position', 'created_at').values_list(
+            'id', flat=True))
+        start = _next_position(target)
+
+        moved = ChecklistItem.objects.filter(id__in=ordered).update(
+            checklist=target,
+            position=Case(
+                *[When(id=pk, then=Value(float(start + index)))
+                  for index, pk in enumerate(ordered)],
+                output_field=FloatField()
+            ),
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        ) if ordered else 0
+
+        counters.adjust_checklist(
+            checklist.id, checklist.card_id,
+            items=-totals['total'], completed=-totals['completed'])
+        counters.adjust_checklist(
+            target.id, target.card_id,
+            items=totals['total'], completed=totals['completed'])
+    return moved
@@ -0,0 +1,86 @@
+"""
+Denormalized counters kept on cards and checklists.
+
+Views adjust them with F() expressions in the same transaction as the row
+change, so board payloads can show "3/7" badges and comment counts without
+loading the underlying rows. ``repair`` recomputes them from the source
+tables in bulk, for drift left behind by writes that bypass the API.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Card, Checklist, ChecklistItem, Comment
+
+REPAIR_BATCH_SIZE = 500
+
+
+def adjust_checklist(checklist_id, card_id, items=0, completed=0):
+    """Shift the item counters of a checklist and of its card"""
+    if not items and not completed:
+        return
+    Checklist.objects.filter(id=checklist_id).update(
+        item_count=F('item_count') + items,
+        completed_count=F('completed_count') + completed,
+    )
+    Card.objects.filter(id=card_id).update(
+        checklist_item_count=F('checklist_item_count') + items,
+        checklist_completed_count=F('checklist_completed_count') + completed,
+    )
+
+
+def set_all_completed(checklist, completed):
+    """Check or uncheck every item of a checklist with one UPDATE"""
+    with transaction.atomic():
+        changed = checklist.items.exclude(completed=completed).update(
+            completed=completed, version=F('version') + 1, updated_at=timezone.now())
+        adjust_checklist(checklist.id, checklist.card_id,
+                         completed=changed if completed else -changed)
+    return changed
+
+
+def _count(model, parent, **filters):
+    """Correlated COUNT of ``model`` rows whose ``parent`` is the outer row"""
+    rows = model.objects.filter(**{parent: OuterRef('pk')}, **filters)
+    return Coalesce(Subquery(
+        rows.order_by().values(parent).annotate(
+            total=Count('id')).values('total')
+    ), 0)
+
+
+def _repair(model, counters):
+    """Rewrite the counters of every ``model`` row that drifted"""
+    actual = {f'actual_{field}': expression
+              for field, expression in counters.items()}
+    drifted = model.objects.annotate(**actual).filter(reduce(or_, [
+        ~Q(**{field: F(f'actual_{field}')}) for field in counters
+    ]))
+    ids = list(drifted.values_list('id', flat=True))
+
+    for start in range(0, len(ids), REPAIR_BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(
+                id__in=ids[start:start + REPAIR_BATCH_SIZE]
+            ).update(**counters)
+    return len(ids)
+
+
+def repair():
+    """Recompute every counter and return how many rows were fixed"""
+    return {
+        'checklists': _repair(Checklist, {
+            'item_count': _count(ChecklistItem, 'checklist'),
+            'completed_count': _count(
+                ChecklistItem, 'checklist', completed=True),
+        }),
+        'cards': _repair(Card, {
+            'comment_count': _count(Comment, 'card'),
+            'checklist_item_count': _count(ChecklistItem, 'checklist__card'),
+            'checklist_completed_count': _count(
+                ChecklistItem, 'checklist__card', completed=True),
+        }),
+    }
@@ -0,0 +1,219 @@
+"""
+Typed custom field values.
+
+Every ``CustomFieldValue`` keeps the display text in ``value`` and, for
+numbers, dates and checkboxes, a typed copy in its own indexed column, so
+card lists can be filtered and sorted by a custom field in SQL.
+"""
+import math
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import VALUE_COLUMNS, CustomField, CustomFieldValue
+
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'off'}
+LOOKUPS = {'gt', 'gte', 'lt', 'lte'}
+PARAM_PREFIX = 'cf.'
+MAX_BATCH_VALUES = 500
+TYPED_FIELDS = ['value', 'number_value', 'date_value', 'bool_value']
+
+
+def option_values(options):
+    """Dropdown options may be plain strings or {value, label} objects"""
+    values = []
+    for option in options or []:
+        if isinstance(option, dict):
+            option = option.get('value', option.get('label'))
+        if option is not None:
+            values.append(str(option))
+    return values
+
+
+def _parse_number(raw):
+    if isinstance(raw, bool):
+        raise ValueError('Expected a number')
+    try:
+        number = float(raw)
+    except (TypeError, ValueError):
+        raise ValueError('Expected a number')
+    if math.isnan(number) or math.isinf(number):
+        raise ValueError('Expected a finite number')
+    return number
+
+
+def _parse_date(raw):
+    if not isinstance(raw, str):
+        raise ValueError('Expected an ISO 8601 date')
+    moment = parse_datetime(raw)
+    if moment is None:
+        day = parse_date(raw)
+        if day is None:
+            raise ValueError('Expected an ISO 8601 date')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _parse_bool(raw):
+    if isinstance(raw, bool):
+        return raw
+    text = str(raw).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError('Expected true or false')
+
+
+def coerce(custom_field, raw):
+    """
+    Validate ``raw`` against the field type and options and return the
+    model attributes to store: the display text plus its typed copy.
+    Raises ValueError with a message for the client.
+    """
+    typed = {'value': '', 'number_value': None,
+             'date_value': None, 'bool_value': None}
+    if raw is None or (isinstance(raw, str) and not raw.strip()):
+        if custom_field.required:
+            raise ValueError(f'{custom_field.name} is required')
+        return typed
+
+    field_type = custom_field.field_type
+    if field_type == 'number':
+        number = _parse_number(raw)
+        typed['number_value'] = number
+        typed['value'] = str(int(number)) if number.is_integer() else repr(number)
+    elif field_type == 'date':
+        moment = _parse_date(raw)
+        typed['date_value'] = moment
+        typed['value'] = moment.isoformat()
+    elif field_type == 'checkbox':
+        flag = _parse_bool(raw)
+        typed['bool_value'] = flag
+        typed['value'] = 'true' if flag else 'false'
+    elif field_type == 'dropdown':
+        choices = option_values(custom_field.options)
+        if str(raw) not in choices:
+            raise ValueError(f'Expected one of: {", ".join(choices)}')
+        typed['value'] = str(raw)
+    else:
+        typed['value'] = str(raw)
+
+    return typed
+
+
+def _value_column(custom_field):
+    return VALUE_COLUMNS.get(custom_field.field_type, 'value')
+
+
+def _board_field(board_id, field_id):
+    custom_field = CustomField.objects.filter(
+        id=field_id, board_id=board_id).first()
+    if custom_field is None:
+        raise ValueError(f'Unknown custom field {field_id}')
+    return custom_field
+
+
+def _parse_param(key):
+    """Split 'cf.<id>' or 'cf.<id>__gte' into (field id, lookup)"""
+    name, _, lookup = key[len(PARAM_PREFIX):].partition('__')
+    if not name.isdigit() or (lookup and lookup not in LOOKUPS):
+        raise ValueError(f'Invalid custom field filter {key}')
+    return int(name), lookup
+
+
+def has_params(params):
+    return (any(key.startswith(PARAM_PREFIX) for key in params)
+            or params.get('ordering', '').lstrip('-').startswith(PARAM_PREFIX))
+
+
+def filter_cards(queryset, board_id, params):
+    """
+    Apply ``?cf.<id>=<value>`` and ``?cf.<id>__gt|gte|lt|lte=<value>``
+    filters and ``?ordering=cf.<id>`` / ``-cf.<id>`` to a card queryset.
+    Each filter is an EXISTS on the (custom_field, typed value) index.
+    """
+    for key, raw in params.items():
+        if not key.startswith(PARAM_PREFIX):
+            continue
+        field_id, lookup = _parse_param(key)
+        custom_field = _board_field(board_id, field_id)
+        column = _value_column(custom_field)
+        if lookup and column in ('value', 'bool_value'):
+            raise ValueError(f'{custom_field.name} does not support {lookup}')
+
+        if not raw.strip():
+            raise ValueError(f'Missing value for {key}')
+        operand = coerce(custom_field, raw)[column]
+        condition = f'{column}__{lookup}' if lookup else column
+        queryset = queryset.filter(Exists(CustomFieldValue.objects.filter(
+            card=OuterRef('pk'), custom_field_id=field_id,
+            **{condition: operand})))
+
+    ordering = params.get('ordering', '')
+    if ordering.lstrip('-').startswith(PARAM_PREFIX):
+        field_id, lookup = _parse_param(ordering.lstrip('-'))
+        if lookup:
+            raise ValueError(f'Invalid ordering {ordering}')
+        custom_field = _board_field(board_id, field_id)
+        sort_value = Subquery(CustomFieldValue.objects.filter(
+            card=OuterRef('pk'), custom_field_id=field_id
+        ).values(_value_column(custom_field))[:1])
+        queryset = queryset.annotate(custom_sort=sort_value)
+        if ordering.startswith('-'):
+            queryset = queryset.order_by(
+                F('custom_sort').desc(nulls_last=True), 'id')
+        else:
+            queryset = queryset.order_by(
+                F('custom_sort').asc(nulls_last=True), 'id')
+
+    return queryset
+
+
+def build(entries):
+    """
+    Validate (key, card_id, custom_field, raw) entries, where ``key`` names
+    the entry in error messages. Returns (rows, errors).
+    """
+    rows, errors = {}, {}
+    if len(entries) > MAX_BATCH_VALUES:
+        return rows, {'values': f'At most {MAX_BATCH_VALUES} values per request'}
+
+    for key, card_id, custom_field, raw in entries:
+        if isinstance(raw, (dict, list)):
+            errors[key] = 'Expected a single value'
+            continue
+        try:
+            typed = coerce(custom_field, raw)
+        except ValueError as e:
+            errors[key] = str(e)
+            continue
+        # The last entry wins when the same card and field repeat
+        rows[(card_id, custom_field.id)] = CustomFieldValue(
+            card_id=card_id, custom_field=custom_field, **typed)
+    return rows, errors
+
+
+def upsert(rows):
+    """Insert or update the rows from ``build`` in one statement"""
+    with transaction.atomic():
+        CustomFieldValue.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=['custom_field', 'card'],
+            update_fields=TYPED_FIELDS + ['updated_at'],
+        )
+
+    # Upserted rows do not get their ids back on every backend
+    values = CustomFieldValue.objects.filter(
+        card_id__in={card_id for card_id, _ in rows},
+        custom_field_id__in={field_id for _, field_id in rows},
+    ).select_related('custom_field__board')
+    return [value for value in values
+            if (value.card_id, value.custom_field_id) in rows]
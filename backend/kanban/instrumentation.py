@@ -0,0 +1,262 @@
+"""
+Per-request performance instrumentation.
+
+``InstrumentationMiddleware`` records, for every request:
+- the endpoint (method plus URL name);
+- SQL query count and total DB time;
+- repeated query signatures, the usual N+1 pattern;
+- serializer and render time;
+- response size and wall time.
+
+Each request produces one JSON log line on the ``kanban.requests`` logger
+and a ``Server-Timing`` header. A rolling window per endpoint feeds the
+admin metrics endpoint. Queries are counted through a connection
+``execute_wrapper``, so the cost is one function call per query plus a
+little bookkeeping per request. Aggregates are kept per process.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.utils import timezone
+from rest_framework.serializers import BaseSerializer
+
+from . import metrics
+
+INSTRUMENTATION = {
+    'ENABLED': True,
+    # Requests kept per endpoint for percentiles
+    'WINDOW': 500,
+    # Same SQL repeated this many times in one request is flagged as N+1
+    'N_PLUS_ONE_THRESHOLD': 10,
+    # Requests slower than this are logged as warnings
+    'SLOW_REQUEST_MS': 1000,
+    'SERVER_TIMING': True,
+    **getattr(settings, 'KANBAN_INSTRUMENTATION', {}),
+}
+
+logger = logging.getLogger('kanban.requests')
+
+_current = ContextVar('kanban_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.signatures = Counter()
+        self.timings = defaultdict(float)
+        self._active = set()
+
+    def execute(self, execute, sql, params, many, context):
+        """Connection execute_wrapper counting and timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            # SQLite gave up waiting for another writer's lock
+            if 'database is locked' in str(exc):
+                metrics.inc('kanban_database_locked_total')
+            raise
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            # Parameters are separate, so the SQL itself is the signature
+            self.signatures[sql] += 1
+
+    def repeated_queries(self):
+        threshold = INSTRUMENTATION['N_PLUS_ONE_THRESHOLD']
+        return [(sql, count) for sql, count in self.signatures.most_common(3)
+                if count >= threshold]
+
+
+def current():
+    """Metrics of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to the current request's ``name``"""
+    metrics = _current.get()
+    # Nested blocks of the same name, like nested serializers, count once
+    if metrics is None or name in metrics._active:
+        yield
+        return
+    metrics._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - start
+        metrics._active.discard(name)
+
+
+def install():
+    """Time ``serializer.data`` for every DRF serializer"""
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    def timed_data(self):
+        with timer('serialize'):
+            return data.fget(self)
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+class EndpointStats:
+    FIELDS = ['duration_ms', 'db_ms', 'queries', 'serialize_ms', 'render_ms',
+              'response_bytes']
+
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.n_plus_one = 0
+        self.last_n_plus_one = None
+        self.samples = deque(maxlen=window)
+
+
+_endpoints = {}
+_lock = threading.Lock()
+_started = timezone.now()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def record(line, repeated):
+    with _lock:
+        stats = _endpoints.get(line['endpoint'])
+        if stats is None:
+            stats = _endpoints[line['endpoint']] = EndpointStats(
+                INSTRUMENTATION['WINDOW'])
+        stats.count += 1
+        if line['status'] >= 500:
+            stats.errors += 1
+        if repeated:
+            stats.n_plus_one += 1
+            stats.last_n_plus_one = repeated[0]
+        stats.samples.append(tuple(line[field] or 0 for field in EndpointStats.FIELDS))
+
+
+def summary():
+    """Per endpoint request counts and p50/p95/p99 of every measurement"""
+    with _lock:
+        endpoints = {name: (stats.count, stats.errors, stats.n_plus_one,
+                            stats.last_n_plus_one, list(stats.samples))
+                     for name, stats in _endpoints.items()}
+
+    result = {}
+    for name, (count, errors, n_plus_one, last, samples) in endpoints.items():
+        entry = {'count': count, 'errors': errors, 'n_plus_one': n_plus_one,
+                 'window': len(samples)}
+        for index, field in enumerate(EndpointStats.FIELDS):
+            ordered = sorted(sample[index] for sample in samples)
+            entry[field] = {
+                'p50': percentile(ordered, 0.50),
+                'p95': percentile(ordered, 0.95),
+                'p99': percentile(ordered, 0.99),
+                'max': ordered[-1] if ordered else None,
+            }
+        if last:
+            entry['last_n_plus_one'] = {'sql': last[0][:500], 'count': last[1]}
+        result[name] = entry
+    return dict(sorted(result.items(),
+                       key=lambda item: -(item[1]['duration_ms']['p95'] or 0)))
+
+
+def reset():
+    global _started
+    with _lock:
+        _endpoints.clear()
+        _started = timezone.now()
+
+
+def started():
+    """When the aggregates were last reset"""
+    return _started
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} <unresolved>'
+    return f'{request.method} {match.view_name or match._func_path}'
+
+
+def _route(request):
+    """URL name for metric labels, bounded to the names in urls.py"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match._func_path
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not INSTRUMENTATION['ENABLED']:
+            return self.get_response(request)
+
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics.execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+
+        repeated = request_metrics.repeated_queries()
+        line = {
+            'event': 'request',
+            'endpoint': _endpoint(request),
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': _ms(duration),
+            'db_ms': _ms(request_metrics.db_time),
+            'queries': request_metrics.queries,
+            'duplicate_queries': request_metrics.queries - len(request_metrics.signatures),
+            'serialize_ms': _ms(request_metrics.timings['serialize']),
+            'render_ms': _ms(request_metrics.timings['render']),
+            'response_bytes': None if response.streaming else len(response.content),
+        }
+        if repeated:
+            line['n_plus_one'] = [{'sql': sql[:200], 'count': count}
+                                  for sql, count in repeated]
+        record(line, repeated)
+        metrics.observe_request(_route(request), request.method, line)
+
+        if INSTRUMENTATION['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={line["db_ms"]};desc="{request_metrics.queries} queries"',
+                f'serialize;dur={line["serialize_ms"]}',
+                f'render;dur={line["render_ms"]}',
+                f'total;dur={line["duration_ms"]}',
+            ])
+
+        slow = line['duration_ms'] >= INSTRUMENTATION['SLOW_REQUEST_MS']
+        level = logging.WARNING if slow or repeated else logging.INFO
+        logger.log(level, json.dumps(line), extra={'metrics': line})
+        return response
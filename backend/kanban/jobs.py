@@ -0,0 +1,227 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows in the ``Job`` table, so enqueueing inside a request is part of
+the same transaction as the mutation that caused it and no external broker is
+needed. A worker (``manage.py run_jobs``) claims queued jobs with a
+conditional UPDATE, runs them on a bounded thread pool and retries failures
+with exponential backoff. Workers also queue the jobs registered with
+``periodic``, so recurring work never runs on the request path.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_SETTINGS = {
+    'CONCURRENCY': 2,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 10,
+    'STALE_AFTER': 600,
+    'EAGER': False,
+    **getattr(settings, 'KANBAN_JOBS', {}),
+}
+
+_registry = {}
+_periodic = {}
+
+
+def task(name):
+    """Register a function as the handler for jobs called ``name``"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def periodic(name, every, when=None):
+    """
+    Have workers queue the ``name`` job every ``every`` seconds, skipping
+    runs while one is queued or running or ``when()`` is false
+    """
+    _periodic[name] = (every, when)
+
+
+def enqueue_periodic(last_runs):
+    """Queue the periodic jobs that are due; ``last_runs`` is the caller's state"""
+    now = time.monotonic()
+    for name, (every, when) in _periodic.items():
+        if now - last_runs.get(name, float('-inf')) < every:
+            continue
+        last_runs[name] = now
+        if Job.objects.filter(name=name, status__in=['queued', 'running']).exists():
+            continue
+        if when is None or when():
+            enqueue(name, priority=Job.PRIORITY_LOW)
+
+
+def enqueue(name, payload=None, priority=Job.PRIORITY_NORMAL, user=None,
+            max_attempts=None, delay=None):
+    """Create a queued job; it becomes visible to workers on commit"""
+    if name not in _registry:
+        raise KeyError(f'Unknown job "{name}"')
+
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts or JOB_SETTINGS['MAX_ATTEMPTS'],
+        run_after=timezone.now() + (delay or timedelta()),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+    if JOB_SETTINGS['EAGER']:
+        transaction.on_commit(lambda: _run_claimed(job.id, 'eager'))
+
+    return job
+
+
+def claim(worker_id):
+    """Atomically move the next runnable job to running, or return None"""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status='queued', run_after__lte=now
+    ).order_by('-priority', 'run_after', 'id').values_list('id', flat=True)[:10]
+
+    for job_id in candidates:
+        if _lock(job_id, worker_id):
+            return job_id
+    return None
+
+
+def _lock(job_id, worker_id):
+    now = timezone.now()
+    return Job.objects.filter(id=job_id, status='queued').update(
+        status='running',
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    ) == 1
+
+
+def execute(job_id):
+    """Run a claimed job and record its outcome"""
+    job = Job.objects.get(id=job_id)
+    handler = _registry.get(job.name)
+
+    try:
+        if handler is None:
+            raise KeyError(f'No handler registered for job "{job.name}"')
+        result = handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s #%s failed (attempt %s/%s)',
+                       job.name, job.id, job.attempts, job.max_attempts)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            backoff = JOB_SETTINGS['RETRY_BACKOFF'] * 2 ** (job.attempts - 1)
+            Job.objects.filter(id=job.id).update(
+                status='queued', locked_by='', locked_at=None,
+                run_after=now + timedelta(seconds=backoff),
+                last_error=error, updated_at=now)
+        else:
+            Job.objects.filter(id=job.id).update(
+                status='failed', locked_by='', locked_at=None,
+                last_error=error, updated_at=now, finished_at=now)
+        return False
+
+    now = timezone.now()
+    Job.objects.filter(id=job.id).update(
+        status='succeeded', locked_by='', locked_at=None,
+        result=result, updated_at=now, finished_at=now)
+    return True
+
+
+def _run_claimed(job_id, worker_id):
+    try:
+        if _lock(job_id, worker_id):
+            execute(job_id)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale(stale_after=None):
+    """Return jobs whose worker died mid-run to the queue"""
+    stale_after = stale_after or JOB_SETTINGS['STALE_AFTER']
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None, updated_at=timezone.now())
+
+
+class Worker:
+    """Poll the job table and run up to ``concurrency`` jobs at a time"""
+
+    def __init__(self, concurrency=None, poll_interval=None, stdout=None):
+        self.concurrency = concurrency or JOB_SETTINGS['CONCURRENCY']
+        self.poll_interval = poll_interval or JOB_SETTINGS['POLL_INTERVAL']
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop_event = threading.Event()
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.running = 0
+        self.running_lock = threading.Lock()
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _execute(self, job_id):
+        try:
+            ok = execute(job_id)
+            self.log(f'Job #{job_id} {"succeeded" if ok else "failed"}')
+        except Exception:
+            logger.exception('Worker crashed while running job #%s', job_id)
+        finally:
+            close_old_connections()
+            with self.running_lock:
+                self.running -= 1
+            self.slots.release()
+
+    def run(self, once=False):
+        """Process jobs until stopped; with ``once`` exit when the queue is drained"""
+        requeue_stale()
+        last_stale_check = timezone.now()
+        periodic_runs = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='kanban-jobs') as pool:
+            while not self.stop_event.is_set():
+                if (timezone.now() - last_stale_check).total_seconds() > 60:
+                    requeue_stale()
+                    last_stale_check = timezone.now()
+                enqueue_periodic(periodic_runs)
+
+                if not self.slots.acquire(timeout=self.poll_interval):
+                    continue
+
+                job_id = claim(self.worker_id)
+                if job_id is None:
+                    self.slots.release()
+                    with self.running_lock:
+                        idle = self.running == 0
+                    if once and idle:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+
+                with self.running_lock:
+                    self.running += 1
+                pool.submit(self._execute, job_id)
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from kanban import snapshots
+from kanban.bench import generate
+from kanban.models import Board, BoardMember, Card, List
+from kanban.renderers import FastJSONRenderer
+from kanban.serializers import BoardSerializer
+from kanban.views import live_cards
+
+
+class Command(BaseCommand):
+    help = 'Time rendering a large board with BoardSerializer and with the values() snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=1000)
+        parser.add_argument('--lists', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Fixtures are rolled back once the numbers are printed
+        with transaction.atomic():
+            board = self.create_board(options['cards'], options['lists'])
+            request = Request(APIRequestFactory().get(
+                f'/api/boards/{board.id}/', HTTP_HOST='localhost'))
+
+            def serializer():
+                instance = Board.objects.prefetch_related(
+                    Prefetch('members', queryset=BoardMember.objects.select_related('user')),
+                    Prefetch('lists', queryset=List.objects.filter(
+                        archived=False).prefetch_related(live_cards())),
+                    'labels', 'custom_fields'
+                ).select_related('owner').get(id=board.id)
+                data = BoardSerializer(instance, context={'request': request}).data
+                return JSONRenderer().render(data)
+
+            def prefetched():
+                # Serializer cost alone, without its N+1 queries
+                instance = Board.objects.prefetch_related(
+                    Prefetch('members', queryset=BoardMember.objects.select_related('user')),
+                    Prefetch('lists', queryset=List.objects.filter(
+                        archived=False).prefetch_related(Prefetch(
+                            'cards', queryset=Card.objects.filter(
+                                archived=False).select_related('created_by'
+                            ).prefetch_related(
+                                'labels', 'attachments__uploaded_by',
+                                'custom_field_values__custom_field__board')))),
+                    'labels', 'custom_fields'
+                ).select_related('owner').get(id=board.id)
+                data = BoardSerializer(instance, context={'request': request}).data
+                return JSONRenderer().render(data)
+
+            def snapshot():
+                return FastJSONRenderer().render(
+                    snapshots.boards([board.id], request)[0])
+
+            self.stdout.write(
+                f"Board with {options['cards']} cards in {options['lists']} lists")
+            results = {}
+            for label, render in [('BoardSerializer', serializer),
+                                  ('prefetched', prefetched),
+                                  ('values() snapshot', snapshot)]:
+                body = render()
+                with CaptureQueriesContext(connection) as queries:
+                    render()
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    render()
+                elapsed = (time.perf_counter() - start) / options['repeat']
+                results[label] = (elapsed, body)
+                self.stdout.write(
+                    f'{label:>18}: {elapsed * 1000:8.1f} ms, '
+                    f'{len(queries)} queries, {len(body)} bytes')
+
+            fast, new = results['values() snapshot']
+            for label in ['BoardSerializer', 'prefetched']:
+                slow, old = results[label]
+                self.stdout.write(self.style.SUCCESS(
+                    f'{slow / fast:.1f}x faster than {label}, '
+                    f'identical output: {old == new}'))
+            transaction.set_rollback(True)
+
+    def create_board(self, card_count, list_count):
+        owner, = generate.users(1)
+        return generate.board(
+            owner, lists=list_count, cards_per_list=max(1, card_count // list_count),
+            comments=0, checklist_items=0, attachments=0, custom_fields=1, members=0)
@@ -0,0 +1,67 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from kanban import membership
+from kanban.models import Board, BoardMember
+from kanban.permissions import IsBoardMember
+
+
+class Command(BaseCommand):
+    help = 'Time board permission checks without cache, with a cold cache and with a warm cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--boards', type=int, default=50,
+                            help='Boards the benchmark user belongs to')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        # Fixtures are rolled back once the numbers are printed
+        with transaction.atomic():
+            user = User.objects.create_user(f'bench-{uuid.uuid4().hex[:12]}')
+            boards = Board.objects.bulk_create([
+                Board(title=f'Bench {i}', owner=user)
+                for i in range(options['boards'])
+            ])
+            BoardMember.objects.bulk_create([
+                BoardMember(board=board, user=user, role='member')
+                for board in boards
+            ])
+
+            request = SimpleNamespace(user=user)
+            views = [SimpleNamespace(get_board=lambda board=board: board)
+                     for board in boards]
+            permission = IsBoardMember()
+
+            def uncached(view):
+                view.get_board().members.filter(user=user).exists()
+
+            def cold(view):
+                membership.clear()
+                permission.has_permission(request, view)
+
+            def warm(view):
+                permission.has_permission(request, view)
+
+            self.stdout.write(f'{iterations} checks over {len(boards)} boards')
+            for label, check in [('query per check', uncached),
+                                 ('cold cache', cold), ('warm cache', warm)]:
+                membership.clear()
+                check(views[0])
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for i in range(iterations):
+                        check(views[i % len(views)])
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{label:>16}: {elapsed / iterations * 1e6:8.1f} us/check, '
+                    f'{len(queries) / iterations:.2f} queries/check')
+
+            membership.clear()
+            transaction.set_rollback(True)
@@ -0,0 +1,69 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from kanban import membership
+from kanban.bench import queries
+
+
+class Command(BaseCommand):
+    help = ('Request every API route against a small and a large board and fail '
+            'when a query count grows with the data or exceeds its budget')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budgets', default=queries.BUDGETS_PATH,
+                            help='Baseline file with the query budget of each route')
+        parser.add_argument('--update', action='store_true',
+                            help='Record the current counts as the new budgets')
+
+    def handle(self, *args, **options):
+        budgets = queries.load_budgets(options['budgets'])
+
+        # A throwaway test database, so the counts do not depend on rows
+        # already in the configured one, such as queued jobs
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                                      serialize=False)
+        try:
+            results, uncovered = queries.check(budgets)
+        finally:
+            membership.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        failures = []
+        for key, result in results.items():
+            mark = 'FAIL' if result['problem'] else 'ok'
+            self.stdout.write(
+                f"{mark:>4}  {key:<45} small {result['small']:>3}  "
+                f"large {result['large']:>3}  budget {result['budget'] or '-':>3}")
+            if result['problem']:
+                failures.append((key, result))
+        if uncovered:
+            self.stdout.write(f"Not checked (no request body defined): {', '.join(uncovered)}")
+
+        if options['update']:
+            self.write_budgets(options['budgets'], budgets, results)
+            return
+
+        if failures:
+            for key, result in failures:
+                self.stderr.write(self.style.ERROR(f"\n{key} ({result['route']}): {result['problem']}"))
+                for sql, count in result['grown']:
+                    self.stderr.write(f'  +{count} x {sql[:300]}')
+            raise CommandError(f'{len(failures)} of {len(results)} routes failed the query check')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} routes within their query budgets'))
+
+    def write_budgets(self, path, budgets, results):
+        updated = {}
+        for key, result in sorted(results.items()):
+            entry = {'queries': result['large']}
+            # Keep the reason a route is allowed to grow with the data
+            if budgets.get(key, {}).get('grows'):
+                entry['grows'] = budgets[key]['grows']
+            updated[key] = entry
+        with open(path, 'w') as f:
+            json.dump(updated, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Budgets of {len(updated)} routes written to {path}'))
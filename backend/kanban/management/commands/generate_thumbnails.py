@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from kanban.models import Board, Card, Attachment
+from kanban import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for card covers, board backgrounds and image attachments'
+
+    def handle(self, *args, **options):
+        sources = [
+            (Card.objects.exclude(cover_image='').exclude(
+                cover_image__isnull=True).filter(cover_image_hash=''),
+             'cover_image', 'cover_image_hash'),
+            (Board.objects.exclude(background_image='').exclude(
+                background_image__isnull=True).filter(background_image_hash=''),
+             'background_image', 'background_image_hash'),
+            (Attachment.objects.filter(
+                content_type__startswith='image/', file_hash=''),
+             'file', 'file_hash'),
+        ]
+
+        generated = 0
+        for queryset, field_name, hash_field in sources:
+            for pk in queryset.values_list('pk', flat=True).iterator():
+                try:
+                    if thumbnails.process(queryset.model._meta.label, pk,
+                                          field_name, hash_field):
+                        generated += 1
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(
+                        f'{queryset.model.__name__} #{pk}: {e}'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated thumbnails for {generated} images')
+        )
@@ -0,0 +1,92 @@
+import json
+import platform
+from types import SimpleNamespace
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+from kanban import membership
+from kanban.bench import generate, git_commit, scenarios
+from kanban.models import Card
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic board and time the main API scenarios, reported as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=generate.SCALES, default='medium')
+        for option in generate.SCALES['medium']:
+            parser.add_argument(f"--{option.replace('_', '-')}", type=int,
+                                help='Override the value of --scale')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--scenario', action='append', choices=scenarios.names(),
+                            help='Run only this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        shape = dict(generate.SCALES[options['scale']])
+        for option in shape:
+            if options[option] is not None:
+                shape[option] = options[option]
+        if shape['lists'] < 2 or shape['cards_per_list'] < 1:
+            raise CommandError('Scenarios need at least 2 lists and 1 card per list')
+
+        report = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'scale': options['scale'],
+            'shape': shape,
+            'scenarios': {},
+        }
+
+        # Fixtures are rolled back once the numbers are collected
+        with transaction.atomic():
+            ctx = self.create_context(shape)
+            for name in options['scenario'] or scenarios.names():
+                result = scenarios.run(name, ctx, options['iterations'])
+                report['scenarios'][name] = result
+                self.stderr.write(
+                    f"{name:>22}: p50 {result['latency_ms']['p50']:8.2f} ms, "
+                    f"p95 {result['latency_ms']['p95']:8.2f} ms, "
+                    f"{result['queries']['p50']} queries"
+                    + (f", {result['errors']} errors" if result['errors'] else ''))
+            membership.clear()
+            transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def create_context(self, shape):
+        owner, = generate.users(1, prefix='bench-owner')
+        board_shape = {key: value for key, value in shape.items() if key != 'boards'}
+        board = generate.board(owner, **board_shape)
+        # Smaller boards the owner also belongs to, for the dashboard
+        for i in range(shape['boards'] - 1):
+            generate.board(owner, lists=3, cards_per_list=5, comments=0,
+                           checklist_items=0, attachments=0, custom_fields=0,
+                           members=0, title=f'Bench board {i}')
+
+        # Any allowed host, so CommonMiddleware accepts the requests
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS
+                     if host != '*'), 'localhost')
+        client = APIClient(HTTP_HOST=host)
+        client.force_authenticate(owner)
+        return SimpleNamespace(
+            client=client,
+            board=board,
+            lists=list(board.lists.order_by('position').values_list('id', flat=True)),
+            cards=list(Card.objects.filter(list__board=board, archived=False)
+                       .order_by('id').values_list('id', flat=True)),
+            template=generate.template(owner),
+        )
@@ -0,0 +1,105 @@
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from kanban.bench import git_commit, load
+
+
+class Command(BaseCommand):
+    help = ('Simulate collaborators working on one board against a running server '
+            'and report throughput, errors and tail latency as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000',
+                            help='Server under test, sharing this database')
+        parser.add_argument('--users', type=int, default=30)
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Seconds to run')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Mean pause in seconds between requests of a user')
+        parser.add_argument('--mix', help='Operation weights, e.g. card_move=50,board_read=50 '
+                            f'(operations: {", ".join(load.names())})')
+        parser.add_argument('--lists', type=int, default=8)
+        parser.add_argument('--cards-per-list', type=int, default=40)
+        parser.add_argument('--timeout', type=float, default=30,
+                            help='Seconds before a request counts as timed out')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+        if options['lists'] < 2 or options['cards_per_list'] < 1:
+            raise CommandError('The board needs at least 2 lists and 1 card per list')
+        try:
+            mix = load.parse_mix(options['mix']) if options['mix'] else dict(load.DEFAULT_MIX)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        url = options['url'].rstrip('/')
+        token = getattr(settings, 'KANBAN_METRICS', {}).get('TOKEN', '')
+        locked_before = load.scrape_locked(url, token)
+        if locked_before is None:
+            self.stderr.write(self.style.WARNING(
+                f'{url}/metrics is not readable, set KANBAN_METRICS_TOKEN to the '
+                "server's token to count lock errors hidden behind plain 500s"))
+
+        ctx = load.setup(options['users'], lists=options['lists'],
+                         cards_per_list=options['cards_per_list'])
+        self.stderr.write(f"Running {options['users']} users against {url} "
+                          f"for {options['duration']:g}s")
+        try:
+            results, elapsed = load.run(
+                ctx, url, options['duration'], mix=mix,
+                think_time=options['think_time'], timeout=options['timeout'],
+                seed=options['seed'])
+        finally:
+            load.teardown(ctx)
+
+        if not results:
+            raise CommandError('No request completed')
+        if all(outcome == 'connection_error' for _, outcome, _ in results):
+            raise CommandError(f'Could not connect to {url}, is the server running?')
+
+        locked_after = load.scrape_locked(url, token)
+        report = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'url': url,
+            'users': options['users'],
+            'duration_s': round(elapsed, 2),
+            'think_time_s': options['think_time'],
+            'mix': mix,
+            'board': {'lists': options['lists'], 'cards_per_list': options['cards_per_list']},
+            # Counted by the server, which also sees lock errors it hides
+            # behind a plain 500 when DEBUG is off
+            'server_database_locked': (
+                locked_after - locked_before
+                if locked_before is not None and locked_after is not None else None),
+            **load.summarize(results, elapsed),
+        }
+
+        for name, summary in [('total', report['total']), *report['operations'].items()]:
+            errors = ', '.join(f'{count} {outcome}'
+                               for outcome, count in summary['errors'].items())
+            self.stderr.write(
+                f"{name:>17}: {summary['requests']:6} req, "
+                f"{summary['throughput_rps']:8.2f} req/s, "
+                f"p50 {summary['latency_ms']['p50']:8.2f} ms, "
+                f"p99 {summary['latency_ms']['p99']:8.2f} ms"
+                + (f', {errors}' if errors else ''))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from kanban import board_cache, counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute comment and checklist counters on cards and checklists'
+
+    def handle(self, *args, **options):
+        fixed = counters.repair()
+        board_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {fixed['cards']} cards and {fixed['checklists']} checklists"
+        ))
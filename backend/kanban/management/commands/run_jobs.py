@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from kanban.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run the background job worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Maximum number of jobs to run at the same time')
+        parser.add_argument(
+            '--poll-interval', type=float,
+            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is drained instead of polling forever')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            stdout=self.stdout
+        )
+        self.stdout.write(
+            f'Worker {worker.worker_id} started (concurrency={worker.concurrency})')
+
+        try:
+            worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            worker.stop()
+
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max, Prefetch
+from rest_framework.test import APIRequestFactory, force_authenticate
+from kanban import board_cache
+from kanban.models import Board, BoardMember
+from kanban.views import BoardViewSet
+
+
+class Command(BaseCommand):
+    help = 'Render the most recently active boards into the board response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Number of boards to warm, most recently active first')
+        parser.add_argument(
+            '--host', default='kanban-app-unint.onrender.com',
+            help='Host clients use; file URLs in the cached responses include it')
+        parser.add_argument(
+            '--insecure', action='store_true',
+            help='Render file URLs with http instead of https')
+
+    def handle(self, *args, **options):
+        if board_cache.BOARD_CACHE['BACKEND'] == 'memory':
+            self.stdout.write(self.style.WARNING(
+                "The 'memory' backend is per process, so this only warms "
+                "this command's own cache; use the 'file' backend to share it"))
+
+        boards = Board.objects.annotate(
+            last_activity=Max('lists__cards__updated_at')
+        ).order_by(
+            F('last_activity').desc(nulls_last=True), '-updated_at'
+        ).prefetch_related(
+            Prefetch('members', queryset=BoardMember.objects.select_related('user'))
+        )[:options['limit']]
+
+        # Go through the real view so the keys match what clients request
+        view = BoardViewSet.as_view({'get': 'retrieve'})
+        factory = APIRequestFactory()
+        rendered = 0
+        for board in boards:
+            # One render per role, as the role is part of the key
+            users = {}
+            for member in board.members.all():
+                users.setdefault(member.role, member.user)
+
+            for user in users.values():
+                request = factory.get(
+                    f'/api/boards/{board.id}/', HTTP_HOST=options['host'],
+                    secure=not options['insecure'])
+                force_authenticate(request, user)
+                response = view(request, pk=board.id)
+                if response.status_code == 200:
+                    rendered += 1
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        f'Board #{board.id}: HTTP {response.status_code}'))
+
+        stats = board_cache.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {rendered} board responses ({stats['misses']} rendered, "
+            f"{stats['hits']} already cached; {stats['entries']} entries, "
+            f"{stats['bytes']} bytes)"
+        ))
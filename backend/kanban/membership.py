@@ -0,0 +1,58 @@
+"""
+Per-user board membership cache for permission checks and board listing.
+
+Each process keeps ``{board_id: role}`` maps, one per user, in a
+``VersionedLRUCache``. Every BoardMember write bumps the user's generation,
+so the next check reloads the map.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import VersionedLRUCache
+from .models import BoardMember
+
+MEMBERSHIP_CACHE_TTL = getattr(settings, 'KANBAN_MEMBERSHIP_CACHE_TTL', 60)
+MEMBERSHIP_CACHE_SIZE = getattr(settings, 'KANBAN_MEMBERSHIP_CACHE_SIZE', 2048)
+
+_cache = VersionedLRUCache(
+    'kanban:membership', MEMBERSHIP_CACHE_TTL, MEMBERSHIP_CACHE_SIZE)
+
+
+def roles(user):
+    """Return ``{board_id: role}`` for every board ``user`` belongs to"""
+    if user is None or not user.is_authenticated:
+        return {}
+    return _cache.get(user.id, lambda: dict(BoardMember.objects.filter(
+        user_id=user.id).values_list('board_id', 'role')))
+
+
+def role(user, board_id):
+    return roles(user).get(board_id)
+
+
+def is_member(user, board_id):
+    return board_id in roles(user)
+
+
+def board_ids(user):
+    return list(roles(user))
+
+
+def invalidate(user_ids):
+    """Drop cached memberships of ``user_ids`` in every process"""
+    _cache.invalidate(user_ids)
+
+
+def clear():
+    _cache.clear()
+
+
+@receiver(post_save, sender=BoardMember)
+@receiver(post_delete, sender=BoardMember)
+def _membership_changed(sender, instance, **kwargs):
+    # After commit, so no request can re-cache the old rows under the new
+    # generation
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate([user_id]))
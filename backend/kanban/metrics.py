@@ -0,0 +1,253 @@
+"""
+Prometheus metrics for the ``/metrics`` endpoint.
+
+Each worker process keeps its own registry of counters and histograms, so
+recording a value never waits on another process. With several workers,
+set ``KANBAN_METRICS['MULTIPROCESS_DIR']`` to a directory shared by them:
+every worker writes a snapshot of its registry there (at most every
+``FLUSH_INTERVAL`` seconds and on exit) and a scrape adds up all snapshots.
+Without it a scrape only sees the worker that served it.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+METRICS_SETTINGS = {
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 5,
+    # Bearer token required to scrape /metrics
+    'TOKEN': '',
+    **getattr(settings, 'KANBAN_METRICS', {}),
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# name: (type, help, label names, histogram buckets)
+METRICS = {
+    'kanban_http_requests_total': (
+        'counter', 'HTTP requests by route, method and status code',
+        ('route', 'method', 'status'), None),
+    'kanban_http_request_duration_seconds': (
+        'histogram', 'Wall time of HTTP requests',
+        ('route', 'method'), LATENCY_BUCKETS),
+    'kanban_http_request_db_seconds': (
+        'histogram', 'Time spent in SQL queries per HTTP request',
+        ('route', 'method'), LATENCY_BUCKETS),
+    'kanban_http_request_queries': (
+        'histogram', 'SQL queries executed per HTTP request',
+        ('route', 'method'), QUERY_BUCKETS),
+    'kanban_http_request_n_plus_one_total': (
+        'counter', 'HTTP requests that repeated one query past the N+1 threshold',
+        ('route', 'method'), None),
+    'kanban_database_locked_total': (
+        'counter', 'Queries that failed with "database is locked" after the busy timeout',
+        (), None),
+    'kanban_cards_moved_total': (
+        'counter', 'Cards moved to another list or position',
+        ('source',), None),
+    'kanban_attachments_uploaded_total': (
+        'counter', 'Attachments uploaded', (), None),
+    'kanban_attachments_uploaded_bytes_total': (
+        'counter', 'Bytes of uploaded attachments', (), None),
+    'kanban_template_instantiations_total': (
+        'counter', 'Boards created from a template', (), None),
+}
+
+_lock = threading.Lock()
+# (name, label values) -> number for counters, [bucket counts..., sum, count]
+# for histograms
+_values = {}
+_last_flush = 0.0
+_loaded_pid = None
+
+
+def _check(name, labels):
+    kind, _, label_names, _ = METRICS[name]
+    if len(labels) != len(label_names):
+        raise ValueError(f'{name} expects labels {label_names}, got {labels}')
+    return kind
+
+
+def inc(name, amount=1, labels=()):
+    """Add ``amount`` to a counter"""
+    labels = tuple(str(label) for label in labels)
+    _check(name, labels)
+    key = (name, labels)
+    with _lock:
+        _load_own()
+        _values[key] = _values.get(key, 0) + amount
+    _maybe_flush()
+
+
+def observe(name, value, labels=()):
+    """Record ``value`` in a histogram"""
+    labels = tuple(str(label) for label in labels)
+    _check(name, labels)
+    buckets = METRICS[name][3]
+    key = (name, labels)
+    with _lock:
+        _load_own()
+        entry = _values.get(key)
+        if entry is None:
+            entry = _values[key] = [0] * (len(buckets) + 3)
+        # Non-cumulative counts, one per bucket plus +Inf
+        entry[bisect_left(buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+    _maybe_flush()
+
+
+def observe_request(route, method, line):
+    """Record one ``instrumentation`` request line"""
+    inc('kanban_http_requests_total', labels=(route, method, line['status']))
+    observe('kanban_http_request_duration_seconds', line['duration_ms'] / 1000,
+            labels=(route, method))
+    observe('kanban_http_request_db_seconds', line['db_ms'] / 1000,
+            labels=(route, method))
+    observe('kanban_http_request_queries', line['queries'], labels=(route, method))
+    if line.get('n_plus_one'):
+        inc('kanban_http_request_n_plus_one_total', labels=(route, method))
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_SETTINGS['MULTIPROCESS_DIR'], f'{pid}.json')
+
+
+def _encode(values):
+    return [[name, list(labels), value] for (name, labels), value in values.items()]
+
+
+def _decode(rows):
+    return {(name, tuple(labels)): value for name, labels, value in rows
+            if name in METRICS}
+
+
+def _load_own():
+    """Continue from a snapshot left by an earlier worker with this pid"""
+    global _loaded_pid
+    pid = os.getpid()
+    if _loaded_pid == pid:
+        return
+    # A forked worker starts from the parent's values; drop them
+    if _loaded_pid is not None:
+        _values.clear()
+    _loaded_pid = pid
+    if not METRICS_SETTINGS['MULTIPROCESS_DIR']:
+        return
+    try:
+        with open(_snapshot_path(pid)) as f:
+            _merge(_values, _decode(json.load(f)))
+    except (OSError, ValueError):
+        pass
+
+
+def _maybe_flush():
+    if (METRICS_SETTINGS['MULTIPROCESS_DIR']
+            and time.monotonic() - _last_flush >= METRICS_SETTINGS['FLUSH_INTERVAL']):
+        flush()
+
+
+def flush():
+    """Write this worker's registry to the multiprocess directory"""
+    global _last_flush
+    directory = METRICS_SETTINGS['MULTIPROCESS_DIR']
+    if not directory:
+        return
+    with _lock:
+        _load_own()
+        _last_flush = time.monotonic()
+        data = json.dumps(_encode(_values))
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+atexit.register(flush)
+
+
+def _merge(into, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = into.get(key)
+            into[key] = (value[:] if current is None
+                         else [a + b for a, b in zip(current, value)])
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def collect():
+    """Values of every worker, or of this one without a multiprocess dir"""
+    directory = METRICS_SETTINGS['MULTIPROCESS_DIR']
+    if not directory:
+        with _lock:
+            _load_own()
+            values = {}
+            _merge(values, _values)
+        return values
+
+    flush()
+    values = {}
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                _merge(values, _decode(json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return values
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = [(k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+               for k, v in pairs]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render(values=None):
+    """Prometheus text exposition format (version 0.0.4)"""
+    if values is None:
+        values = collect()
+    by_name = {}
+    for (name, labels), value in values.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name.get(name, [])):
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(label_names, labels)} '
+                             f'{_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f'{name}_bucket'
+                             f'{_format_labels(label_names, labels, [("le", le)])} '
+                             f'{cumulative}')
+            lines.append(f'{name}_sum{_format_labels(label_names, labels)} '
+                         f'{_format_value(float(value[-2]))}')
+            lines.append(f'{name}_count{_format_labels(label_names, labels)} '
+                         f'{value[-1]}')
+    return '\n'.join(lines) + '\n'
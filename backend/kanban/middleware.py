@@ -0,0 +1,57 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used instead
+    brotli = None
+
+COMPRESSION_MIN_SIZE = getattr(settings, 'KANBAN_COMPRESSION_MIN_SIZE', 1024)
+GZIP_LEVEL = getattr(settings, 'KANBAN_GZIP_LEVEL', 6)
+BROTLI_QUALITY = getattr(settings, 'KANBAN_BROTLI_QUALITY', 4)
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def _encode(content, accept_encoding):
+    if brotli is not None and _accepts_br.search(accept_encoding):
+        return 'br', brotli.compress(content, quality=BROTLI_QUALITY)
+    if _accepts_gzip.search(accept_encoding):
+        return 'gzip', gzip.compress(content, GZIP_LEVEL, mtime=0)
+    return None, None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least ``KANBAN_COMPRESSION_MIN_SIZE`` bytes
+    with brotli when it is installed and accepted, otherwise with gzip.
+    Smaller responses are sent as is, since compressing them costs more
+    than it saves.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding, compressed = _encode(
+            response.content, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None or len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The bytes differ from the uncompressed representation
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
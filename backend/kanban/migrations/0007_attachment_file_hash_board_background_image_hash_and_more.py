@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0006_board_background_color_board_background_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='file_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='background_image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='cover_image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:49
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_archived_at(apps, schema_editor):
+    # Best guess for rows archived before archived_at existed
+    for model_name in ['Card', 'List']:
+        model = apps.get_model('kanban', model_name)
+        model.objects.filter(archived=True, archived_at__isnull=True).update(
+            archived_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0009_board_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['list', 'position'], name='kanban_card_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('archived', True)), fields=['list', '-archived_at'], name='kanban_card_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['board', 'position'], name='kanban_list_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(condition=models.Q(('archived', True)), fields=['board', '-archived_at'], name='kanban_list_archived_idx'),
+        ),
+        migrations.RunPython(backfill_archived_at, migrations.RunPython.noop),
+    ]
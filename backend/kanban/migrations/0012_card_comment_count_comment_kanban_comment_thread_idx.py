@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Card = apps.get_model('kanban', 'Card')
+    Comment = apps.get_model('kanban', 'Comment')
+    counts = Comment.objects.filter(card=OuterRef('pk')).order_by().values(
+        'card').annotate(total=Count('id')).values('total')
+    Card.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0011_bulkoperation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['card', 'created_at'], name='kanban_comment_thread_idx'),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_checklist_counts(apps, schema_editor):
+    Card = apps.get_model('kanban', 'Card')
+    Checklist = apps.get_model('kanban', 'Checklist')
+    ChecklistItem = apps.get_model('kanban', 'ChecklistItem')
+
+    def count(parent, **filters):
+        rows = ChecklistItem.objects.filter(**{parent: OuterRef('pk')}, **filters)
+        return Coalesce(Subquery(rows.order_by().values(parent).annotate(
+            total=Count('id')).values('total')), 0)
+
+    Checklist.objects.update(
+        item_count=count('checklist'),
+        completed_count=count('checklist', completed=True),
+    )
+    Card.objects.update(
+        checklist_item_count=count('checklist__card'),
+        checklist_completed_count=count('checklist__card', completed=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0012_card_comment_count_comment_kanban_comment_thread_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='checklist_completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='checklist_item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='checklist',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_checklist_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:58
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _number(text):
+    number = float(text)
+    if number != number or number in (float('inf'), float('-inf')):
+        raise ValueError(text)
+    return number
+
+
+def _date(text):
+    moment = parse_datetime(text)
+    if moment is None:
+        day = parse_date(text)
+        if day is None:
+            raise ValueError(text)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _bool(text):
+    text = text.strip().lower()
+    if text in ('true', '1', 'yes', 'on'):
+        return True
+    if text in ('false', '0', 'no', 'off'):
+        return False
+    raise ValueError(text)
+
+
+def convert_text_values(apps, schema_editor):
+    """Fill the typed columns from existing text; unparsable text stays as is"""
+    CustomFieldValue = apps.get_model('kanban', 'CustomFieldValue')
+    parsers = {
+        'number': ('number_value', _number),
+        'date': ('date_value', _date),
+        'checkbox': ('bool_value', _bool),
+    }
+
+    for field_type, (column, parse) in parsers.items():
+        batch = []
+        values = CustomFieldValue.objects.filter(
+            custom_field__field_type=field_type).exclude(value='')
+        for row in values.iterator():
+            try:
+                setattr(row, column, parse(row.value))
+            except (TypeError, ValueError):
+                continue
+            batch.append(row)
+            if len(batch) >= 500:
+                CustomFieldValue.objects.bulk_update(batch, [column])
+                batch = []
+        CustomFieldValue.objects.bulk_update(batch, [column])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0013_card_checklist_completed_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customfieldvalue',
+            name='bool_value',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customfieldvalue',
+            name='date_value',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customfieldvalue',
+            name='number_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customfieldvalue',
+            index=models.Index(fields=['custom_field', 'number_value'], name='kanban_cfv_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customfieldvalue',
+            index=models.Index(fields=['custom_field', 'date_value'], name='kanban_cfv_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customfieldvalue',
+            index=models.Index(fields=['custom_field', 'bool_value'], name='kanban_cfv_bool_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customfieldvalue',
+            index=models.Index(fields=['custom_field', 'value'], name='kanban_cfv_text_idx'),
+        ),
+        migrations.RunPython(convert_text_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0014_customfieldvalue_bool_value_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_transitions(apps, schema_editor):
+    """
+    Log existing cards as created in their current list, since earlier moves
+    were never recorded, and queue a rollup for them
+    """
+    Card = apps.get_model('kanban', 'Card')
+    CardTransition = apps.get_model('kanban', 'CardTransition')
+    Job = apps.get_model('kanban', 'Job')
+
+    cards = Card.objects.order_by('id').values_list('id', 'list_id', 'created_at')
+    last_id = 0
+    while True:
+        batch = list(cards.filter(id__gt=last_id)[:500])
+        if not batch:
+            break
+        CardTransition.objects.bulk_create([
+            CardTransition(card_id=card_id, to_list_id=list_id, created_at=created_at)
+            for card_id, list_id, created_at in batch
+        ])
+        last_id = batch[-1][0]
+
+    if last_id:
+        Job.objects.create(name='analytics.rollup', priority=-10)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0015_board_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListFlowDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('arrivals', models.PositiveIntegerField(default=0)),
+                ('departures', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flow_days', to='kanban.board')),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flow_days', to='kanban.list')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'day'], name='kanban_flow_board_day_idx')],
+                'unique_together': {('list', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CycleTimeDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_time_days', to='kanban.board')),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_time_days', to='kanban.list')),
+            ],
+            options={
+                'unique_together': {('list', 'day', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CardTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('rolled_up', models.BooleanField(default=False)),
+                ('card', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transitions', to='kanban.card')),
+                ('from_list', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kanban.list')),
+                ('to_list', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kanban.list')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='kanban_transition_pending_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_transitions, migrations.RunPython.noop),
+    ]
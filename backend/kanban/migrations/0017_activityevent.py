@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('kanban', '0016_listflowday_cycletimeday_cardtransition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'card.moved'), (2, 'card.archived'), (3, 'card.restored'), (4, 'card.labels_changed'), (5, 'list.archived'), (6, 'list.restored'), (7, 'comment.added'), (8, 'comment.deleted'), (9, 'checklist_item.toggled'), (10, 'checklist.completed_all'), (11, 'member.added'), (12, 'member.removed')])),
+                ('card_id', models.BigIntegerField(blank=True, null=True)),
+                ('entity_id', models.BigIntegerField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('board', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='kanban.board')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['board', 'id'], name='kanban_activity_board_idx'), models.Index(condition=models.Q(('card_id__isnull', False)), fields=['card_id', 'id'], name='kanban_activity_card_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,15 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import metrics
+
+
+class BoardManager(models.Manager):
+    """Hide boards that were deleted and are waiting to be purged"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Board(models.Model):
@@ -31,9 +41,17 @@ class Board(models.Model):
         max_length=10, choices=BACKGROUND_CHOICES, default='blue')
     background_image = models.ImageField(
         upload_to='board_backgrounds/', null=True, blank=True)
+    background_image_hash = models.CharField(
+        max_length=64, blank=True, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Bumped by every write to the board's contents; keys cached responses
+    revision = models.PositiveBigIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BoardManager()
+    all_objects = models.Manager()
+
     class Meta:
         ordering = ['-created_at']
 
@@ -70,11 +88,24 @@ class List(models.Model):
         Board, on_delete=models.CASCADE, related_name='lists')
     position = models.FloatField(default=0)
     archived = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    # Bumped on every write, see kanban.versioning
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['position', 'created_at']
+        indexes = [
+            # Live lists are read on every board open, archived ones only
+            # when browsing the archive
+            models.Index(fields=['board', 'position'],
+                         condition=models.Q(archived=False),
+                         name='kanban_list_live_idx'),
+            models.Index(fields=['board', '-archived_at'],
+                         condition=models.Q(archived=True),
+                         name='kanban_list_archived_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.board.title}"
@@ -117,10 +148,20 @@ class Card(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     start_date = models.DateTimeField(null=True, blank=True)
     archived = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(null=True, blank=True)
     cover_color = models.CharField(
         max_length=10, choices=COVER_COLOR_CHOICES, null=True, blank=True)
     cover_image = models.ImageField(
         upload_to='card_covers/', null=True, blank=True)
+    cover_image_hash = models.CharField(
+        max_length=64, blank=True, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    checklist_item_count = models.PositiveIntegerField(
+        default=0, editable=False)
+    checklist_completed_count = models.PositiveIntegerField(
+        default=0, editable=False)
+    # Bumped on every write, see kanban.versioning
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='created_cards')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -128,6 +169,14 @@ class Card(models.Model):
 
     class Meta:
         ordering = ['position', 'created_at']
+        indexes = [
+            models.Index(fields=['list', 'position'],
+                         condition=models.Q(archived=False),
+                         name='kanban_card_live_idx'),
+            models.Index(fields=['list', '-archived_at'],
+                         condition=models.Q(archived=True),
+                         name='kanban_card_archived_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.list.title}"
@@ -144,6 +193,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['card', 'created_at'],
+                         name='kanban_comment_thread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.author.username} - {self.card.title}"
@@ -183,6 +236,10 @@ class Checklist(models.Model):
     card = models.ForeignKey(
         Card, on_delete=models.CASCADE, related_name='checklists')
     position = models.FloatField(default=0)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped on every write, see kanban.versioning
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -199,6 +256,8 @@ class ChecklistItem(models.Model):
         Checklist, on_delete=models.CASCADE, related_name='items')
     completed = models.BooleanField(default=False)
     position = models.FloatField(default=0)
+    # Bumped on every write, see kanban.versioning
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -214,6 +273,7 @@ class Attachment(models.Model):
     name = models.CharField(max_length=255)
     size = models.BigIntegerField()
     content_type = models.CharField(max_length=100)
+    file_hash = models.CharField(max_length=64, blank=True, editable=False)
     card = models.ForeignKey(
         Card, on_delete=models.CASCADE, related_name='attachments')
     uploaded_by = models.ForeignKey(
@@ -229,12 +289,25 @@ class Attachment(models.Model):
 
     def get_file_size_display(self):
         """Return human readable file size"""
-        size = self.size
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
+        return file_size_display(self.size)
+
+
+def file_size_display(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+
+# Column holding the comparable value of each custom field type
+VALUE_COLUMNS = {
+    'text': 'value',
+    'number': 'number_value',
+    'date': 'date_value',
+    'checkbox': 'bool_value',
+    'dropdown': 'value',
+}
 
 
 class CustomField(models.Model):
@@ -269,15 +342,34 @@ class CustomFieldValue(models.Model):
     card = models.ForeignKey(
         Card, on_delete=models.CASCADE, related_name='custom_field_values')
     value = models.TextField(blank=True)
+    # Typed copies of ``value`` for the number, date and checkbox field types
+    number_value = models.FloatField(null=True, blank=True)
+    date_value = models.DateTimeField(null=True, blank=True)
+    bool_value = models.BooleanField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['custom_field', 'card']
+        indexes = [
+            models.Index(fields=['custom_field', 'number_value'],
+                         name='kanban_cfv_number_idx'),
+            models.Index(fields=['custom_field', 'date_value'],
+                         name='kanban_cfv_date_idx'),
+            models.Index(fields=['custom_field', 'bool_value'],
+                         name='kanban_cfv_bool_idx'),
+            models.Index(fields=['custom_field', 'value'],
+                         name='kanban_cfv_text_idx'),
+        ]
 
     def __str__(self):
         return f"{self.custom_field.name}: {self.value}"
 
+    @property
+    def typed_value(self):
+        column = VALUE_COLUMNS.get(self.custom_field.field_type, 'value')
+        return getattr(self, column)
+
 
 class BoardTemplate(models.Model):
     name = models.CharField(max_length=200)
@@ -294,3 +386,245 @@ class BoardTemplate(models.Model):
 
     def __str__(self):
         return self.name
+
+    def instantiate(self, user):
+        """Create a new board owned by ``user`` from this template"""
+        # analytics imports the models
+        from . import analytics
+
+        board_data = self.board_data
+
+        with transaction.atomic():
+            board = Board.objects.create(
+                title=f"{self.name} - {board_data.get('title', 'New Board')}",
+                description=board_data.get('description', ''),
+                owner=user,
+                visibility=board_data.get('visibility', 'private'),
+                background_color=board_data.get('background_color', 'blue')
+            )
+
+            # Add the creator as a member
+            BoardMember.objects.create(board=board, user=user, role='owner')
+
+            # Create lists, then all of their cards in one insert
+            cards = []
+            for list_data in board_data.get('lists', []):
+                list_obj = List.objects.create(
+                    title=list_data['title'],
+                    board=board,
+                    position=list_data.get('position', 0)
+                )
+                cards.extend(
+                    Card(
+                        title=card_data['title'],
+                        description=card_data.get('description', ''),
+                        list=list_obj,
+                        position=card_data.get('position', 0),
+                        created_by=user
+                    )
+                    for card_data in list_data.get('cards', [])
+                )
+            Card.objects.bulk_create(cards)
+            analytics.record_created(cards)
+
+            Label.objects.bulk_create([
+                Label(
+                    name=label_data['name'],
+                    color=label_data.get('color', 'blue'),
+                    board=board
+                )
+                for label_data in board_data.get('labels', [])
+            ])
+
+        metrics.inc('kanban_template_instantiations_total')
+        return board
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    PRIORITY_HIGH = 10
+    PRIORITY_NORMAL = 0
+    PRIORITY_LOW = -10
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='queued')
+    priority = models.SmallIntegerField(default=PRIORITY_NORMAL)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'],
+                         name='kanban_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class BulkOperation(models.Model):
+    ACTION_CHOICES = [
+        ('archive', 'Archive'),
+        ('move', 'Move'),
+        ('sort', 'Sort'),
+        ('relabel', 'Relabel'),
+    ]
+
+    token = models.CharField(max_length=64, unique=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='bulk_operations')
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='bulk_operations')
+    affected = models.PositiveIntegerField(default=0)
+    undo_data = models.JSONField(default=dict)
+    undone_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.action} ({self.affected} cards) - {self.board.title}"
+
+
+class CardTransition(models.Model):
+    """
+    A card entering or leaving a list. Creation has no ``from_list`` and
+    deletion no ``to_list``. The rows are folded into the daily rollups by
+    the ``analytics.rollup`` job and flagged ``rolled_up``.
+    """
+    card = models.ForeignKey(
+        Card, on_delete=models.SET_NULL, null=True, related_name='transitions')
+    from_list = models.ForeignKey(
+        List, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    to_list = models.ForeignKey(
+        List, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(rolled_up=False),
+                         name='kanban_transition_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Card {self.card_id}: {self.from_list_id} -> {self.to_list_id}"
+
+
+class ListFlowDay(models.Model):
+    """Cards that entered and left a list on one day"""
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='flow_days')
+    list = models.ForeignKey(
+        List, on_delete=models.CASCADE, related_name='flow_days')
+    day = models.DateField()
+    arrivals = models.PositiveIntegerField(default=0)
+    departures = models.PositiveIntegerField(default=0)
+    # Cards moved into the list for the first time
+    completions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['list', 'day']
+        indexes = [
+            models.Index(fields=['board', 'day'], name='kanban_flow_board_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.list_id} {self.day}: +{self.arrivals} -{self.departures}"
+
+
+class CycleTimeDay(models.Model):
+    """Histogram bucket of the cycle times of cards completed in a list on one day"""
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='cycle_time_days')
+    list = models.ForeignKey(
+        List, on_delete=models.CASCADE, related_name='cycle_time_days')
+    day = models.DateField()
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ['list', 'day', 'bucket']
+
+    def __str__(self):
+        return f"{self.list_id} {self.day} bucket {self.bucket}: {self.count}"
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only record of a change on a board. ``entity_id`` is the id of
+    the card, list, comment, checklist item or user the event is about,
+    and ``card_id`` the card it belongs to, for the card feed.
+    """
+    CARD_MOVED = 1
+    CARD_ARCHIVED = 2
+    CARD_RESTORED = 3
+    CARD_LABELS_CHANGED = 4
+    LIST_ARCHIVED = 5
+    LIST_RESTORED = 6
+    COMMENT_ADDED = 7
+    COMMENT_DELETED = 8
+    CHECKLIST_ITEM_TOGGLED = 9
+    CHECKLIST_COMPLETED_ALL = 10
+    MEMBER_ADDED = 11
+    MEMBER_REMOVED = 12
+
+    KIND_CHOICES = [
+        (CARD_MOVED, 'card.moved'),
+        (CARD_ARCHIVED, 'card.archived'),
+        (CARD_RESTORED, 'card.restored'),
+        (CARD_LABELS_CHANGED, 'card.labels_changed'),
+        (LIST_ARCHIVED, 'list.archived'),
+        (LIST_RESTORED, 'list.restored'),
+        (COMMENT_ADDED, 'comment.added'),
+        (COMMENT_DELETED, 'comment.deleted'),
+        (CHECKLIST_ITEM_TOGGLED, 'checklist_item.toggled'),
+        (CHECKLIST_COMPLETED_ALL, 'checklist.completed_all'),
+        (MEMBER_ADDED, 'member.added'),
+        (MEMBER_REMOVED, 'member.removed'),
+    ]
+
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    actor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='+')
+    # Covered by the (board, id) index
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='activity', db_index=False)
+    card_id = models.BigIntegerField(null=True, blank=True)
+    entity_id = models.BigIntegerField()
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['board', 'id'], name='kanban_activity_board_idx'),
+            models.Index(fields=['card_id', 'id'], condition=models.Q(card_id__isnull=False),
+                         name='kanban_activity_card_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.entity_id} on board {self.board_id}"
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ArchivePagination(CursorPagination):
+    """Newest archived first; cursors stay stable while items are restored"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-archived_at', '-id')
+
+
+class CommentThreadPagination(CursorPagination):
+    """Newest comments first; follow ``next`` to load older ones"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class ActivityPagination(CursorPagination):
+    """Newest events first, keyed on the id alone to walk the (board, id) index"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-id',)
@@ -1,5 +1,15 @@
+import hmac
+
+from django.conf import settings
 from rest_framework import permissions
 
+from . import membership, metrics
+
+
+def is_live(board):
+    """Boards waiting to be purged behave as if they no longer exist"""
+    return board is not None and board.deleted_at is None
+
 
 class IsBoardMember(permissions.BasePermission):
     """
@@ -14,8 +24,9 @@ class IsBoardMember(permissions.BasePermission):
         # For checklist operations, check if user is member of the board
         if hasattr(view, 'get_board'):
             board = view.get_board()
-            if board:
-                return board.members.filter(user=request.user).exists()
+            if not is_live(board):
+                return False
+            return membership.is_member(request.user, board.id)
 
         return True
 
@@ -27,10 +38,12 @@ class IsBoardMember(permissions.BasePermission):
             board = obj.list.board
         elif hasattr(obj, 'card') and hasattr(obj.card, 'list') and hasattr(obj.card.list, 'board'):
             board = obj.card.list.board
+        elif hasattr(obj, 'checklist'):
+            board = obj.checklist.card.list.board
         else:
             return False
 
-        return board.members.filter(user=request.user).exists()
+        return is_live(board) and membership.is_member(request.user, board.id)
 
 
 class IsBoardOwnerOrAdmin(permissions.BasePermission):
@@ -44,10 +57,9 @@ class IsBoardOwnerOrAdmin(permissions.BasePermission):
 
         if hasattr(view, 'get_board'):
             board = view.get_board()
-            if board:
-                membership = board.members.filter(user=request.user).first()
-                if membership:
-                    return membership.role in ['owner', 'admin']
+            if not is_live(board):
+                return False
+            return membership.role(request.user, board.id) in ['owner', 'admin']
 
         return True
 
@@ -59,8 +71,21 @@ class IsBoardOwnerOrAdmin(permissions.BasePermission):
         else:
             return False
 
-        membership = board.members.filter(user=request.user).first()
-        if membership:
-            return membership.role in ['owner', 'admin']
+        if not is_live(board):
+            return False
+
+        return membership.role(request.user, board.id) in ['owner', 'admin']
 
-        return False
+
+class HasMetricsToken(permissions.BasePermission):
+    """
+    Allow scrapes that send ``Authorization: Bearer <KANBAN_METRICS['TOKEN']>``.
+    Without a configured token the metrics are only served with DEBUG on.
+    """
+
+    def has_permission(self, request, view):
+        token = metrics.METRICS_SETTINGS['TOKEN']
+        if not token:
+            return settings.DEBUG
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
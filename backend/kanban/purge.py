@@ -0,0 +1,149 @@
+"""
+Batched purge of soft-deleted boards.
+
+Deleting a board through the ORM makes Django's collector load the whole
+board tree into memory and delete it in one long transaction. Instead the
+board is flagged with ``deleted_at`` and this module removes its rows with
+raw DELETE statements, a bounded batch of cards per short transaction, so the
+SQLite write lock is only ever held briefly.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from . import membership
+from .models import (
+    Board, BoardMember, List, Card, Label, Comment, CommentReaction,
+    Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue,
+    BulkOperation, CardTransition, ListFlowDay, CycleTimeDay, ActivityEvent
+)
+
+PURGE_BATCH_SIZE = getattr(settings, 'KANBAN_PURGE_BATCH_SIZE', 200)
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _delete(model, where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {_table(model)} WHERE {where}', params)
+        return cursor.rowcount
+
+
+def delete_files(names):
+    """Remove stored files, ignoring ones that are already gone"""
+    deleted = 0
+    for name in names:
+        if name and default_storage.exists(name):
+            default_storage.delete(name)
+            deleted += 1
+    return deleted
+
+
+def _card_dependents():
+    """
+    Tables holding rows that belong to a batch of cards, in delete order,
+    as (model, WHERE clause template). ``{ids}`` is replaced by the
+    placeholders for the card ids.
+    """
+    return [
+        (CommentReaction,
+         f'comment_id IN (SELECT id FROM {_table(Comment)} WHERE card_id IN ({{ids}}))'),
+        (Comment, 'card_id IN ({ids})'),
+        (ChecklistItem,
+         f'checklist_id IN (SELECT id FROM {_table(Checklist)} WHERE card_id IN ({{ids}}))'),
+        (Checklist, 'card_id IN ({ids})'),
+        (Attachment, 'card_id IN ({ids})'),
+        (CustomFieldValue, 'card_id IN ({ids})'),
+        (Card.labels.through, 'card_id IN ({ids})'),
+        (CardTransition, 'card_id IN ({ids})'),
+        (Card, 'id IN ({ids})'),
+    ]
+
+
+def _purge_card_batch(card_ids):
+    ids = _placeholders(card_ids)
+    files = list(Attachment.objects.filter(
+        card_id__in=card_ids).values_list('file', flat=True))
+    files += Card.objects.filter(id__in=card_ids).exclude(
+        cover_image='').exclude(cover_image__isnull=True).values_list(
+        'cover_image', flat=True)
+
+    with transaction.atomic():
+        for model, where in _card_dependents():
+            # Subqueries repeat the id list, so repeat the parameters too
+            _delete(model, where.format(ids=ids),
+                    list(card_ids) * where.count('{ids}'))
+
+    return files
+
+
+def purge_board(board_id, batch_size=None):
+    """Delete a soft-deleted board and everything under it, batch by batch"""
+    batch_size = batch_size or PURGE_BATCH_SIZE
+    board = Board.all_objects.filter(
+        id=board_id, deleted_at__isnull=False).first()
+    if board is None:
+        return {'cards': 0, 'files': 0}
+
+    purged_cards = 0
+    purged_files = 0
+    list_ids = list(List.objects.filter(
+        board_id=board_id).values_list('id', flat=True))
+
+    # Walk the cards in id order, one short transaction per batch
+    last_id = 0
+    while list_ids:
+        card_ids = list(Card.objects.filter(
+            list_id__in=list_ids, id__gt=last_id
+        ).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not card_ids:
+            break
+
+        files = _purge_card_batch(card_ids)
+        purged_cards += len(card_ids)
+        purged_files += delete_files(files)
+        last_id = card_ids[-1]
+
+    # The activity log can outgrow the cards, so it goes in batches as well
+    while _delete(ActivityEvent,
+                  f'id IN (SELECT id FROM {_table(ActivityEvent)} WHERE board_id = %s LIMIT %s)',
+                  [board_id, batch_size]):
+        pass
+
+    member_ids = list(BoardMember.objects.filter(
+        board_id=board_id).values_list('user_id', flat=True))
+
+    with transaction.atomic():
+        # Cards moved to other boards may still point at this board's
+        # labels and custom fields
+        _delete(Card.labels.through,
+                f'label_id IN (SELECT id FROM {_table(Label)} WHERE board_id = %s)',
+                [board_id])
+        _delete(CustomFieldValue,
+                f'custom_field_id IN (SELECT id FROM {_table(CustomField)} WHERE board_id = %s)',
+                [board_id])
+        _delete(CustomField, 'board_id = %s', [board_id])
+        _delete(Label, 'board_id = %s', [board_id])
+        # Transitions of cards deleted or moved away before the purge
+        lists = f'(SELECT id FROM {_table(List)} WHERE board_id = %s)'
+        _delete(CardTransition, f'from_list_id IN {lists} OR to_list_id IN {lists}',
+                [board_id, board_id])
+        _delete(ListFlowDay, 'board_id = %s', [board_id])
+        _delete(CycleTimeDay, 'board_id = %s', [board_id])
+        _delete(List, 'board_id = %s', [board_id])
+        _delete(BoardMember, 'board_id = %s', [board_id])
+        _delete(BulkOperation, 'board_id = %s', [board_id])
+        _delete(Board, 'id = %s', [board_id])
+
+    membership.invalidate(member_ids)
+
+    if board.background_image:
+        purged_files += delete_files([board.background_image.name])
+
+    return {'cards': purged_cards, 'files': purged_files}
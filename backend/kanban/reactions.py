@@ -0,0 +1,57 @@
+from django.db.models import Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import CommentReaction
+
+# Usernames shown next to each emoji; the full list is served by
+# the comment reactions endpoint
+SUMMARY_USERNAMES = 3
+
+
+def summarize(comment_ids, user=None):
+    """
+    Group the reactions of many comments by emoji with two queries: one
+    GROUP BY for counts and the caller's own reactions, one window query
+    for the first few reactors of each emoji.
+
+    Returns {comment_id: [{emoji, count, reacted_by_me, users}, ...]}.
+    """
+    comment_ids = list(comment_ids)
+    summaries = {comment_id: [] for comment_id in comment_ids}
+    if not comment_ids:
+        return summaries
+
+    reactions = CommentReaction.objects.filter(comment_id__in=comment_ids)
+    user_id = user.id if user is not None and user.is_authenticated else None
+
+    groups = {}
+    for row in reactions.order_by().values('comment_id', 'emoji').annotate(
+        count=Count('id'),
+        mine=Count('id', filter=Q(user_id=user_id)),
+        first_at=Min('created_at'),
+    ).order_by('comment_id', 'first_at'):
+        group = {
+            'emoji': row['emoji'],
+            'count': row['count'],
+            'reacted_by_me': row['mine'] > 0,
+            'users': [],
+        }
+        groups[(row['comment_id'], row['emoji'])] = group
+        summaries[row['comment_id']].append(group)
+
+    first_reactors = reactions.annotate(
+        rank=Window(
+            RowNumber(),
+            partition_by=[F('comment_id'), F('emoji')],
+            order_by=F('created_at').asc()
+        )
+    ).filter(rank__lte=SUMMARY_USERNAMES).order_by(
+        'comment_id', 'emoji', 'rank'
+    ).values_list('comment_id', 'emoji', 'user__username')
+
+    for comment_id, emoji, username in first_reactors:
+        group = groups.get((comment_id, emoji))
+        if group is not None:
+            group['users'].append(username)
+
+    return summaries
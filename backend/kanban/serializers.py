@@ -1,6 +1,38 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Board, BoardMember, List, Card, Label, Comment, CommentReaction, Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate
+from django.utils import timezone
+from .models import Board, BoardMember, List, Card, Label, Comment, CommentReaction, Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate, Job, ActivityEvent
+from . import custom_fields, reactions, snapshots, thumbnails, versioning
+
+
+class ThumbnailsField(serializers.ReadOnlyField):
+    """Expose the thumbnail URLs for an image hash stored on the model"""
+
+    def to_representation(self, value):
+        urls = thumbnails.thumbnail_urls(value)
+        request = self.context.get('request')
+        if urls and request is not None:
+            urls = {size: request.build_absolute_uri(url)
+                    for size, url in urls.items()}
+        return urls
+
+
+def stamp_archived(instance, validated_data):
+    """Record when an item enters or leaves the archive"""
+    archived = validated_data.get('archived')
+    if archived is not None and archived != instance.archived:
+        validated_data['archived_at'] = timezone.now() if archived else None
+
+
+class VersionedSerializer(serializers.ModelSerializer):
+    """
+    Updates write only the changed fields with ``versioning.update``,
+    conditional on the ``expected_version`` in the context
+    """
+
+    def update(self, instance, validated_data, force=False):
+        return versioning.update(instance, validated_data,
+                                 self.context.get('expected_version'), force)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -26,74 +58,121 @@ class CommentReactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at']
 
 
+class CommentListSerializer(serializers.ListSerializer):
+    """Summarize the reactions of a whole batch of comments at once"""
+
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        self.context.setdefault('reaction_summaries', {}).update(
+            reactions.summarize([comment.id for comment in comments],
+                                getattr(request, 'user', None))
+        )
+        return super().to_representation(comments)
+
+
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    reactions = CommentReactionSerializer(many=True, read_only=True)
+    reaction_summary = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
+        list_serializer_class = CommentListSerializer
         fields = ['id', 'content', 'author',
-                  'reactions', 'created_at', 'updated_at']
+                  'reaction_summary', 'created_at', 'updated_at']
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
 
+    def get_reaction_summary(self, obj):
+        summaries = self.context.get('reaction_summaries', {})
+        if obj.id not in summaries:
+            request = self.context.get('request')
+            summaries = reactions.summarize(
+                [obj.id], getattr(request, 'user', None))
+        return summaries[obj.id]
+
 
-class ChecklistItemSerializer(serializers.ModelSerializer):
+class ChecklistItemSerializer(VersionedSerializer):
     class Meta:
         model = ChecklistItem
         fields = ['id', 'text', 'completed',
-                  'position', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+                  'position', 'created_at', 'updated_at', 'version']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version']
 
 
-class ChecklistSerializer(serializers.ModelSerializer):
+class ChecklistSerializer(VersionedSerializer):
     items = ChecklistItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Checklist
-        fields = ['id', 'title', 'card', 'position',
-                  'items', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'card', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'card', 'position', 'item_count',
+                  'completed_count', 'items', 'created_at', 'updated_at', 'version']
+        read_only_fields = ['id', 'card', 'item_count', 'completed_count',
+                            'created_at', 'updated_at', 'version']
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     file_size_display = serializers.ReadOnlyField(
         source='get_file_size_display')
+    thumbnails = ThumbnailsField(source='file_hash')
 
     class Meta:
         model = Attachment
         fields = [
             'id', 'file', 'name', 'size', 'file_size_display', 'content_type',
-            'card', 'uploaded_by', 'created_at', 'updated_at'
+            'thumbnails', 'card', 'uploaded_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'card', 'name', 'size', 'content_type',
                             'uploaded_by', 'created_at', 'updated_at']
 
-    def validate(self, data):
-        print(f"DEBUG: AttachmentSerializer.validate called with data: {data}")
-        print(f"DEBUG: File field present: {'file' in data}")
-        if 'file' in data:
-            print(f"DEBUG: File field value: {data['file']}")
-        return data
-
 
 class CustomFieldValueSerializer(serializers.ModelSerializer):
     custom_field = serializers.StringRelatedField(read_only=True)
+    custom_field_id = serializers.PrimaryKeyRelatedField(
+        queryset=CustomField.objects.all(), source='custom_field',
+        required=False
+    )
+    field_type = serializers.ReadOnlyField(source='custom_field.field_type')
+    value = serializers.JSONField(required=False)
+    typed_value = serializers.ReadOnlyField()
 
     class Meta:
         model = CustomFieldValue
-        fields = ['id', 'custom_field', 'value', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'card', 'custom_field', 'custom_field_id', 'field_type',
+                  'value', 'typed_value', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'card', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        if self.instance is not None:
+            # A value stays attached to its field; only the value changes
+            attrs.pop('custom_field', None)
+            custom_field = self.instance.custom_field
+        elif 'custom_field' in attrs:
+            custom_field = attrs['custom_field']
+        else:
+            raise serializers.ValidationError(
+                {'custom_field_id': 'This field is required.'})
+
+        if 'value' in attrs or self.instance is None:
+            raw = attrs.pop('value', None)
+            if isinstance(raw, (dict, list)):
+                raise serializers.ValidationError(
+                    {'value': 'Expected a single value'})
+            try:
+                attrs.update(custom_fields.coerce(custom_field, raw))
+            except ValueError as e:
+                raise serializers.ValidationError({'value': str(e)})
 
-class CardSerializer(serializers.ModelSerializer):
+        return attrs
+
+
+class CardSerializer(VersionedSerializer):
     labels = LabelSerializer(many=True, read_only=True)
     created_by = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    checklists = ChecklistSerializer(many=True, read_only=True)
     attachments = AttachmentSerializer(many=True, read_only=True)
     custom_field_values = CustomFieldValueSerializer(many=True, read_only=True)
     list = serializers.SerializerMethodField()
+    cover_image_thumbnails = ThumbnailsField(source='cover_image_hash')
     label_ids = serializers.ListField(
         child=serializers.IntegerField(),
         write_only=True,
@@ -103,12 +182,15 @@ class CardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Card
         fields = [
-            'id', 'title', 'description', 'list', 'position', 'archived',
-            'labels', 'comments', 'checklists', 'attachments', 'due_date', 'start_date',
-            'cover_color', 'cover_image', 'custom_field_values',
-            'created_by', 'created_at', 'updated_at', 'label_ids'
+            'id', 'title', 'description', 'list', 'position', 'archived', 'archived_at',
+            'labels', 'comment_count', 'checklist_item_count', 'checklist_completed_count',
+            'attachments', 'due_date', 'start_date',
+            'cover_color', 'cover_image', 'cover_image_thumbnails', 'custom_field_values',
+            'created_by', 'created_at', 'updated_at', 'version', 'label_ids'
         ]
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'archived_at', 'comment_count', 'checklist_item_count',
+                            'checklist_completed_count', 'created_by', 'created_at', 'updated_at',
+                            'version']
 
     def get_list(self, obj):
         return {
@@ -130,28 +212,59 @@ class CardSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         label_ids = validated_data.pop('label_ids', None)
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        stamp_archived(instance, validated_data)
+        # A new label set is a write to the card as well
+        super().update(instance, validated_data, force=label_ids is not None)
 
         if label_ids is not None:
             labels = Label.objects.filter(
-                id__in=label_ids, board=instance.list.board)
+                id__in=label_ids, board_id=instance.list.board_id)
             instance.labels.set(labels)
 
         return instance
 
 
-class ListSerializer(serializers.ModelSerializer):
-    cards = CardSerializer(many=True, read_only=True)
+class ListSerializer(VersionedSerializer):
+    cards = serializers.SerializerMethodField()
     board = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = List
-        fields = ['id', 'title', 'board', 'position', 'archived',
-                  'cards', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'board', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'board', 'position', 'archived', 'archived_at',
+                  'cards', 'created_at', 'updated_at', 'version']
+        read_only_fields = ['id', 'board', 'archived_at',
+                            'created_at', 'updated_at', 'version']
+
+    def get_cards(self, obj):
+        # Cards prefetched by the caller are serialized as they are
+        if 'cards' in getattr(obj, '_prefetched_objects_cache', {}):
+            return CardSerializer(obj.cards.all(), many=True, context=self.context).data
+        # Otherwise the same payload in a fixed number of queries
+        return snapshots.cards(obj.cards.filter(archived=False),
+                               self.context.get('request'))
+
+    def update(self, instance, validated_data):
+        stamp_archived(instance, validated_data)
+        return super().update(instance, validated_data)
+
+
+class ArchivedListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = List
+        fields = ['id', 'title', 'position', 'archived_at']
+        read_only_fields = fields
+
+
+class ArchivedCardSerializer(serializers.ModelSerializer):
+    list = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Card
+        fields = ['id', 'title', 'list', 'position', 'archived_at']
+        read_only_fields = fields
+
+    def get_list(self, obj):
+        return {'id': obj.list_id, 'title': obj.list.title}
 
 
 class BoardMemberSerializer(serializers.ModelSerializer):
@@ -188,12 +301,15 @@ class BoardSerializer(serializers.ModelSerializer):
     lists = ListSerializer(many=True, read_only=True)
     labels = LabelSerializer(many=True, read_only=True)
     custom_fields = CustomFieldSerializer(many=True, read_only=True)
+    background_image_thumbnails = ThumbnailsField(
+        source='background_image_hash')
 
     class Meta:
         model = Board
         fields = [
             'id', 'title', 'description', 'owner', 'members',
             'lists', 'labels', 'custom_fields', 'visibility', 'background_color', 'background_image',
+            'background_image_thumbnails',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
@@ -225,7 +341,38 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
+class RelabelSerializer(serializers.Serializer):
+    add_label_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list)
+    remove_label_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list)
+
+
 class CardMoveSerializer(serializers.Serializer):
     card_id = serializers.IntegerField()
     list_id = serializers.IntegerField()
     position = serializers.FloatField()
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'priority', 'attempts', 'max_attempts',
+                  'result', 'last_error', 'run_after', 'created_at', 'updated_at',
+                  'finished_at']
+        read_only_fields = fields
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='get_kind_display', read_only=True)
+    actor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ActivityEvent
+        fields = ['id', 'type', 'actor', 'card_id', 'entity_id', 'data', 'created_at']
+        read_only_fields = fields
+
+    def get_actor(self, obj):
+        if obj.actor is None:
+            return None
+        return {'id': obj.actor.id, 'username': obj.actor.username}
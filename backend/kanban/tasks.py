@@ -0,0 +1,39 @@
+"""Background job handlers, registered with the queue in ``kanban.jobs``."""
+from django.contrib.auth.models import User
+
+from . import analytics, purge, thumbnails
+from .jobs import periodic, task
+from .models import BoardTemplate
+
+
+@task('thumbnails.generate')
+def generate_thumbnails(model_label, pk, field_name, hash_field):
+    return thumbnails.process(model_label, pk, field_name, hash_field)
+
+
+@task('storage.delete')
+def delete_files(names):
+    """Remove files that no longer have a database row pointing at them"""
+    return {'deleted': purge.delete_files(names)}
+
+
+@task('boards.purge')
+def purge_board(board_id):
+    return purge.purge_board(board_id)
+
+
+@task('templates.instantiate')
+def instantiate_template(template_id, user_id):
+    template = BoardTemplate.objects.get(id=template_id)
+    user = User.objects.get(id=user_id)
+    board = template.instantiate(user)
+    return {'board_id': board.id}
+
+
+@task('analytics.rollup')
+def rollup_analytics():
+    return {'transitions': analytics.rollup()}
+
+
+periodic('analytics.rollup', analytics.ANALYTICS_SETTINGS['ROLLUP_INTERVAL'],
+         when=analytics.pending)
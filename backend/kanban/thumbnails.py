@@ -0,0 +1,120 @@
+import hashlib
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from . import board_cache, jobs
+from .models import Job
+
+THUMBNAIL_SIZES = getattr(settings, 'KANBAN_THUMBNAIL_SIZES', {
+    'small': (320, 320),
+    'medium': (640, 640),
+    'large': (1280, 1280),
+})
+THUMBNAIL_DIR = 'thumbnails'
+
+if features.check('webp'):
+    THUMBNAIL_FORMAT, THUMBNAIL_EXT = 'WEBP', 'webp'
+else:
+    THUMBNAIL_FORMAT, THUMBNAIL_EXT = 'JPEG', 'jpg'
+
+
+def file_hash(field_file):
+    """Return the sha256 hex digest of a stored file"""
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
+
+
+def thumbnail_name(source_hash, size):
+    return f'{THUMBNAIL_DIR}/{source_hash[:2]}/{source_hash}_{size}.{THUMBNAIL_EXT}'
+
+
+def thumbnail_urls(source_hash):
+    """Map every configured size to its thumbnail URL, or None if not ready"""
+    if not source_hash:
+        return None
+    return {
+        size: default_storage.url(thumbnail_name(source_hash, size))
+        for size in THUMBNAIL_SIZES
+    }
+
+
+def is_image(content_type):
+    return bool(content_type) and content_type.startswith('image/')
+
+
+def generate_thumbnails(field_file):
+    """
+    Render every configured size for an image file and return its source hash.
+    Derivatives already on disk for the same hash are reused.
+    """
+    source_hash = file_hash(field_file)
+    missing = [
+        size for size in THUMBNAIL_SIZES
+        if not default_storage.exists(thumbnail_name(source_hash, size))
+    ]
+    if not missing:
+        return source_hash
+
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as image:
+            image = ImageOps.exif_transpose(image)
+            if THUMBNAIL_FORMAT == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
+
+            for size in missing:
+                thumb = image.copy()
+                thumb.thumbnail(THUMBNAIL_SIZES[size], Image.LANCZOS)
+                buffer = BytesIO()
+                thumb.save(buffer, THUMBNAIL_FORMAT, quality=80)
+                default_storage.save(
+                    thumbnail_name(source_hash, size),
+                    ContentFile(buffer.getvalue())
+                )
+    finally:
+        field_file.close()
+
+    return source_hash
+
+
+def process(model_label, pk, field_name, hash_field):
+    """Generate thumbnails for one model image field and store its hash"""
+    model = apps.get_model(model_label)
+    instance = model._base_manager.filter(pk=pk).first()
+    if instance is None:
+        return None
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return None
+
+    source_hash = generate_thumbnails(field_file)
+
+    # Only record the hash if the image was not replaced meanwhile
+    updated = model._base_manager.filter(
+        pk=pk, **{field_name: field_file.name}).update(**{hash_field: source_hash})
+    if updated:
+        # Thumbnail URLs are part of the board response
+        board_cache.invalidate([board_cache.board_id_of(instance)])
+    return source_hash
+
+
+def schedule(instance, field_name, hash_field):
+    """Queue thumbnail generation as a background job"""
+    return jobs.enqueue('thumbnails.generate', {
+        'model_label': instance._meta.label,
+        'pk': instance.pk,
+        'field_name': field_name,
+        'hash_field': hash_field,
+    }, priority=Job.PRIORITY_HIGH)
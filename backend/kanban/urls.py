@@ -4,9 +4,12 @@ from .views import (
     UserRegistrationView, BoardViewSet, ListViewSet,
     CardViewSet, LabelViewSet, CommentViewSet, CommentReactionViewSet,
     ChecklistViewSet, ChecklistItemViewSet, AttachmentViewSet,
-    BoardMemberViewSet, CustomFieldViewSet, CustomFieldValueViewSet,
+    BoardMemberViewSet, CustomFieldViewSet, CustomFieldValueViewSet, CustomFieldValueBatchView,
     BoardTemplateViewSet, CreateBoardFromTemplateView, ArchiveAllCardsView,
-    ReorderListsView
+    ReorderListsView, JobViewSet, BoardArchiveView, RestoreArchivedView,
+    MoveAllCardsView, SortCardsView, RelabelCardsView, RelabelSelectedCardsView,
+    UndoBulkOperationView, RequestMetricsView, CumulativeFlowView, CycleTimeView,
+    ThroughputView, BoardActivityView, CardActivityView
 )
 
 router = DefaultRouter()
@@ -27,12 +30,37 @@ urlpatterns = [
     }), name='board-list-detail'),
     path('lists/<int:list_pk>/archive-all-cards/',
          ArchiveAllCardsView.as_view(), name='list-archive-all-cards'),
+    path('lists/<int:list_pk>/move-all-cards/',
+         MoveAllCardsView.as_view(), name='list-move-all-cards'),
+    path('lists/<int:list_pk>/sort-cards/',
+         SortCardsView.as_view(), name='list-sort-cards'),
+    path('lists/<int:list_pk>/relabel-cards/',
+         RelabelCardsView.as_view(), name='list-relabel-cards'),
+    path('bulk-operations/<str:token>/undo/',
+         UndoBulkOperationView.as_view(), name='bulk-operation-undo'),
     path('boards/<int:board_pk>/reorder-lists/',
          ReorderListsView.as_view(), name='reorder-lists'),
+    path('boards/<int:board_pk>/archive/',
+         BoardArchiveView.as_view(), name='board-archive'),
+    path('boards/<int:board_pk>/archive/restore/',
+         RestoreArchivedView.as_view(), name='board-archive-restore'),
+    path('boards/<int:board_pk>/activity/',
+         BoardActivityView.as_view(), name='board-activity'),
+    path('boards/<int:board_pk>/analytics/cumulative-flow/',
+         CumulativeFlowView.as_view(), name='board-cumulative-flow'),
+    path('boards/<int:board_pk>/analytics/cycle-time/',
+         CycleTimeView.as_view(), name='board-cycle-time'),
+    path('boards/<int:board_pk>/analytics/throughput/',
+         ThroughputView.as_view(), name='board-throughput'),
     path('boards/<int:board_pk>/labels/', LabelViewSet.as_view({
         'get': 'list',
         'post': 'create'
     }), name='board-labels'),
+    path('boards/<int:board_pk>/labels/usage/', LabelViewSet.as_view({
+        'get': 'usage'
+    }), name='board-label-usage'),
+    path('boards/<int:board_pk>/cards/relabel/',
+         RelabelSelectedCardsView.as_view(), name='board-relabel-cards'),
     path('boards/<int:board_pk>/labels/<int:pk>/', LabelViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -61,10 +89,15 @@ urlpatterns = [
         'patch': 'partial_update',
         'delete': 'destroy'
     }), name='card-detail'),
+    path('cards/<int:card_pk>/activity/',
+         CardActivityView.as_view(), name='card-activity'),
     path('cards/<int:card_pk>/comments/', CommentViewSet.as_view({
         'get': 'list',
         'post': 'create'
     }), name='card-comments'),
+    path('cards/<int:card_pk>/comments/poll/', CommentViewSet.as_view({
+        'get': 'poll'
+    }), name='card-comments-poll'),
     path('cards/<int:card_pk>/comments/<int:pk>/', CommentViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -85,6 +118,18 @@ urlpatterns = [
         'get': 'list',
         'post': 'create'
     }), name='checklist-items'),
+    path('checklists/<int:checklist_pk>/items/bulk/', ChecklistItemViewSet.as_view({
+        'post': 'create_many'
+    }), name='checklist-items-bulk'),
+    path('checklists/<int:checklist_pk>/items/reorder/', ChecklistItemViewSet.as_view({
+        'post': 'reorder'
+    }), name='checklist-items-reorder'),
+    path('checklists/<int:checklist_pk>/items/move/', ChecklistItemViewSet.as_view({
+        'post': 'move'
+    }), name='checklist-items-move'),
+    path('checklists/<int:checklist_pk>/items/complete-all/', ChecklistItemViewSet.as_view({
+        'post': 'complete_all'
+    }), name='checklist-items-complete-all'),
     path('checklists/<int:checklist_pk>/items/<int:pk>/', ChecklistItemViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -107,6 +152,12 @@ urlpatterns = [
         'get': 'list',
         'post': 'create'
     }), name='board-members'),
+    path('boards/<int:board_pk>/members/invite/', BoardMemberViewSet.as_view({
+        'post': 'invite'
+    }), name='board-members-invite'),
+    path('boards/<int:board_pk>/members/copy/', BoardMemberViewSet.as_view({
+        'post': 'copy_from'
+    }), name='board-members-copy'),
     path('boards/<int:board_pk>/members/<int:pk>/', BoardMemberViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -117,7 +168,8 @@ urlpatterns = [
     # Comment Reactions URLs
     path('comments/<int:comment_pk>/reactions/', CommentReactionViewSet.as_view({
         'get': 'list',
-        'post': 'create'
+        'post': 'create',
+        'delete': 'remove'
     }), name='comment-reactions'),
 
     # Custom Fields URLs
@@ -137,6 +189,11 @@ urlpatterns = [
         'get': 'list',
         'post': 'create'
     }), name='card-custom-field-values'),
+    path('cards/<int:card_pk>/custom-field-values/batch/', CustomFieldValueViewSet.as_view({
+        'post': 'batch'
+    }), name='card-custom-field-values-batch'),
+    path('boards/<int:board_pk>/custom-field-values/batch/',
+         CustomFieldValueBatchView.as_view(), name='board-custom-field-values-batch'),
     path('cards/<int:card_pk>/custom-field-values/<int:pk>/', CustomFieldValueViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -157,4 +214,15 @@ urlpatterns = [
     }), name='board-template-detail'),
     path('templates/<int:template_id>/create-board/',
          CreateBoardFromTemplateView.as_view(), name='board-template-create-board'),
+
+    # Background Jobs URLs
+    path('jobs/', JobViewSet.as_view({
+        'get': 'list'
+    }), name='jobs'),
+    path('jobs/<int:pk>/', JobViewSet.as_view({
+        'get': 'retrieve'
+    }), name='job-detail'),
+
+    # Instrumentation
+    path('metrics/requests/', RequestMetricsView.as_view(), name='request-metrics'),
 ]
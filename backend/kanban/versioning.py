@@ -0,0 +1,112 @@
+"""
+Optimistic concurrency for cards, lists, checklists and checklist items.
+
+These rows carry a ``version`` that every write through the API bumps,
+moves, reorders and bulk actions included. Counters the server keeps, such
+as ``comment_count``, and thumbnail hashes leave it alone.
+
+A client that sends the version it last saw, as ``version`` in the body or
+in an ``If-Match`` header, has its update applied with a single
+``UPDATE ... WHERE id = %s AND version = %s``. When someone else wrote the
+row in between, nothing is written and the view answers 409 with the
+current row, so the client merges one row instead of reloading the board.
+Updates without a version still win over earlier writes, but only write
+the columns they change.
+"""
+from django.db.models import F
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+
+
+class Conflict(Exception):
+    """The row no longer has the version the change was based on"""
+
+
+def expected_version(request):
+    """
+    Version a write is conditional on: ``version`` in the body, else the
+    ``If-Match`` header. None when the client sent neither.
+    """
+    value = request.data.get('version') if hasattr(request.data, 'get') else None
+    if value is None:
+        value = request.headers.get('If-Match', '').strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        value = value.strip('"')
+        if value in ('', '*'):
+            return None
+    if isinstance(value, bool) or not str(value).isdigit():
+        raise ValidationError({'error': 'version must be a non-negative integer'})
+    return int(value)
+
+
+def save(instance, fields, version=None):
+    """
+    Write ``fields`` of ``instance`` and bump its version with one UPDATE,
+    conditional on ``version`` when given. Raises Conflict when the row has
+    another version or is gone.
+    """
+    if version is not None and version != instance.version:
+        raise Conflict
+    model = type(instance)
+    # pre_save stamps auto_now fields and stores uploaded files
+    values = {field.attname: field.pre_save(instance, False)
+              for field in model._meta.concrete_fields
+              if field.name in fields or getattr(field, 'auto_now', False)}
+    rows = model.objects.filter(pk=instance.pk)
+    if version is not None:
+        rows = rows.filter(version=version)
+    if not rows.update(version=F('version') + 1, **values):
+        raise Conflict
+    instance.version += 1
+    return instance
+
+
+def update(instance, data, version=None, force=False):
+    """
+    Assign ``data`` to ``instance`` and ``save`` the fields that changed.
+    With nothing changed the row is left alone, unless ``force`` is set
+    for a change stored elsewhere, such as the card's labels.
+    """
+    changed = []
+    for name, value in data.items():
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed.append(name)
+    if changed or force:
+        return save(instance, changed, version)
+    if version is not None and version != instance.version:
+        raise Conflict
+    return instance
+
+
+class VersionedUpdateMixin:
+    """
+    Conditional PUT and PATCH for viewsets whose serializer writes with
+    ``update``: the expected version reaches it through the serializer
+    context, and a Conflict becomes a 409 with the row from ``get_current``.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in ('PUT', 'PATCH'):
+            context['expected_version'] = expected_version(self.request)
+        return context
+
+    def get_current(self, pk):
+        """The row as it is now, None when it is gone"""
+        instance = self.get_queryset().model.objects.filter(pk=pk).first()
+        return self.get_serializer(instance).data if instance is not None else None
+
+    def handle_exception(self, exc):
+        if not isinstance(exc, Conflict):
+            return super().handle_exception(exc)
+        pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        current = self.get_current(pk) if pk is not None else None
+        if current is None:
+            return super().handle_exception(NotFound())
+        return Response({
+            'error': 'This item was changed by someone else',
+            'current': current,
+        }, status=status.HTTP_409_CONFLICT)
@@ -1,19 +1,59 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, generics, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from django.db import transaction, models
+from django.db.models import Case, F, FloatField, Prefetch, Value, When
+from django.db.models.functions import Lower
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+import datetime
+import logging
 import os
-from .models import Board, BoardMember, List, Card, Label, Comment, CommentReaction, Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate
+from .models import Board, BoardMember, List, Card, Label, Comment, CommentReaction, Checklist, ChecklistItem, Attachment, CustomField, CustomFieldValue, BoardTemplate, Job, BulkOperation, ActivityEvent
 from .serializers import (
     BoardSerializer, BoardCreateSerializer, BoardMemberSerializer,
     ListSerializer, CardSerializer, LabelSerializer, CommentSerializer, CommentReactionSerializer,
     ChecklistSerializer, ChecklistItemSerializer, AttachmentSerializer,
     CustomFieldSerializer, CustomFieldValueSerializer, BoardTemplateSerializer,
-    UserRegistrationSerializer, CardMoveSerializer
+    UserRegistrationSerializer, CardMoveSerializer, RelabelSerializer, JobSerializer,
+    ArchivedCardSerializer, ArchivedListSerializer, ActivityEventSerializer
 )
-from .permissions import IsBoardMember, IsBoardOwnerOrAdmin
+from .permissions import HasMetricsToken, IsBoardMember, IsBoardOwnerOrAdmin, is_live
+from .board_cache import BoardCacheMixin
+from .versioning import VersionedUpdateMixin
+from .pagination import ActivityPagination, ArchivePagination, CommentThreadPagination
+from .renderers import PrometheusRenderer
+from . import (activity, analytics, board_cache, bulk, checklists, counters, custom_fields, instrumentation,
+               jobs, membership, metrics, reactions, snapshots, thumbnails, versioning)
+
+
+logger = logging.getLogger(__name__)
+
+COMMENT_POLL_LIMIT = 100
+
+MAX_INVITES = 500
+# Tries of a card move that lost the race against another write to the card
+MOVE_ATTEMPTS = 3
+INVITE_ROLES = ['admin', 'member']
+
+
+def live_cards():
+    return Prefetch('cards', queryset=Card.objects.filter(archived=False))
+
+
+def relabel_ids(request, board):
+    """Ids of the board's labels to add and to remove, from a validated body"""
+    serializer = RelabelSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    labels = Label.objects.filter(board=board)
+    return (
+        labels.filter(id__in=serializer.validated_data['add_label_ids']).values_list('id', flat=True),
+        labels.filter(id__in=serializer.validated_data['remove_label_ids']).values_list('id', flat=True),
+    )
 
 
 class UserRegistrationView(APIView):
@@ -31,16 +71,22 @@ class UserRegistrationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+class BoardViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Board.objects.all()
     serializer_class = BoardSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         # Return boards where user is a member
-        return Board.objects.filter(
-            members__user=self.request.user
-        ).distinct()
+        queryset = Board.objects.filter(id__in=membership.board_ids(self.request.user))
+        if self.action != 'retrieve':
+            return queryset
+        # Only BoardSerializer renders from this, with only live lists
+        return queryset.select_related('owner').prefetch_related(
+            Prefetch('members', queryset=BoardMember.objects.select_related('user')),
+            Prefetch('lists', queryset=List.objects.filter(archived=False)),
+            'labels', 'custom_fields'
+        )
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -56,11 +102,85 @@ class BoardViewSet(viewsets.ModelViewSet):
             role='owner'
         )
 
+    def destroy(self, request, *args, **kwargs):
+        """Hide the board immediately and purge its contents in the background"""
+        board = self.get_object()
+
+        with transaction.atomic():
+            Board.objects.filter(id=board.id).update(deleted_at=timezone.now())
+            job = jobs.enqueue('boards.purge', {'board_id': board.id},
+                               priority=Job.PRIORITY_LOW, user=request.user)
+
+        return Response({
+            'message': 'Board deletion queued',
+            'job_id': job.id
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def perform_update(self, serializer):
+        if 'background_image' not in serializer.validated_data:
+            serializer.save()
+            return
+
+        board = serializer.save(background_image_hash='')
+        if board.background_image:
+            thumbnails.schedule(
+                board, 'background_image', 'background_image_hash')
+
     def get_board(self):
         if self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
             return self.get_object()
         return None
 
+    def update(self, request, *args, **kwargs):
+        """Apply the changes with BoardSerializer and answer with the snapshot"""
+        partial = kwargs.pop('partial', False)
+        board = self.get_object()
+        serializer = self.get_serializer(board, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(snapshots.boards([board.id], request)[0])
+
+    def list(self, request, *args, **kwargs):
+        board_ids = Board.objects.filter(
+            id__in=membership.board_ids(request.user)).values_list('id', flat=True)
+        page = self.paginate_queryset(board_ids)
+        if page is None:
+            return Response(snapshots.boards(list(board_ids), request))
+        return self.get_paginated_response(snapshots.boards(list(page), request))
+
+    def get_written_board_ids(self):
+        # Avoid get_object(), which prefetches the whole board
+        pk = self.kwargs.get('pk')
+        return {int(pk)} if pk and str(pk).isdigit() else set()
+
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the rendered board from the response cache when possible"""
+        pk = str(kwargs.get('pk'))
+        board_id = int(pk) if pk.isdigit() else None
+        role = membership.role(request.user, board_id)
+        revision = board_cache.revision(board_id) if role else None
+        renderer = request.accepted_renderer
+        if revision is None or renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+
+        # File URLs are absolute, so the host is part of the view mode
+        view_mode = f'{request.accepted_media_type} {request.build_absolute_uri("/")}'
+        key = board_cache.make_key(board_id, revision, view_mode, role)
+        body = board_cache.lookup(key)
+        cache_status = 'hit'
+        if body is None:
+            payloads = snapshots.boards([board_id], request)
+            if not payloads:
+                return super().retrieve(request, *args, **kwargs)
+            body = renderer.render(payloads[0], request.accepted_media_type,
+                                   self.get_renderer_context())
+            board_cache.save(key, body)
+            cache_status = 'miss'
+
+        response = HttpResponse(body, content_type=renderer.media_type)
+        response['X-Board-Cache'] = cache_status
+        return response
+
     @action(detail=True, methods=['post'])
     def add_member(self, request, pk=None):
         board = self.get_object()
@@ -88,7 +208,10 @@ class BoardViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        BoardMember.objects.create(board=board, user=user, role=role)
+        with transaction.atomic():
+            BoardMember.objects.create(board=board, user=user, role=role)
+            activity.record(ActivityEvent.MEMBER_ADDED, request.user, board.id,
+                            user.id, role=role)
         return Response({'message': 'Member added successfully'})
 
     @action(detail=True, methods=['delete'])
@@ -103,8 +226,11 @@ class BoardViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            membership = board.members.get(user_id=user_id)
-            membership.delete()
+            member = board.members.get(user_id=user_id)
+            with transaction.atomic():
+                member.delete()
+                activity.record(ActivityEvent.MEMBER_REMOVED, request.user,
+                                board.id, member.user_id)
             return Response({'message': 'Member removed successfully'})
         except BoardMember.DoesNotExist:
             return Response(
@@ -113,7 +239,7 @@ class BoardViewSet(viewsets.ModelViewSet):
             )
 
 
-class ListViewSet(viewsets.ModelViewSet):
+class ListViewSet(VersionedUpdateMixin, BoardCacheMixin, viewsets.ModelViewSet):
     queryset = List.objects.all()
     serializer_class = ListSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardMember]
@@ -122,6 +248,17 @@ class ListViewSet(viewsets.ModelViewSet):
         board_id = self.kwargs.get('board_pk')
         return List.objects.filter(board_id=board_id, archived=False)
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values_list('id', flat=True))
+        if page is None:
+            return Response(snapshots.lists(queryset, request))
+        return self.get_paginated_response(
+            snapshots.lists(queryset.filter(id__in=list(page)), request))
+
+    def get_current(self, pk):
+        return next(iter(snapshots.lists(List.objects.filter(id=pk), self.request)), None)
+
     def get_board(self):
         board_id = self.kwargs.get('board_pk')
         try:
@@ -137,10 +274,16 @@ class ListViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         # If position is being updated, we'll handle it in the serializer
         # The frontend now handles bulk position updates
-        serializer.save()
+        was_archived = serializer.instance.archived
+        with transaction.atomic():
+            list_obj = serializer.save()
+            if list_obj.archived != was_archived:
+                activity.record(
+                    ActivityEvent.LIST_ARCHIVED if list_obj.archived else ActivityEvent.LIST_RESTORED,
+                    self.request.user, list_obj.board_id, list_obj.id)
 
 
-class ReorderListsView(APIView):
+class ReorderListsView(BoardCacheMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, board_pk):
@@ -149,10 +292,7 @@ class ReorderListsView(APIView):
             board = Board.objects.get(id=board_pk)
 
             # Check if user has permission to access this board
-            if not BoardMember.objects.filter(
-                board=board,
-                user=request.user
-            ).exists():
+            if not membership.is_member(request.user, board.id):
                 return Response(
                     {'error': 'You do not have permission to access this board'},
                     status=status.HTTP_403_FORBIDDEN
@@ -167,14 +307,23 @@ class ReorderListsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Update positions for all lists
-            for order_data in list_orders:
-                list_id = order_data.get('id')
-                position = order_data.get('position')
-
-                if list_id and position is not None:
-                    List.objects.filter(id=list_id, board=board).update(
-                        position=position)
+            # Update positions for all lists with one CASE UPDATE
+            try:
+                positions = [(order_data['id'], float(order_data['position']))
+                             for order_data in list_orders
+                             if order_data.get('id') and order_data.get('position') is not None]
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'position must be a number'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if positions:
+                List.objects.filter(id__in=[pk for pk, _ in positions], board=board).update(
+                    position=Case(
+                        *[When(id=pk, then=Value(position)) for pk, position in positions],
+                        output_field=FloatField()
+                    ),
+                    version=F('version') + 1)
 
             return Response({
                 'message': 'Lists reordered successfully'
@@ -187,42 +336,298 @@ class ReorderListsView(APIView):
             )
 
 
-class ArchiveAllCardsView(APIView):
+class ListBulkActionView(BoardCacheMixin, APIView):
+    """Base view for bulk actions on the live cards of one list"""
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, list_pk):
+        try:
+            list_obj = List.objects.select_related('board').get(id=list_pk)
+        except List.DoesNotExist:
+            return Response(
+                {'error': 'List not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Check if user has permission to access this list's board
+        if list_obj.board.deleted_at is not None or not membership.is_member(
+                request.user, list_obj.board_id):
+            return Response(
+                {'error': 'You do not have permission to access this board'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        cards = Card.objects.filter(list=list_obj, archived=False)
+        return self.perform(request, list_obj, cards)
+
+    def get_written_board_ids(self):
+        return set(List.objects.filter(id=self.kwargs.get('list_pk')).values_list(
+            'board_id', flat=True))
+
+    def perform(self, request, list_obj, cards):
+        raise NotImplementedError
+
+    def bulk_response(self, operation, message):
+        return Response({
+            'message': message,
+            'affected': operation.affected,
+            'undo_token': operation.token
+        })
+
+
+class ArchiveAllCardsView(ListBulkActionView):
+    def perform(self, request, list_obj, cards):
         """Archive all cards in a specific list"""
+        operation = bulk.archive(cards, list_obj.board, request.user)
+        return self.bulk_response(
+            operation,
+            f'Archived {operation.affected} cards from list "{list_obj.title}"'
+        )
+
+
+class MoveAllCardsView(ListBulkActionView):
+    def perform(self, request, list_obj, cards):
+        """Move all cards of a list to the end of another list on the board"""
         try:
-            list_obj = List.objects.get(id=list_pk)
+            target = List.objects.get(
+                id=request.data.get('target_list_id'), board=list_obj.board)
+        except (List.DoesNotExist, ValueError, TypeError):
+            return Response(
+                {'error': 'Target list not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-            # Check if user has permission to access this list's board
-            if not BoardMember.objects.filter(
-                board=list_obj.board,
-                user=request.user
-            ).exists():
-                return Response(
-                    {'error': 'You do not have permission to access this board'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        operation = bulk.move(cards, target, list_obj.board, request.user)
+        return self.bulk_response(
+            operation,
+            f'Moved {operation.affected} cards to list "{target.title}"'
+        )
 
-            # Get all cards in this list that are not already archived
-            cards = Card.objects.filter(list=list_obj, archived=False)
 
-            # Archive all cards
-            cards.update(archived=True)
+class SortCardsView(ListBulkActionView):
+    def perform(self, request, list_obj, cards):
+        """Persist a sorted order for all cards in a list"""
+        sort_by = request.data.get('sort_by')
+        if sort_by not in bulk.SORT_ORDERS:
+            return Response(
+                {'error': f'sort_by must be one of: {", ".join(bulk.SORT_ORDERS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            return Response({
-                'message': f'Archived {cards.count()} cards from list "{list_obj.title}"'
-            })
+        operation = bulk.sort(cards, sort_by, list_obj.board, request.user)
+        return self.bulk_response(
+            operation, f'Sorted cards in list "{list_obj.title}"')
 
-        except List.DoesNotExist:
+
+class RelabelCardsView(ListBulkActionView):
+    def perform(self, request, list_obj, cards):
+        """Add and remove labels on all cards in a list"""
+        add_ids, remove_ids = relabel_ids(request, list_obj.board)
+
+        operation = bulk.relabel(cards, list_obj.board, request.user,
+                                 add_label_ids=add_ids, remove_label_ids=remove_ids)
+        return self.bulk_response(
+            operation, f'Updated labels on {operation.affected} cards')
+
+
+class UndoBulkOperationView(BoardCacheMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, token):
+        """Revert a bulk card operation using its undo token"""
+        operation = BulkOperation.objects.filter(
+            token=token, board_id__in=membership.board_ids(request.user)
+        ).select_related('board').first()
+        if operation is None:
             return Response(
-                {'error': 'List not found'},
+                {'error': 'Undo token not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        self.written_board_ids.add(operation.board_id)
+        try:
+            restored = bulk.undo(operation, request.user)
+        except bulk.UndoError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'message': f'Undid {operation.get_action_display().lower()} of {restored} cards',
+            'affected': restored
+        })
+
+
+class BoardArchiveView(generics.ListAPIView):
+    """Browse a board's archived cards (default) or lists (?type=lists)"""
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+    pagination_class = ArchivePagination
+
+    def get_board(self):
+        board_id = self.kwargs.get('board_pk')
+        try:
+            return Board.objects.get(id=board_id)
+        except Board.DoesNotExist:
+            return None
+
+    def browsing_lists(self):
+        return self.request.query_params.get('type') == 'lists'
+
+    def get_serializer_class(self):
+        if self.browsing_lists():
+            return ArchivedListSerializer
+        return ArchivedCardSerializer
+
+    def get_queryset(self):
+        board_id = self.kwargs.get('board_pk')
+        if self.browsing_lists():
+            return List.objects.filter(board_id=board_id, archived=True)
+        return Card.objects.filter(
+            list__board_id=board_id, archived=True).select_related('list')
+
+
+class RestoreArchivedView(BoardCacheMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+
+    def get_board(self):
+        board_id = self.kwargs.get('board_pk')
+        try:
+            return Board.objects.get(id=board_id)
+        except Board.DoesNotExist:
+            return None
+
+    def post(self, request, board_pk):
+        """Restore archived cards and lists of a board in one transaction"""
+        card_ids = request.data.get('card_ids', [])
+        list_ids = request.data.get('list_ids', [])
+
+        if not card_ids and not list_ids:
+            return Response(
+                {'error': 'card_ids or list_ids is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            cards = Card.objects.filter(
+                id__in=card_ids, list__board_id=board_pk, archived=True)
+            card_rows = list(cards.values_list('id', 'list_id'))
+            # Restored cards need their list back on the board as well
+            lists = List.objects.filter(
+                id__in=set(list_ids) | {list_id for _, list_id in card_rows},
+                board_id=board_pk, archived=True)
+            restored_list_ids = list(lists.values_list('id', flat=True))
+
+            restored_lists = lists.update(archived=False, archived_at=None,
+                                          version=F('version') + 1)
+            restored_cards = cards.update(archived=False, archived_at=None,
+                                          version=F('version') + 1)
+            activity.record_many(
+                [activity.event(ActivityEvent.LIST_RESTORED, request.user, int(board_pk), pk)
+                 for pk in restored_list_ids]
+                + activity.card_events(ActivityEvent.CARD_RESTORED, request.user,
+                                       int(board_pk), [pk for pk, _ in card_rows]))
+
+        return Response({
+            'restored_cards': restored_cards,
+            'restored_lists': restored_lists
+        })
+
+
+class BoardActivityView(generics.ListAPIView):
+    """Activity of a board, newest first"""
+    serializer_class = ActivityEventSerializer
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+    pagination_class = ActivityPagination
+
+    def get_board(self):
+        return Board.objects.filter(id=self.kwargs.get('board_pk')).first()
+
+    def get_queryset(self):
+        return ActivityEvent.objects.filter(
+            board_id=self.kwargs.get('board_pk')).select_related('actor')
+
+
+class CardActivityView(BoardActivityView):
+    """
+    Activity of a card, newest first. Events from boards the card was on
+    earlier are only included when the requester belongs to them as well.
+    """
+
+    def get_board(self):
+        card = Card.objects.select_related('list__board').filter(
+            id=self.kwargs.get('card_pk')).first()
+        return card.list.board if card else None
+
+    def get_queryset(self):
+        return ActivityEvent.objects.filter(
+            card_id=self.kwargs.get('card_pk'),
+            board_id__in=membership.board_ids(self.request.user)).select_related('actor')
+
+
+class BoardAnalyticsView(APIView):
+    """Base for the flow reports, which read only the daily rollups"""
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+
+    def get_board(self):
+        return Board.objects.filter(id=self.kwargs.get('board_pk')).first()
+
+    def get_range(self):
+        """``from`` and ``to`` dates, the last ``DEFAULT_DAYS`` days by default"""
+        params = self.request.query_params
+        try:
+            end = (datetime.date.fromisoformat(params['to']) if 'to' in params
+                   else timezone.localdate())
+            start = (datetime.date.fromisoformat(params['from']) if 'from' in params
+                     else end - datetime.timedelta(
+                         days=analytics.ANALYTICS_SETTINGS['DEFAULT_DAYS'] - 1))
+        except ValueError:
+            raise ValidationError({'error': 'from and to must be dates (YYYY-MM-DD)'})
+        if start > end:
+            raise ValidationError({'error': 'from must not be after to'})
+        if (end - start).days >= analytics.ANALYTICS_SETTINGS['MAX_DAYS']:
+            raise ValidationError({
+                'error': f"Reports cover at most {analytics.ANALYTICS_SETTINGS['MAX_DAYS']} days"
+            })
+        return start, end
+
+    def get_list_id(self):
+        """The ``list`` parameter, or the last live list where cards end up"""
+        lists = List.objects.filter(board_id=self.kwargs.get('board_pk'))
+        list_id = self.request.query_params.get('list')
+        if list_id is None:
+            list_id = lists.filter(archived=False).order_by(
+                '-position', '-created_at').values_list('id', flat=True).first()
+            if list_id is None:
+                raise ValidationError({'error': 'The board has no lists'})
+            return list_id
+        if not list_id.isdigit() or not lists.filter(id=list_id).exists():
+            raise ValidationError({'error': 'list must be a list of this board'})
+        return int(list_id)
+
+
+class CumulativeFlowView(BoardAnalyticsView):
+    def get(self, request, board_pk):
+        """Cards in each live list at the end of every day"""
+        start, end = self.get_range()
+        return Response(analytics.cumulative_flow(int(board_pk), start, end))
 
-class CardViewSet(viewsets.ModelViewSet):
+
+class CycleTimeView(BoardAnalyticsView):
+    def get(self, request, board_pk):
+        """Cycle time percentiles of the cards completed in a list"""
+        start, end = self.get_range()
+        return Response(analytics.cycle_time(self.get_list_id(), start, end))
+
+
+class ThroughputView(BoardAnalyticsView):
+    def get(self, request, board_pk):
+        """Cards completed in a list per day"""
+        start, end = self.get_range()
+        return Response(analytics.throughput(self.get_list_id(), start, end))
+
+
+class CardViewSet(VersionedUpdateMixin, BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Card.objects.all()
     serializer_class = CardSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -232,12 +637,50 @@ class CardViewSet(viewsets.ModelViewSet):
         board_id = self.kwargs.get('board_pk')
 
         if list_id:
-            return Card.objects.filter(list_id=list_id, archived=False)
+            queryset = Card.objects.filter(list_id=list_id, archived=False)
         elif board_id:
-            return Card.objects.filter(list__board_id=board_id, archived=False)
-        return Card.objects.filter(archived=False)
+            queryset = Card.objects.filter(list__board_id=board_id, archived=False)
+        else:
+            return Card.objects.filter(archived=False)
+
+        params = self.request.query_params
+        if self.action == 'list' and custom_fields.has_params(params):
+            if list_id:
+                board_id = List.objects.filter(id=list_id).values_list(
+                    'board_id', flat=True).first()
+            try:
+                queryset = custom_fields.filter_cards(queryset, board_id, params)
+            except ValueError as e:
+                raise ValidationError({'error': str(e)})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values_list('id', flat=True))
+        if page is None:
+            return Response(snapshots.cards(queryset, request))
+        return self.get_paginated_response(snapshots.cards_by_id(list(page), request))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(snapshots.cards_by_id([self.get_object().id], request)[0])
+
+    def get_current(self, pk):
+        return next(iter(snapshots.cards_by_id([int(pk)], self.request)), None)
+
+    def update(self, request, *args, **kwargs):
+        """Apply the changes with CardSerializer and answer with the snapshot"""
+        partial = kwargs.pop('partial', False)
+        card = self.get_object()
+        serializer = self.get_serializer(card, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(snapshots.cards_by_id([card.id], request)[0])
 
     def get_board(self):
+        board_id = self.kwargs.get('board_pk')
+        if board_id:
+            return Board.objects.filter(id=board_id).first()
+
         list_id = self.kwargs.get('list_pk')
         if list_id:
             try:
@@ -260,7 +703,49 @@ class CardViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         list_id = self.kwargs.get('list_pk')
         list_obj = List.objects.get(id=list_id)
-        serializer.save(list=list_obj, created_by=self.request.user)
+        with transaction.atomic():
+            card = serializer.save(list=list_obj, created_by=self.request.user)
+            analytics.record(card.id, None, list_obj.id)
+
+        if card.cover_image:
+            thumbnails.schedule(card, 'cover_image', 'cover_image_hash')
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            analytics.record(instance.id, instance.list_id, None)
+            instance.delete()
+
+    def perform_update(self, serializer):
+        card = serializer.instance
+        was_archived = card.archived
+        labels_changed = 'label_ids' in serializer.validated_data
+        with transaction.atomic():
+            labels_before = set(card.labels.values_list('id', flat=True)) if labels_changed else None
+            if 'cover_image' not in serializer.validated_data:
+                serializer.save()
+            else:
+                serializer.save(cover_image_hash='')
+            self.record_update(card, was_archived, labels_before)
+
+        if 'cover_image' in serializer.validated_data and card.cover_image:
+            thumbnails.schedule(card, 'cover_image', 'cover_image_hash')
+
+    def record_update(self, card, was_archived, labels_before):
+        """Log archiving and label changes made through PATCH"""
+        events = []
+        if card.archived != was_archived:
+            events.append(activity.event(
+                ActivityEvent.CARD_ARCHIVED if card.archived else ActivityEvent.CARD_RESTORED,
+                self.request.user, card.list.board_id, card.id, card.id))
+        if labels_before is not None:
+            labels_after = set(card.labels.values_list('id', flat=True))
+            if labels_after != labels_before:
+                events.append(activity.event(
+                    ActivityEvent.CARD_LABELS_CHANGED, self.request.user,
+                    card.list.board_id, card.id, card.id,
+                    added=sorted(labels_after - labels_before),
+                    removed=sorted(labels_before - labels_after)))
+        activity.record_many(events)
 
     @action(detail=False, methods=['post'])
     def move(self, request):
@@ -271,33 +756,54 @@ class CardViewSet(viewsets.ModelViewSet):
             position = serializer.validated_data['position']
 
             try:
-                with transaction.atomic():
-                    card = Card.objects.get(id=card_id)
-                    new_list = List.objects.get(id=list_id)
+                new_list = List.objects.get(id=list_id)
+                # The card is read outside the transaction so that it starts
+                # with the UPDATE: SQLite answers "database is locked" when a
+                # transaction that has read tries to write while another
+                # connection writes. The UPDATE is conditional on the version
+                # read and retried when another write got in between.
+                for attempt in range(MOVE_ATTEMPTS):
+                    card = Card.objects.select_related('list').get(id=card_id)
 
                     # Check if user has permission to access both boards
-                    if not (card.list.board.members.filter(user=request.user).exists() and
-                            new_list.board.members.filter(user=request.user).exists()):
+                    if not (membership.is_member(request.user, card.list.board_id) and
+                            membership.is_member(request.user, new_list.board_id)):
                         return Response(
                             {'error': 'Permission denied'},
                             status=status.HTTP_403_FORBIDDEN
                         )
 
+                    self.written_board_ids.update(
+                        [card.list.board_id, new_list.board_id])
+                    from_list_id = card.list_id
                     card.list = new_list
                     card.position = position
-                    card.save()
-
+                    try:
+                        with transaction.atomic():
+                            versioning.save(card, ['list', 'position'], card.version)
+                            if from_list_id != new_list.id:
+                                analytics.record(card.id, from_list_id, new_list.id)
+                                activity.record(ActivityEvent.CARD_MOVED, request.user,
+                                                new_list.board_id, card.id, card.id,
+                                                from_list=from_list_id, to_list=new_list.id)
+                    except versioning.Conflict:
+                        continue
+                    metrics.inc('kanban_cards_moved_total', labels=('move',))
                     return Response({'message': 'Card moved successfully'})
             except (Card.DoesNotExist, List.DoesNotExist):
                 return Response(
                     {'error': 'Card or List not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            return Response(
+                {'error': 'The card keeps changing, try again'},
+                status=status.HTTP_409_CONFLICT
+            )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class LabelViewSet(viewsets.ModelViewSet):
+class LabelViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Label.objects.all()
     serializer_class = LabelSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardMember]
@@ -318,15 +824,58 @@ class LabelViewSet(viewsets.ModelViewSet):
         board = Board.objects.get(id=board_id)
         serializer.save(board=board)
 
+    def usage(self, request, board_pk=None):
+        """Count the live cards carrying each label of the board"""
+        labels = self.get_queryset().annotate(card_count=models.Count(
+            'cards', filter=models.Q(cards__archived=False)))
+        return Response([
+            dict(LabelSerializer(label).data, card_count=label.card_count)
+            for label in labels
+        ])
+
+
+class RelabelSelectedCardsView(BoardCacheMixin, APIView):
+    """Add and remove labels on a selection of cards of one board"""
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+
+    def get_board(self):
+        return Board.objects.filter(id=self.kwargs.get('board_pk')).first()
+
+    def post(self, request, board_pk):
+        card_ids = request.data.get('card_ids')
+        if not checklists.is_id_list(card_ids):
+            return Response(
+                {'error': 'card_ids must be a list of ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(card_ids) > bulk.BULK_MAX_SELECTION:
+            return Response(
+                {'error': f'At most {bulk.BULK_MAX_SELECTION} cards per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        board = self.get_board()
+        add_ids, remove_ids = relabel_ids(request, board)
+
+        cards = Card.objects.filter(id__in=card_ids, list__board=board)
+        operation = bulk.relabel(cards, board, request.user,
+                                 add_label_ids=add_ids, remove_label_ids=remove_ids)
+        return Response({
+            'message': f'Updated labels on {operation.affected} cards',
+            'affected': operation.affected,
+            'undo_token': operation.token
+        })
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+    pagination_class = CommentThreadPagination
 
     def get_queryset(self):
         card_id = self.kwargs.get('card_pk')
-        return Comment.objects.filter(card_id=card_id)
+        return Comment.objects.filter(card_id=card_id).select_related('author')
 
     def get_board(self):
         card_id = self.kwargs.get('card_pk')
@@ -338,11 +887,48 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         card_id = self.kwargs.get('card_pk')
-        card = Card.objects.get(id=card_id)
-        serializer.save(card=card, author=self.request.user)
+        card = Card.objects.select_related('list').get(id=card_id)
+        with transaction.atomic():
+            comment = serializer.save(card=card, author=self.request.user)
+            Card.objects.filter(id=card.id).update(
+                comment_count=F('comment_count') + 1)
+            activity.record(ActivityEvent.COMMENT_ADDED, self.request.user,
+                            card.list.board_id, comment.id, card.id)
+
+    def perform_destroy(self, instance):
+        comment_id = instance.id
+        board_id = Card.objects.filter(id=instance.card_id).values_list(
+            'list__board_id', flat=True).first()
+        with transaction.atomic():
+            instance.delete()
+            Card.objects.filter(id=instance.card_id).update(
+                comment_count=F('comment_count') - 1)
+            activity.record(ActivityEvent.COMMENT_DELETED, self.request.user,
+                            board_id, comment_id, instance.card_id)
+
+    def poll(self, request, card_pk=None):
+        """
+        Comments newer than ?after=<comment id>, answered right away; clients
+        repeat the request on an interval instead of holding a worker
+        """
+        try:
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            return Response(
+                {'error': 'after must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        comments = list(self.get_queryset().filter(id__gt=after).order_by(
+            'id')[:COMMENT_POLL_LIMIT])
 
+        return Response({
+            'results': self.get_serializer(comments, many=True).data,
+            'last_id': comments[-1].id if comments else after
+        })
 
-class ChecklistViewSet(viewsets.ModelViewSet):
+
+class ChecklistViewSet(VersionedUpdateMixin, BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Checklist.objects.all()
     serializer_class = ChecklistSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -364,31 +950,151 @@ class ChecklistViewSet(viewsets.ModelViewSet):
         card = Card.objects.get(id=card_id)
         serializer.save(card=card)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Card.objects.filter(id=instance.card_id).update(
+                checklist_item_count=F('checklist_item_count') - instance.item_count,
+                checklist_completed_count=F(
+                    'checklist_completed_count') - instance.completed_count
+            )
+
 
-class ChecklistItemViewSet(viewsets.ModelViewSet):
+class ChecklistItemViewSet(VersionedUpdateMixin, BoardCacheMixin, viewsets.ModelViewSet):
     queryset = ChecklistItem.objects.all()
     serializer_class = ChecklistItemSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
 
     def get_queryset(self):
         checklist_id = self.kwargs.get('checklist_pk')
         return ChecklistItem.objects.filter(checklist_id=checklist_id)
 
+    def get_checklist(self):
+        """Load the checklist with its board once per request"""
+        if not hasattr(self, '_checklist'):
+            self._checklist = Checklist.objects.select_related(
+                'card__list__board').filter(
+                id=self.kwargs.get('checklist_pk')).first()
+        return self._checklist
+
     def get_board(self):
-        checklist_id = self.kwargs.get('checklist_pk')
-        try:
-            checklist = Checklist.objects.get(id=checklist_id)
-            return checklist.card.list.board
-        except Checklist.DoesNotExist:
-            return None
+        checklist = self.get_checklist()
+        return checklist.card.list.board if checklist else None
 
     def perform_create(self, serializer):
-        checklist_id = self.kwargs.get('checklist_pk')
-        checklist = Checklist.objects.get(id=checklist_id)
-        serializer.save(checklist=checklist)
+        checklist = self.get_checklist()
+        with transaction.atomic():
+            item = serializer.save(checklist=checklist)
+            counters.adjust_checklist(
+                checklist.id, checklist.card_id,
+                items=1, completed=1 if item.completed else 0)
+
+    def perform_update(self, serializer):
+        item = serializer.instance
+        completed = serializer.validated_data.get('completed')
+        with transaction.atomic():
+            # Flip the flag with a conditional UPDATE so two concurrent
+            # toggles cannot both count the same change
+            changed = 0
+            if completed is not None:
+                changed = ChecklistItem.objects.filter(id=item.id).exclude(
+                    completed=completed).update(completed=completed)
+            serializer.save()
+            checklist = self.get_checklist()
+            counters.adjust_checklist(
+                item.checklist_id, checklist.card_id,
+                completed=changed if completed else -changed)
+            if changed:
+                activity.record(ActivityEvent.CHECKLIST_ITEM_TOGGLED, self.request.user,
+                                checklist.card.list.board_id, item.id, checklist.card_id,
+                                checklist=checklist.id, completed=completed)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted, _ = ChecklistItem.objects.filter(id=instance.id).delete()
+            counters.adjust_checklist(
+                instance.checklist_id, instance.checklist.card_id,
+                items=-deleted,
+                completed=-deleted if instance.completed else 0)
+
+    def complete_all(self, request, checklist_pk=None):
+        """Check or uncheck every item of the checklist at once"""
+        completed = request.data.get('completed', True)
+        if not isinstance(completed, bool):
+            return Response(
+                {'error': 'completed must be true or false'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        checklist = self.get_checklist()
+        with transaction.atomic():
+            changed = counters.set_all_completed(checklist, completed)
+            if changed:
+                activity.record(ActivityEvent.CHECKLIST_COMPLETED_ALL, request.user,
+                                checklist.card.list.board_id, checklist.id, checklist.card_id,
+                                completed=completed, items=changed)
+        checklist.refresh_from_db()
+        return Response({
+            'message': f'{changed} items updated',
+            'checklist': ChecklistSerializer(checklist).data
+        })
+
+    def create_many(self, request, checklist_pk=None):
+        """Create items from a list or from newline separated text"""
+        items, error = checklists.parse_items(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = checklists.create_items(self.get_checklist(), items)
+        return Response(
+            self.get_serializer(created, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    def reorder(self, request, checklist_pk=None):
+        """Set item positions from the order of item_ids"""
+        item_ids = request.data.get('item_ids')
+        if not checklists.is_id_list(item_ids):
+            return Response(
+                {'error': 'item_ids must be a list of ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(item_ids) > checklists.MAX_BATCH_ITEMS:
+            return Response(
+                {'error': f'At most {checklists.MAX_BATCH_ITEMS} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        updated = checklists.reorder(self.get_checklist(), item_ids)
+        return Response({'message': f'{updated} items reordered'})
 
-class AttachmentViewSet(viewsets.ModelViewSet):
+    def move(self, request, checklist_pk=None):
+        """Move items to the end of another checklist"""
+        item_ids = request.data.get('item_ids')
+        target_id = request.data.get('target_checklist_id')
+        if not checklists.is_id_list(item_ids) or not target_id:
+            return Response(
+                {'error': 'item_ids and target_checklist_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        checklist = self.get_checklist()
+        target = Checklist.objects.select_related('card__list__board').filter(
+            id=target_id).first()
+        target_board = target.card.list.board if target else None
+        if (target is None or target.id == checklist.id or not is_live(target_board)
+                or not membership.is_member(request.user, target_board.id)):
+            return Response(
+                {'error': 'Target checklist not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        self.written_board_ids.add(target_board.id)
+        moved = checklists.move_items(checklist, item_ids, target)
+        return Response({'message': f'{moved} items moved'})
+
+
+class AttachmentViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = Attachment.objects.all()
     serializer_class = AttachmentSerializer
     # Temporarily changed for debugging
@@ -396,7 +1102,7 @@ class AttachmentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         card_id = self.kwargs.get('card_pk')
-        return Attachment.objects.filter(card_id=card_id)
+        return Attachment.objects.filter(card_id=card_id).select_related('uploaded_by')
 
     def get_board(self):
         card_id = self.kwargs.get('card_pk')
@@ -406,31 +1112,11 @@ class AttachmentViewSet(viewsets.ModelViewSet):
         except Card.DoesNotExist:
             return None
 
-    def create(self, request, *args, **kwargs):
-        print(f"DEBUG: AttachmentViewSet.create called")
-        print(f"DEBUG: Request data: {request.data}")
-        print(f"DEBUG: Request FILES: {request.FILES}")
-        print(f"DEBUG: Card ID: {kwargs.get('card_pk')}")
-
-        try:
-            response = super().create(request, *args, **kwargs)
-            print(f"DEBUG: Create successful: {response.status_code}")
-            return response
-        except Exception as e:
-            print(f"DEBUG: Create failed with error: {e}")
-            print(f"DEBUG: Error type: {type(e)}")
-            raise
-
     def perform_create(self, serializer):
         card_id = self.kwargs.get('card_pk')
         card = Card.objects.get(id=card_id)
         file = self.request.FILES.get('file')
 
-        print(f"DEBUG: Creating attachment for card {card_id}")
-        print(f"DEBUG: File: {file}")
-        print(f"DEBUG: User: {self.request.user}")
-        print(f"DEBUG: Data: {serializer.validated_data}")
-
         if file:
             # Truncate filename if too long (Django FileField has 100 char limit)
             original_name = file.name
@@ -438,34 +1124,43 @@ class AttachmentViewSet(viewsets.ModelViewSet):
                 name, ext = os.path.splitext(original_name)
                 truncated_name = name[:95] + ext  # Keep extension
                 file.name = truncated_name
-                print(
-                    f"DEBUG: Filename truncated from '{original_name}' to '{truncated_name}'")
+                logger.debug('Attachment filename truncated from %r to %r',
+                             original_name, truncated_name)
 
-            print(
-                f"DEBUG: File details - name: {file.name}, size: {file.size}, content_type: {file.content_type}")
-            serializer.save(
+            attachment = serializer.save(
                 card=card,
                 uploaded_by=self.request.user,
                 name=file.name,
                 size=file.size,
                 content_type=file.content_type
             )
-            print(f"DEBUG: Attachment created successfully")
+            if thumbnails.is_image(attachment.content_type):
+                thumbnails.schedule(attachment, 'file', 'file_hash')
+            metrics.inc('kanban_attachments_uploaded_total')
+            metrics.inc('kanban_attachments_uploaded_bytes_total', file.size)
+            logger.debug('Attachment %s (%s, %s bytes) added to card %s',
+                         attachment.id, file.content_type, file.size, card_id)
         else:
-            print(f"DEBUG: No file provided")
             from rest_framework import serializers
             raise serializers.ValidationError(
                 {'file': 'Arquivo é obrigatório'})
 
+    def perform_destroy(self, instance):
+        file_name = instance.file.name
+        instance.delete()
+        # Remove the stored file once the row is gone
+        jobs.enqueue('storage.delete', {'names': [file_name]},
+                     priority=Job.PRIORITY_LOW, user=self.request.user)
+
 
-class BoardMemberViewSet(viewsets.ModelViewSet):
+class BoardMemberViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = BoardMember.objects.all()
     serializer_class = BoardMemberSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardOwnerOrAdmin]
 
     def get_queryset(self):
         board_id = self.kwargs.get('board_pk')
-        return BoardMember.objects.filter(board_id=board_id)
+        return BoardMember.objects.filter(board_id=board_id).select_related('user')
 
     def get_board(self):
         board_id = self.kwargs.get('board_pk')
@@ -480,56 +1175,186 @@ class BoardMemberViewSet(viewsets.ModelViewSet):
 
         # Get user by username
         username = serializer.validated_data.pop('username', None)
-        print(
-            f"DEBUG: Creating member with username={username}, data={serializer.validated_data}")
 
         if username:
             from django.contrib.auth.models import User
             try:
                 user = User.objects.get(username=username)
-                print(f"DEBUG: User found: {user.username}")
-                serializer.save(board=board, user=user)
-                print(f"DEBUG: Member created successfully")
+                with transaction.atomic():
+                    member = serializer.save(board=board, user=user)
+                    self.record_added(board, [member.user], member.role)
             except User.DoesNotExist:
-                print(f"DEBUG: User not found: {username}")
+                logger.debug('Member not added to board %s: no user %r',
+                             board_id, username)
                 from rest_framework import serializers
                 raise serializers.ValidationError(
                     {'username': 'Usuário não encontrado'})
         else:
-            print(f"DEBUG: No username provided")
-            serializer.save(board=board)
+            with transaction.atomic():
+                member = serializer.save(board=board)
+                self.record_added(board, [member.user], member.role)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            activity.record(ActivityEvent.MEMBER_REMOVED, self.request.user,
+                            instance.board_id, instance.user_id)
+
+    def record_added(self, board, users, role):
+        activity.record_many([
+            activity.event(ActivityEvent.MEMBER_ADDED, self.request.user, board.id,
+                           user.id, role=role)
+            for user in users
+        ])
+
+    def add_users(self, board, users, role):
+        """Insert memberships for ``users``, returning the ones already in"""
+        existing = set(BoardMember.objects.filter(
+            board=board, user__in=users).values_list('user_id', flat=True))
+        added = [user for user in users if user.id not in existing]
+        with transaction.atomic():
+            BoardMember.objects.bulk_create(
+                [BoardMember(board=board, user=user, role=role) for user in added],
+                ignore_conflicts=True
+            )
+            self.record_added(board, added, role)
+            # bulk_create sends no signals, so drop the cached memberships here
+            user_ids = [user.id for user in added]
+            transaction.on_commit(lambda: membership.invalidate(user_ids))
+        return added, [user for user in users if user.id in existing]
+
+    def invite(self, request, board_pk=None):
+        """Add many users at once by username or email"""
+        identifiers = request.data.get('identifiers', request.data.get('usernames'))
+        role = request.data.get('role', 'member')
+        if not isinstance(identifiers, list) or not identifiers:
+            return Response(
+                {'error': 'identifiers must be a list of usernames or emails'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(identifiers) > MAX_INVITES:
+            return Response(
+                {'error': f'At most {MAX_INVITES} users per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if role not in INVITE_ROLES:
+            return Response(
+                {'error': f'role must be one of: {", ".join(INVITE_ROLES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        identifiers = list(dict.fromkeys(
+            str(value).strip() for value in identifiers if str(value).strip()))
+        emails = [value.lower() for value in identifiers if '@' in value]
+        users = User.objects.annotate(email_lower=Lower('email')).filter(
+            models.Q(username__in=identifiers) | models.Q(email_lower__in=emails))
+
+        found, matched = {}, set()
+        for user in users:
+            found[user.id] = user
+            matched.update({user.username, user.email.lower()})
+        unknown = [value for value in identifiers
+                   if value not in matched and value.lower() not in matched]
+
+        added, already = self.add_users(self.get_board(), list(found.values()), role)
+        return Response({
+            'message': f'{len(added)} members added',
+            'added': [user.username for user in added],
+            'already_members': [user.username for user in already],
+            'unknown': unknown
+        })
+
+    def copy_from(self, request, board_pk=None):
+        """Add the members of another board the caller belongs to"""
+        source_id = request.data.get('source_board_id')
+        source = Board.objects.filter(id=source_id).first() if str(source_id).isdigit() else None
+        if source is None or not membership.is_member(request.user, source.id):
+            return Response(
+                {'error': 'Source board not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        board = self.get_board()
+        added, already = [], []
+        source_members = BoardMember.objects.filter(
+            board=source).select_related('user')
+        # The target keeps its own owner; source owners join as admins
+        for role in INVITE_ROLES:
+            users = [member.user for member in source_members
+                     if (member.role if member.role != 'owner' else 'admin') == role]
+            if users:
+                role_added, role_already = self.add_users(board, users, role)
+                added += role_added
+                already += role_already
+
+        return Response({
+            'message': f'{len(added)} members added',
+            'added': [user.username for user in added],
+            'already_members': [user.username for user in already]
+        })
 
 
 class CommentReactionViewSet(viewsets.ModelViewSet):
     queryset = CommentReaction.objects.all()
     serializer_class = CommentReactionSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
 
     def get_queryset(self):
+        # Full reactor list, only loaded on demand
         comment_id = self.kwargs.get('comment_pk')
-        return CommentReaction.objects.filter(comment_id=comment_id)
+        return CommentReaction.objects.filter(
+            comment_id=comment_id).select_related('user')
 
-    def perform_create(self, serializer):
+    def get_board(self):
         comment_id = self.kwargs.get('comment_pk')
-        comment = Comment.objects.get(id=comment_id)
-        emoji = serializer.validated_data.get('emoji')
-
-        # Check if user already reacted with this emoji
-        existing_reaction = CommentReaction.objects.filter(
-            comment=comment, user=self.request.user, emoji=emoji
-        ).first()
-
-        if existing_reaction:
-            # Remove existing reaction
-            existing_reaction.delete()
-            return Response({'message': 'Reaction removed'}, status=status.HTTP_200_OK)
-        else:
-            # Add new reaction
-            serializer.save(comment=comment, user=self.request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        try:
+            comment = Comment.objects.select_related(
+                'card__list__board').get(id=comment_id)
+            return comment.card.list.board
+        except Comment.DoesNotExist:
+            return None
 
+    def reaction_response(self, emoji, reacted, status_code):
+        comment_id = self.kwargs.get('comment_pk')
+        return Response({
+            'emoji': emoji,
+            'reacted': reacted,
+            'reaction_summary': reactions.summarize(
+                [comment_id], self.request.user)[comment_id]
+        }, status=status_code)
+
+    def create(self, request, *args, **kwargs):
+        """Toggle the user's reaction with one DELETE or one INSERT"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        emoji = serializer.validated_data['emoji']
+        comment_id = self.kwargs.get('comment_pk')
+
+        with transaction.atomic():
+            removed, _ = CommentReaction.objects.filter(
+                comment_id=comment_id, user=request.user, emoji=emoji
+            ).delete()
+            if removed:
+                return self.reaction_response(emoji, False, status.HTTP_200_OK)
+
+            # A concurrent toggle may have inserted the same row already
+            CommentReaction.objects.bulk_create([CommentReaction(
+                comment_id=comment_id, user=request.user, emoji=emoji
+            )], ignore_conflicts=True)
+
+        return self.reaction_response(emoji, True, status.HTTP_201_CREATED)
+
+    def remove(self, request, *args, **kwargs):
+        """Remove the user's reaction with the given emoji, if any"""
+        emoji = request.data.get('emoji')
+        comment_id = self.kwargs.get('comment_pk')
+        CommentReaction.objects.filter(
+            comment_id=comment_id, user=request.user, emoji=emoji
+        ).delete()
+        return self.reaction_response(emoji, False, status.HTTP_200_OK)
 
-class CustomFieldViewSet(viewsets.ModelViewSet):
+
+class CustomFieldViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = CustomField.objects.all()
     serializer_class = CustomFieldSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardMember]
@@ -544,20 +1369,118 @@ class CustomFieldViewSet(viewsets.ModelViewSet):
         serializer.save(board=board)
 
 
-class CustomFieldValueViewSet(viewsets.ModelViewSet):
+class CustomFieldValueViewSet(BoardCacheMixin, viewsets.ModelViewSet):
     queryset = CustomFieldValue.objects.all()
     serializer_class = CustomFieldValueSerializer
     permission_classes = [permissions.IsAuthenticated, IsBoardMember]
 
     def get_queryset(self):
         card_id = self.kwargs.get('card_pk')
-        return CustomFieldValue.objects.filter(card_id=card_id)
+        return CustomFieldValue.objects.filter(
+            card_id=card_id).select_related('custom_field__board')
+
+    def get_board(self):
+        card = Card.objects.select_related('list__board').filter(
+            id=self.kwargs.get('card_pk')).first()
+        return card.list.board if card else None
 
     def perform_create(self, serializer):
         card_id = self.kwargs.get('card_pk')
-        card = Card.objects.get(id=card_id)
+        card = Card.objects.select_related('list').get(id=card_id)
+        custom_field = serializer.validated_data['custom_field']
+        if custom_field.board_id != card.list.board_id:
+            raise ValidationError(
+                {'custom_field_id': 'Custom field belongs to another board'})
+        if CustomFieldValue.objects.filter(card=card, custom_field=custom_field).exists():
+            raise ValidationError(
+                {'custom_field_id': 'This card already has a value for this field'})
         serializer.save(card=card)
 
+    def batch(self, request, card_pk=None):
+        """Set many custom fields of one card at once"""
+        values = request.data.get('values')
+        if isinstance(values, dict):
+            values = [{'custom_field_id': key, 'value': value}
+                      for key, value in values.items()]
+        if not isinstance(values, list) or not values:
+            return Response(
+                {'error': 'values is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        board = self.get_board()
+        field_ids = [row.get('custom_field_id') for row in values
+                     if isinstance(row, dict)]
+        fields = {str(field.id): field for field in CustomField.objects.filter(
+            board=board, id__in=[pk for pk in field_ids if str(pk).isdigit()])}
+
+        entries, errors = [], {}
+        for row in values:
+            field_id = str(row.get('custom_field_id')) if isinstance(row, dict) else None
+            if field_id not in fields:
+                errors[str(field_id)] = 'Unknown custom field'
+                continue
+            entries.append((field_id, int(card_pk), fields[field_id], row.get('value')))
+
+        rows, invalid = custom_fields.build(entries)
+        errors.update(invalid)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = custom_fields.upsert(rows)
+        return Response(self.get_serializer(saved, many=True).data)
+
+
+class CustomFieldValueBatchView(BoardCacheMixin, APIView):
+    """Set one custom field on many cards of a board"""
+    permission_classes = [permissions.IsAuthenticated, IsBoardMember]
+
+    def get_board(self):
+        return Board.objects.filter(id=self.kwargs.get('board_pk')).first()
+
+    def post(self, request, board_pk):
+        custom_field = CustomField.objects.filter(
+            id=request.data.get('custom_field_id'), board_id=board_pk).first()
+        if custom_field is None:
+            return Response(
+                {'error': 'Custom field not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Either one value for every card or a value per card
+        values = request.data.get('values')
+        if values is None and isinstance(request.data.get('card_ids'), list):
+            values = {card_id: request.data.get('value')
+                      for card_id in request.data['card_ids']}
+        if not isinstance(values, dict) or not values:
+            return Response(
+                {'error': 'Send card_ids and value, or values by card id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        card_ids = set(Card.objects.filter(
+            list__board_id=board_pk,
+            id__in=[pk for pk in values if str(pk).isdigit()]
+        ).values_list('id', flat=True))
+
+        entries, errors = [], {}
+        for card_id, value in values.items():
+            if not str(card_id).isdigit() or int(card_id) not in card_ids:
+                errors[str(card_id)] = 'Card not found on this board'
+                continue
+            entries.append((str(card_id), int(card_id), custom_field, value))
+
+        rows, invalid = custom_fields.build(entries)
+        errors.update(invalid)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = custom_fields.upsert(rows)
+        return Response({
+            'message': f'{len(saved)} values updated',
+            'values': CustomFieldValueSerializer(saved, many=True).data
+        })
+
 
 class BoardTemplateViewSet(viewsets.ModelViewSet):
     queryset = BoardTemplate.objects.all()
@@ -570,8 +1493,9 @@ class BoardTemplateViewSet(viewsets.ModelViewSet):
             return BoardTemplate.objects.filter(
                 models.Q(is_public=True) | models.Q(
                     created_by=self.request.user)
-            )
-        return BoardTemplate.objects.filter(created_by=self.request.user)
+            ).select_related('created_by')
+        return BoardTemplate.objects.filter(
+            created_by=self.request.user).select_related('created_by')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -579,53 +1503,7 @@ class BoardTemplateViewSet(viewsets.ModelViewSet):
     def create_board(self, request, pk=None):
         """Create a new board from a template"""
         try:
-            template = self.get_object()
-            board_data = template.board_data
-
-            # Create the board
-            board = Board.objects.create(
-                title=f"{template.name} - {board_data.get('title', 'New Board')}",
-                description=board_data.get('description', ''),
-                owner=request.user,
-                visibility=board_data.get('visibility', 'private'),
-                background_color=board_data.get('background_color', 'blue')
-            )
-
-            # Add the creator as a member
-            BoardMember.objects.create(
-                board=board,
-                user=request.user,
-                role='owner'
-            )
-
-            # Create lists
-            lists_data = board_data.get('lists', [])
-            for list_data in lists_data:
-                list_obj = List.objects.create(
-                    title=list_data['title'],
-                    board=board,
-                    position=list_data.get('position', 0)
-                )
-
-                # Create cards for this list
-                cards_data = list_data.get('cards', [])
-                for card_data in cards_data:
-                    Card.objects.create(
-                        title=card_data['title'],
-                        description=card_data.get('description', ''),
-                        list=list_obj,
-                        position=card_data.get('position', 0),
-                        created_by=request.user
-                    )
-
-            # Create labels
-            labels_data = board_data.get('labels', [])
-            for label_data in labels_data:
-                Label.objects.create(
-                    name=label_data['name'],
-                    color=label_data.get('color', 'blue'),
-                    board=board
-                )
+            board = self.get_object().instantiate(request.user)
 
             return Response({
                 'message': 'Board created successfully from template',
@@ -646,52 +1524,19 @@ class CreateBoardFromTemplateView(APIView):
         """Create a new board from a template"""
         try:
             template = BoardTemplate.objects.get(id=template_id)
-            board_data = template.board_data
-
-            # Create the board
-            board = Board.objects.create(
-                title=f"{template.name} - {board_data.get('title', 'New Board')}",
-                description=board_data.get('description', ''),
-                owner=request.user,
-                visibility=board_data.get('visibility', 'private'),
-                background_color=board_data.get('background_color', 'blue')
-            )
-
-            # Add the creator as a member
-            BoardMember.objects.create(
-                board=board,
-                user=request.user,
-                role='owner'
-            )
-
-            # Create lists
-            lists_data = board_data.get('lists', [])
-            for list_data in lists_data:
-                list_obj = List.objects.create(
-                    title=list_data['title'],
-                    board=board,
-                    position=list_data.get('position', 0)
-                )
 
-                # Create cards for this list
-                cards_data = list_data.get('cards', [])
-                for card_data in cards_data:
-                    Card.objects.create(
-                        title=card_data['title'],
-                        description=card_data.get('description', ''),
-                        list=list_obj,
-                        position=card_data.get('position', 0),
-                        created_by=request.user
-                    )
-
-            # Create labels
-            labels_data = board_data.get('labels', [])
-            for label_data in labels_data:
-                Label.objects.create(
-                    name=label_data['name'],
-                    color=label_data.get('color', 'blue'),
-                    board=board
-                )
+            # ?async=true queues the instantiation and returns the job
+            if request.query_params.get('async', '').lower() in ('1', 'true'):
+                job = jobs.enqueue('templates.instantiate', {
+                    'template_id': template.id,
+                    'user_id': request.user.id,
+                }, user=request.user)
+                return Response({
+                    'message': 'Board creation queued',
+                    'job_id': job.id
+                }, status=status.HTTP_202_ACCEPTED)
+
+            board = template.instantiate(request.user)
 
             return Response({
                 'message': 'Board created successfully from template',
@@ -708,3 +1553,43 @@ class CreateBoardFromTemplateView(APIView):
                 {'error': f'Failed to create board from template: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Staff can inspect every job, other users only the ones they queued
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(created_by=self.request.user)
+
+
+class RequestMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Per endpoint latency, query and size percentiles of this process"""
+        return Response({
+            'pid': os.getpid(),
+            'since': instrumentation.started(),
+            'endpoints': instrumentation.summary(),
+            'board_cache': board_cache.stats(),
+        })
+
+    def delete(self, request):
+        instrumentation.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PrometheusMetricsView(APIView):
+    # Scrapers send the metrics token, not a user's JWT
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        """Counters and histograms of every worker in Prometheus text format"""
+        return Response(metrics.render())
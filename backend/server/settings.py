@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'kanban',
 ]
@@ -56,6 +57,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'kanban.middleware.CompressionMiddleware',
+    'kanban.instrumentation.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -96,6 +99,16 @@ DATABASES = {
 }
 
 
+# Holds the invalidation counters of the per-process membership and user
+# caches. Local memory only reaches one process; use a shared backend such
+# as Redis or Memcached when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -143,11 +156,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Image thumbnails (bounding boxes in pixels)
+KANBAN_THUMBNAIL_SIZES = {
+    'small': (320, 320),
+    'medium': (640, 640),
+    'large': (1280, 1280),
+}
+
+# Background jobs (run by `python manage.py run_jobs`)
+KANBAN_JOBS = {
+    'CONCURRENCY': int(os.environ.get('KANBAN_JOB_CONCURRENCY', 2)),
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 10,  # seconds, doubled on every retry
+    'STALE_AFTER': 600,  # seconds before a running job is considered lost
+    'EAGER': os.environ.get('KANBAN_JOBS_EAGER', 'False').lower() == 'true',
+}
+
+# Flow analytics rollups (see kanban/analytics.py)
+KANBAN_ANALYTICS = {
+    'ROLLUP_INTERVAL': 60,  # seconds between rollups queued by run_jobs
+    'ROLLUP_BATCH_SIZE': 1000,  # transitions folded per transaction
+    'MAX_DAYS': 731,  # longest report range
+    'DEFAULT_DAYS': 30,
+}
+
+# Cards deleted per transaction when purging a deleted board
+KANBAN_PURGE_BATCH_SIZE = 200
+
+# Cards updated per transaction by list bulk actions, and how long
+# their undo tokens stay valid (seconds)
+KANBAN_BULK_BATCH_SIZE = 500
+KANBAN_BULK_UNDO_TTL = 3600
+
+# Per-process cache of each user's board memberships, used by permission
+# checks and board listing (seconds, users)
+KANBAN_MEMBERSHIP_CACHE_TTL = 60
+KANBAN_MEMBERSHIP_CACHE_SIZE = 2048
+
+# Per-process cache of user rows used to authenticate JWT requests without
+# a query. Saving or deleting a user invalidates its entry in every process
+# only with a shared CACHES backend; otherwise other processes may use the
+# old row (e.g. of a deactivated user) for up to the TTL in seconds
+KANBAN_USER_CACHE_TTL = 300
+KANBAN_USER_CACHE_SIZE = 4096
+
+# Rendered GET /api/boards/<id>/ responses, keyed by board revision.
+# BACKEND is 'memory' (per process), 'file' (shared by the processes of a
+# host, stored in LOCATION, a temp directory by default), a dotted path to a
+# store class, or None to disable. MAX_BYTES and MAX_ENTRIES cap the store;
+# the least recently used entries are evicted first.
+KANBAN_BOARD_CACHE = {
+    'BACKEND': os.environ.get('KANBAN_BOARD_CACHE_BACKEND', 'memory'),
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'MAX_ENTRIES': 2000,
+}
+
+# Responses of at least this many bytes are compressed with brotli (when
+# installed and accepted) or gzip
+KANBAN_COMPRESSION_MIN_SIZE = 1024
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'kanban.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'kanban.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
@@ -161,7 +238,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -212,4 +289,32 @@ LOGGING = {
     'root': {
         'handlers': ['console'],
     },
+    'loggers': {
+        # One JSON line per request from kanban.instrumentation
+        'kanban.requests': {
+            'level': os.environ.get('KANBAN_REQUEST_LOG_LEVEL', 'INFO'),
+        },
+        'kanban': {
+            'level': os.environ.get('KANBAN_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Request instrumentation: Server-Timing headers, per request log lines and
+# the percentiles served at /api/metrics/requests/ (admin only)
+KANBAN_INSTRUMENTATION = {
+    'ENABLED': True,
+    'WINDOW': 500,
+    'N_PLUS_ONE_THRESHOLD': 10,
+    'SLOW_REQUEST_MS': 1000,
+    'SERVER_TIMING': True,
+}
+
+# Prometheus metrics at /metrics. Every worker keeps its own registry; with
+# several workers point KANBAN_METRICS_DIR at a directory they share so a
+# scrape adds them all up
+KANBAN_METRICS = {
+    'MULTIPROCESS_DIR': os.environ.get('KANBAN_METRICS_DIR') or None,
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': os.environ.get('KANBAN_METRICS_TOKEN', ''),
 }
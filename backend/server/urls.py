@@ -6,6 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from kanban.views import PrometheusMetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,6 +15,7 @@ urlpatterns = [
     path('api/auth/token/refresh/',
          TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('kanban.urls')),
+    path('metrics', PrometheusMetricsView.as_view(), name='prometheus-metrics'),
 ]
 
 # Serve media files in development
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { X, Calendar, Users, Tag, CheckSquare, MessageSquare, Plus, Paperclip, Palette } from 'lucide-react'
 import { cardAPI, commentAPI, labelAPI, attachmentAPI } from '../lib/api.ts'
 import { Button } from './ui/button'
@@ -58,11 +58,21 @@ export default function CardDetailModal({ cardId, isOpen, onClose }: CardDetailM
     }
   }, [card?.description])
 
-  const { data: comments } = useQuery({
+  const {
+    data: commentPages,
+    fetchNextPage: fetchOlderComments,
+    hasNextPage: hasOlderComments,
+    isFetchingNextPage: isFetchingOlderComments,
+  } = useInfiniteQuery({
     queryKey: ['comments', cardId],
-    queryFn: () => commentAPI.getComments(cardId).then(res => res.data.results || []),
+    queryFn: ({ pageParam }) =>
+      commentAPI.getComments(cardId, pageParam).then(res => res.data),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage: any) =>
+      lastPage.next ? new URL(lastPage.next).searchParams.get('cursor') ?? undefined : undefined,
     enabled: isOpen && !!cardId,
   })
+  const comments = commentPages?.pages.flatMap((page: any) => page.results || [])
 
   const addCommentMutation = useMutation({
     mutationFn: (content: string) => commentAPI.createComment(cardId, { content }),
@@ -384,14 +394,24 @@ export default function CardDetailModal({ cardId, isOpen, onClose }: CardDetailM
                       <div className="mt-2">
                         <EmojiReactions
                           commentId={comment.id}
-                          reactions={comment.reactions || []}
-                          currentUserId={1} // This should come from auth context
+                          reactionSummary={comment.reaction_summary || []}
                         />
                       </div>
                     </div>
                   </div>
                 </Card>
               ))}
+              {hasOlderComments && (
+                <Button
+                  variant="ghost"
+                  size="sm"
+                  className="w-full"
+                  onClick={() => fetchOlderComments()}
+                  disabled={isFetchingOlderComments}
+                >
+                  {isFetchingOlderComments ? 'Carregando...' : 'Carregar comentários anteriores'}
+                </Button>
+              )}
             </div>
           </div>
         </div>
@@ -110,7 +110,7 @@ export default function CardItem({ card, index }: CardItemProps) {
               <div className="h-16 w-full rounded-t-lg overflow-hidden">
                 {card.cover_image ? (
                   <img
-                    src={card.cover_image}
+                    src={card.cover_image_thumbnails?.small || card.cover_image}
                     alt="Card cover"
                     className="w-full h-full object-cover"
                   />
@@ -239,10 +239,10 @@ export default function CardItem({ card, index }: CardItemProps) {
 
               <div className="flex items-center justify-between text-xs text-gray-500 dark:dark-text-muted">
                 <div className="flex items-center gap-2">
-                  {card.comments && card.comments.length > 0 && (
+                  {card.comment_count > 0 && (
                     <div className="flex items-center gap-1">
                       <MessageSquare className="h-3 w-3" />
-                      <span>{card.comments.length}</span>
+                      <span>{card.comment_count}</span>
                     </div>
                   )}
                   {card.attachments && card.attachments.length > 0 && (
@@ -251,13 +251,11 @@ export default function CardItem({ card, index }: CardItemProps) {
                       <span>{card.attachments.length}</span>
                     </div>
                   )}
-                  {card.checklists && card.checklists.length > 0 && (
+                  {card.checklist_item_count > 0 && (
                     <div className="flex items-center gap-1">
                       <CheckSquare className="h-3 w-3" />
                       <span>
-                        {card.checklists.reduce((total: number, checklist: any) => 
-                          total + (checklist.items?.length || 0), 0
-                        )} itens
+                        {card.checklist_completed_count}/{card.checklist_item_count}
                       </span>
                     </div>
                   )}
@@ -80,6 +80,26 @@ export function ChecklistManager({ cardId, isOpen, onClose }: ChecklistManagerPr
     },
   })
 
+  const createItemsMutation = useMutation({
+    mutationFn: ({ checklistId, text }: { checklistId: number; text: string }) =>
+      checklistAPI.createItems(checklistId, text),
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ['checklists', cardId] })
+      queryClient.invalidateQueries({ queryKey: ['cards'] })
+      queryClient.invalidateQueries({ queryKey: ['lists'] })
+    },
+  })
+
+  const completeAllMutation = useMutation({
+    mutationFn: ({ checklistId, completed }: { checklistId: number; completed: boolean }) =>
+      checklistAPI.completeAllItems(checklistId, completed),
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ['checklists', cardId] })
+      queryClient.invalidateQueries({ queryKey: ['cards'] })
+      queryClient.invalidateQueries({ queryKey: ['lists'] })
+    },
+  })
+
   const deleteItemMutation = useMutation({
     mutationFn: ({ checklistId, itemId }: { checklistId: number; itemId: number }) =>
       checklistAPI.deleteItem(checklistId, itemId),
@@ -188,14 +208,30 @@ export function ChecklistManager({ cardId, isOpen, onClose }: ChecklistManagerPr
                         {checklist.title}
                       </CardTitle>
                     )}
-                    <Button
-                      variant="ghost"
-                      size="sm"
-                      onClick={() => deleteChecklistMutation.mutate(checklist.id)}
-                      className="text-red-500 hover:text-red-700"
-                    >
-                      <Trash2 className="h-4 w-4" />
-                    </Button>
+                    <div className="flex items-center">
+                      {checklist.item_count > 0 && (
+                        <Button
+                          variant="ghost"
+                          size="sm"
+                          onClick={() => completeAllMutation.mutate({
+                            checklistId: checklist.id,
+                            completed: checklist.completed_count < checklist.item_count,
+                          })}
+                          title={checklist.completed_count < checklist.item_count ? 'Marcar todos' : 'Desmarcar todos'}
+                        >
+                          <CheckSquare className="h-4 w-4 mr-1" />
+                          {checklist.completed_count}/{checklist.item_count}
+                        </Button>
+                      )}
+                      <Button
+                        variant="ghost"
+                        size="sm"
+                        onClick={() => deleteChecklistMutation.mutate(checklist.id)}
+                        className="text-red-500 hover:text-red-700"
+                      >
+                        <Trash2 className="h-4 w-4" />
+                      </Button>
+                    </div>
                   </div>
                 </CardHeader>
 
@@ -262,6 +298,14 @@ export function ChecklistManager({ cardId, isOpen, onClose }: ChecklistManagerPr
                           handleCreateItem(checklist.id)
                         }
                       }}
+                      onPaste={(e) => {
+                        // Pasting several lines creates one item per line
+                        const text = e.clipboardData.getData('text')
+                        if (text.includes('\n')) {
+                          e.preventDefault()
+                          createItemsMutation.mutate({ checklistId: checklist.id, text })
+                        }
+                      }}
                       className="flex-1"
                     />
                     <Button
@@ -5,16 +5,12 @@ import { Smile, ThumbsUp, Heart, Laugh, Eye, Frown, Angry, Sparkles, Flame, Hash
 
 interface EmojiReactionsProps {
   commentId: number
-  reactions: Array<{
-    id: number
+  reactionSummary: Array<{
     emoji: string
-    user: {
-      id: number
-      username: string
-    }
-    created_at: string
+    count: number
+    reacted_by_me: boolean
+    users: string[]
   }>
-  currentUserId: number
 }
 
 const EMOJI_OPTIONS = [
@@ -30,7 +26,7 @@ const EMOJI_OPTIONS = [
   { emoji: '💯', icon: Hash, label: 'Cem' },
 ]
 
-export default function EmojiReactions({ commentId, reactions, currentUserId }: EmojiReactionsProps) {
+export default function EmojiReactions({ commentId, reactionSummary }: EmojiReactionsProps) {
   const [showPicker, setShowPicker] = useState(false)
   const queryClient = useQueryClient()
 
@@ -51,11 +47,7 @@ export default function EmojiReactions({ commentId, reactions, currentUserId }:
   })
 
   const handleReactionClick = (emoji: string) => {
-    const existingReaction = reactions.find(
-      r => r.emoji === emoji && r.user.id === currentUserId
-    )
-
-    if (existingReaction) {
+    if (hasUserReacted(emoji)) {
       removeReactionMutation.mutate(emoji)
     } else {
       addReactionMutation.mutate(emoji)
@@ -63,21 +55,21 @@ export default function EmojiReactions({ commentId, reactions, currentUserId }:
     setShowPicker(false)
   }
 
-  const getReactionCount = (emoji: string) => {
-    return reactions.filter(r => r.emoji === emoji).length
+  const getSummary = (emoji: string) => {
+    return reactionSummary.find(r => r.emoji === emoji)
   }
 
   const hasUserReacted = (emoji: string) => {
-    return reactions.some(r => r.emoji === emoji && r.user.id === currentUserId)
+    return getSummary(emoji)?.reacted_by_me ?? false
   }
 
   const groupedReactions = EMOJI_OPTIONS.reduce((acc, option) => {
-    const count = getReactionCount(option.emoji)
-    if (count > 0) {
-      acc.push({ ...option, count, hasReacted: hasUserReacted(option.emoji) })
+    const summary = getSummary(option.emoji)
+    if (summary && summary.count > 0) {
+      acc.push({ ...option, count: summary.count, hasReacted: summary.reacted_by_me, users: summary.users })
     }
     return acc
-  }, [] as Array<typeof EMOJI_OPTIONS[0] & { count: number; hasReacted: boolean }>)
+  }, [] as Array<typeof EMOJI_OPTIONS[0] & { count: number; hasReacted: boolean; users: string[] }>)
 
   return (
     <div className="relative">
@@ -93,7 +85,7 @@ export default function EmojiReactions({ commentId, reactions, currentUserId }:
                   ? 'bg-blue-100 dark:bg-blue-900 text-blue-700 dark:text-blue-300'
                   : 'bg-gray-100 dark:bg-gray-700 text-gray-600 dark:text-gray-300 hover:bg-gray-200 dark:hover:bg-gray-600'
               }`}
-              title={`${reaction.label} (${reaction.count})`}
+              title={`${reaction.label} (${reaction.count}): ${reaction.users.join(', ')}${reaction.count > reaction.users.length ? '…' : ''}`}
             >
               <span className="text-sm">{reaction.emoji}</span>
               <span className="font-medium">{reaction.count}</span>
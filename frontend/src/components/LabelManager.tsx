@@ -47,8 +47,8 @@ export default function LabelManager({
   const queryClient = useQueryClient()
 
   const { data: labels, isLoading } = useQuery({
-    queryKey: ['labels', boardId],
-    queryFn: () => labelAPI.getLabels(boardId).then(res => res.data.results || []),
+    queryKey: ['labels', boardId, 'usage'],
+    queryFn: () => labelAPI.getLabelUsage(boardId).then(res => res.data),
     enabled: isOpen,
   })
 
@@ -224,6 +224,9 @@ export default function LabelManager({
                       <span className="text-sm font-medium text-gray-900 dark:text-white">
                         {label.name}
                       </span>
+                      <span className="text-xs text-gray-500 dark:text-gray-400">
+                        {label.card_count} {label.card_count === 1 ? 'card' : 'cards'}
+                      </span>
                       {selectedLabels.includes(label.id) && (
                         <Badge variant="secondary" className="text-xs">
                           Selecionada
@@ -35,6 +35,7 @@ export default function MemberManager({ boardId, isOpen, onClose }: MemberManage
   const [isAddingMember, setIsAddingMember] = useState(false)
   const [newMemberUsername, setNewMemberUsername] = useState('')
   const [newMemberRole, setNewMemberRole] = useState('member')
+  const [inviteResult, setInviteResult] = useState<{ unknown: string[]; already_members: string[] } | null>(null)
   
   const queryClient = useQueryClient()
 
@@ -45,12 +46,14 @@ export default function MemberManager({ boardId, isOpen, onClose }: MemberManage
   })
 
   const addMemberMutation = useMutation({
-    mutationFn: (data: { username: string; role: string }) =>
-      boardAPI.addMember(boardId, data),
-    onSuccess: () => {
+    mutationFn: (data: { identifiers: string[]; role: string }) =>
+      boardAPI.inviteMembers(boardId, data),
+    onSuccess: (res) => {
       queryClient.invalidateQueries({ queryKey: ['board-members', boardId] })
       setNewMemberUsername('')
       setIsAddingMember(false)
+      const { unknown, already_members } = res.data
+      setInviteResult(unknown.length || already_members.length ? { unknown, already_members } : null)
     },
   })
 
@@ -63,9 +66,11 @@ export default function MemberManager({ boardId, isOpen, onClose }: MemberManage
 
   const handleAddMember = (e: React.FormEvent) => {
     e.preventDefault()
-    if (newMemberUsername.trim()) {
+    // Several usernames or emails can be separated by commas or spaces
+    const identifiers = newMemberUsername.split(/[\s,;]+/).filter(Boolean)
+    if (identifiers.length > 0) {
       addMemberMutation.mutate({
-        username: newMemberUsername.trim(),
+        identifiers,
         role: newMemberRole,
       })
     }
@@ -110,12 +115,12 @@ export default function MemberManager({ boardId, isOpen, onClose }: MemberManage
                 <form onSubmit={handleAddMember} className="space-y-4">
                   <div>
                     <label className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-2">
-                      Nome de Usuário
+                      Usuários ou e-mails
                     </label>
                     <Input
                       value={newMemberUsername}
                       onChange={(e) => setNewMemberUsername(e.target.value)}
-                      placeholder="Digite o nome de usuário"
+                      placeholder="ana, bruno@empresa.com, carla"
                       required
                     />
                   </div>
@@ -149,6 +154,16 @@ export default function MemberManager({ boardId, isOpen, onClose }: MemberManage
                   </div>
                 </form>
               )}
+              {inviteResult && (
+                <div className="mt-4 text-sm text-gray-600 dark:text-gray-400 space-y-1">
+                  {inviteResult.unknown.length > 0 && (
+                    <p>Não encontrados: {inviteResult.unknown.join(', ')}</p>
+                  )}
+                  {inviteResult.already_members.length > 0 && (
+                    <p>Já são membros: {inviteResult.already_members.join(', ')}</p>
+                  )}
+                </div>
+              )}
             </CardContent>
           </Card>
 
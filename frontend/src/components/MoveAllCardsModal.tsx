@@ -30,17 +30,9 @@ export function MoveAllCardsModal({ isOpen, onClose, sourceList, cards }: MoveAl
   const moveAllCardsMutation = useMutation({
     mutationFn: async (targetListId: number) => {
       if (!cards || cards.length === 0) return
-      
-      // Move all cards to the target list
-      const movePromises = cards.map((card, index) => 
-        cardAPI.moveCard({
-          card_id: card.id,
-          list_id: targetListId,
-          position: index + 1 // API expects 1-based positions
-        })
-      )
-      
-      await Promise.all(movePromises)
+
+      // Move all cards to the target list in a single request
+      await cardAPI.moveAllCardsInList(sourceList.id, targetListId)
       return { success: true }
     },
     onSuccess: () => {
@@ -19,29 +19,9 @@ export function SortCardsModal({ isOpen, onClose, listId, cards }: SortCardsModa
   const sortCardsMutation = useMutation({
     mutationFn: async (sortBy: string) => {
       if (!cards || cards.length === 0) return
-      
-      let sortedCards = [...cards]
-      
-      switch (sortBy) {
-        case 'created_desc':
-          sortedCards.sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())
-          break
-        case 'created_asc':
-          sortedCards.sort((a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime())
-          break
-        case 'title_asc':
-          sortedCards.sort((a, b) => a.title.localeCompare(b.title))
-          break
-        default:
-          return
-      }
-      
-      // Update positions
-      const updatePromises = sortedCards.map((card, index) => 
-        cardAPI.updateCard(card.id, { position: index })
-      )
-      
-      await Promise.all(updatePromises)
+
+      // The server sorts and persists positions in a single request
+      await cardAPI.sortCardsInList(listId, sortBy)
       return { success: true }
     },
     onSuccess: () => {
@@ -32,16 +32,9 @@ interface CardData {
     username: string
     first_name: string
   }
-  comments: Array<{
-    id: number
-  }>
-  checklists: Array<{
-    id: number
-    items: Array<{
-      id: number
-      completed: boolean
-    }>
-  }>
+  comment_count: number
+  checklist_item_count: number
+  checklist_completed_count: number
   attachments: Array<{
     id: number
   }>
@@ -96,12 +89,10 @@ export default function TableView({ boardId }: TableViewProps) {
     })
   }, [cards, sortField, sortDirection])
 
-  const getChecklistProgress = (checklists: Array<{ items: Array<{ completed: boolean }> }>) => {
-    const totalItems = checklists.reduce((total, checklist) => total + checklist.items.length, 0)
-    const completedItems = checklists.reduce((total, checklist) => 
-      total + checklist.items.filter(item => item.completed).length, 0
-    )
-    return totalItems > 0 ? Math.round((completedItems / totalItems) * 100) : 0
+  const getChecklistProgress = (card: { checklist_item_count: number; checklist_completed_count: number }) => {
+    return card.checklist_item_count > 0
+      ? Math.round((card.checklist_completed_count / card.checklist_item_count) * 100)
+      : 0
   }
 
   if (isLoading) {
@@ -232,16 +223,16 @@ export default function TableView({ boardId }: TableViewProps) {
                   </div>
                 </TableCell>
                 <TableCell>
-                  {card.checklists.length > 0 ? (
+                  {card.checklist_item_count > 0 ? (
                     <div className="flex items-center gap-2">
                       <div className="w-16 bg-gray-200 dark:bg-gray-600 rounded-full h-2">
                         <div
                           className="bg-blue-600 h-2 rounded-full"
-                          style={{ width: `${getChecklistProgress(card.checklists)}%` }}
+                          style={{ width: `${getChecklistProgress(card)}%` }}
                         />
                       </div>
                       <span className="text-xs text-gray-500">
-                        {getChecklistProgress(card.checklists)}%
+                        {getChecklistProgress(card)}%
                       </span>
                     </div>
                   ) : (
@@ -250,10 +241,10 @@ export default function TableView({ boardId }: TableViewProps) {
                 </TableCell>
                 <TableCell>
                   <div className="flex items-center gap-3 text-xs text-gray-500">
-                    {card.comments.length > 0 && (
+                    {card.comment_count > 0 && (
                       <div className="flex items-center gap-1">
                         <MessageSquare className="h-3 w-3" />
-                        <span>{card.comments.length}</span>
+                        <span>{card.comment_count}</span>
                       </div>
                     )}
                     {card.attachments.length > 0 && (
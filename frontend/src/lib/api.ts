@@ -28,6 +28,31 @@ api.interceptors.request.use(
   }
 );
 
+// Refresh tokens rotate and the old one is blacklisted, so every request
+// that hits a 401 at the same time must share a single refresh call
+let refreshPromise: Promise<string> | null = null;
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshPromise = (refreshToken
+      ? axios.post(`${API_BASE_URL}/auth/token/refresh/`, { refresh: refreshToken })
+          .then((response) => {
+            const { access, refresh } = response.data;
+            localStorage.setItem('access_token', access);
+            if (refresh) {
+              localStorage.setItem('refresh_token', refresh);
+            }
+            return access as string;
+          })
+      : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshPromise = null;
+    });
+  }
+  return refreshPromise;
+};
+
 // Response interceptor to handle token refresh
 api.interceptors.response.use(
   (response) => {
@@ -45,19 +70,11 @@ api.interceptors.response.use(
       originalRequest._retry = true;
 
       try {
-        const refreshToken = localStorage.getItem('refresh_token');
-        if (refreshToken) {
-          const response = await axios.post(`${API_BASE_URL}/auth/token/refresh/`, {
-            refresh: refreshToken,
-          });
-
-          const { access } = response.data;
-          localStorage.setItem('access_token', access);
-
-          // Retry original request with new token
-          originalRequest.headers.Authorization = `Bearer ${access}`;
-          return api(originalRequest);
-        }
+        const access = await refreshAccessToken();
+
+        // Retry original request with new token
+        originalRequest.headers.Authorization = `Bearer ${access}`;
+        return api(originalRequest);
       } catch (refreshError) {
         // Refresh failed, redirect to login
         localStorage.removeItem('access_token');
@@ -102,6 +119,10 @@ export const boardAPI = {
     api.post(`/boards/${id}/members/`, data),
   removeMember: (id: number, memberId: number) =>
     api.delete(`/boards/${id}/members/${memberId}/`),
+  inviteMembers: (id: number, data: { identifiers: string[]; role?: string }) =>
+    api.post(`/boards/${id}/members/invite/`, data),
+  copyMembers: (id: number, sourceBoardId: number) =>
+    api.post(`/boards/${id}/members/copy/`, { source_board_id: sourceBoardId }),
   getTemplates: () => api.get('/templates/'),
   createFromTemplate: (templateId: number) => api.post(`/templates/${templateId}/create-board/`),
 };
@@ -137,6 +158,8 @@ export const cardAPI = {
     due_date?: string | null;
     cover_color?: string | null;
     cover_image?: File | null;
+    // Only apply the change if the card is still at this version
+    version: number;
   }>) => {
     // Check if we have a file upload
     if (data.cover_image) {
@@ -163,6 +186,24 @@ export const cardAPI = {
     api.patch(`/cards/${id}/`, { archived: true }),
   archiveAllCardsInList: (listId: number) =>
     api.post(`/lists/${listId}/archive-all-cards/`),
+  moveAllCardsInList: (listId: number, targetListId: number) =>
+    api.post(`/lists/${listId}/move-all-cards/`, { target_list_id: targetListId }),
+  sortCardsInList: (listId: number, sortBy: string) =>
+    api.post(`/lists/${listId}/sort-cards/`, { sort_by: sortBy }),
+  relabelCardsInList: (listId: number, data: { add_label_ids?: number[]; remove_label_ids?: number[] }) =>
+    api.post(`/lists/${listId}/relabel-cards/`, data),
+  undoBulkOperation: (token: string) =>
+    api.post(`/bulk-operations/${token}/undo/`),
+};
+
+// Archive API
+export const archiveAPI = {
+  getArchivedCards: (boardId: number, cursor?: string) =>
+    api.get(`/boards/${boardId}/archive/`, { params: { cursor } }),
+  getArchivedLists: (boardId: number, cursor?: string) =>
+    api.get(`/boards/${boardId}/archive/`, { params: { type: 'lists', cursor } }),
+  restore: (boardId: number, data: { card_ids?: number[]; list_ids?: number[] }) =>
+    api.post(`/boards/${boardId}/archive/restore/`, data),
 };
 
 // Label API
@@ -174,11 +215,21 @@ export const labelAPI = {
     api.patch(`/boards/${boardId}/labels/${id}/`, data),
   deleteLabel: (boardId: number, id: number) =>
     api.delete(`/boards/${boardId}/labels/${id}/`),
+  getLabelUsage: (boardId: number) => api.get(`/boards/${boardId}/labels/usage/`),
+  relabelCards: (boardId: number, cardIds: number[], addLabelIds: number[], removeLabelIds: number[]) =>
+    api.post(`/boards/${boardId}/cards/relabel/`, {
+      card_ids: cardIds,
+      add_label_ids: addLabelIds,
+      remove_label_ids: removeLabelIds,
+    }),
 };
 
 // Comment API
 export const commentAPI = {
-  getComments: (cardId: number) => api.get(`/cards/${cardId}/comments/`),
+  getComments: (cardId: number, cursor?: string) =>
+    api.get(`/cards/${cardId}/comments/`, { params: cursor ? { cursor } : {} }),
+  pollComments: (cardId: number, after: number) =>
+    api.get(`/cards/${cardId}/comments/poll/`, { params: { after } }),
   createComment: (cardId: number, data: { content: string }) =>
     api.post(`/cards/${cardId}/comments/`, data),
   updateComment: (cardId: number, id: number, data: { content: string }) =>
@@ -219,6 +270,30 @@ export const checklistAPI = {
     api.patch(`/checklists/${checklistId}/items/${itemId}/`, data),
   deleteItem: (checklistId: number, itemId: number) =>
     api.delete(`/checklists/${checklistId}/items/${itemId}/`),
+  createItems: (checklistId: number, text: string) =>
+    api.post(`/checklists/${checklistId}/items/bulk/`, { text }),
+  reorderItems: (checklistId: number, itemIds: number[]) =>
+    api.post(`/checklists/${checklistId}/items/reorder/`, { item_ids: itemIds }),
+  moveItems: (checklistId: number, itemIds: number[], targetChecklistId: number) =>
+    api.post(`/checklists/${checklistId}/items/move/`, {
+      item_ids: itemIds,
+      target_checklist_id: targetChecklistId,
+    }),
+  completeAllItems: (checklistId: number, completed: boolean) =>
+    api.post(`/checklists/${checklistId}/items/complete-all/`, { completed }),
+};
+
+// Custom Field API
+export const customFieldAPI = {
+  getFields: (boardId: number) => api.get(`/boards/${boardId}/custom-fields/`),
+  getCardValues: (cardId: number) => api.get(`/cards/${cardId}/custom-field-values/`),
+  setCardValues: (cardId: number, values: Record<number, unknown>) =>
+    api.post(`/cards/${cardId}/custom-field-values/batch/`, { values }),
+  setValueForCards: (boardId: number, customFieldId: number, values: Record<number, unknown>) =>
+    api.post(`/boards/${boardId}/custom-field-values/batch/`, {
+      custom_field_id: customFieldId,
+      values,
+    }),
 };
 
 export default api;
@@ -33,8 +33,11 @@ export interface List {
   cards: Card[];
   created_at: string;
   updated_at: string;
+  version: number;
 }
 
+export type Thumbnails = Record<'small' | 'medium' | 'large', string> | null;
+
 export interface Card {
   id: number;
   title: string;
@@ -42,10 +45,16 @@ export interface Card {
   list: number;
   position: number;
   labels: Label[];
-  comments: Comment[];
+  comment_count: number;
+  checklist_item_count: number;
+  checklist_completed_count: number;
+  cover_color?: string | null;
+  cover_image?: string | null;
+  cover_image_thumbnails?: Thumbnails;
   created_by: User;
   created_at: string;
   updated_at: string;
+  version: number;
 }
 
 export interface Label {
@@ -6,9 +6,13 @@ python manage.py create_superuser
 python manage.py runserver 0.0.0.0:8000 &
 BACKEND_PID=$!
 
+# Start background job worker
+python manage.py run_jobs &
+WORKER_PID=$!
+
 # Start nginx
 nginx -g "daemon off;" &
 NGINX_PID=$!
 
 # Wait for any process to exit
-wait $BACKEND_PID $NGINX_PID
+wait $BACKEND_PID $WORKER_PID $NGINX_PID